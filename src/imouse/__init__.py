@@ -1,20 +1,183 @@
-from .device import Device
+from typing import List, Optional, Union
+
+from .cache import FrameCache, OcrCache
 from .console import Console
+from .device import Device
+from .fleet import Fleet
+from .governor import Governor
+from .registry import DeviceRegistry
+from .resilience import CallPolicy
+from .scheduler import CommandScheduler
+from .supervisor import Supervisor
+from .templates import TemplateRegistry
+from .transfer import TransferManager
+from .transport import HttpTransport, WebSocketTransport
 
 
 class API:
-    def __init__(self, host: str, port: int):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        transport: str = "http",
+        templates: Optional[TemplateRegistry] = None,
+        governor: Optional[Governor] = None,
+        policy: Optional[CallPolicy] = None,
+    ):
         self._api_url = f"http://{host}:{port}/api"
+        self._ws_url = f"ws://{host}:{port}/ws"
+        self._frame_cache = FrameCache()
+        self._ocr_cache = OcrCache()
+        self._templates = templates if templates is not None else TemplateRegistry()
+        if transport == "http":
+            self._transport = HttpTransport(
+                self._api_url,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block,
+                governor=governor,
+                policy=policy,
+            )
+        elif transport == "ws":
+            self._transport = WebSocketTransport(
+                self._ws_url, governor=governor, policy=policy
+            )
+        else:
+            raise ValueError(f"Unknown transport: {transport}")
+        self._scheduler = CommandScheduler(self._transport)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def console(self):
-        return Console(self._api_url)
+        return Console(self)
 
     def device(self, device_id: str):
-        return Device(self._api_url, device_id)
+        return Device(self, device_id)
+
+    def fleet(
+        self,
+        devices: Union[dict, List[str]],
+        max_workers: int = 16,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Group devices to run the same call on all of them concurrently
+        :param devices: Device ID list or the Console.device.get_all() response
+        :param max_workers: Maximum number of devices called at the same time
+        :param timeout: Default per-device timeout in seconds
+        :return:
+        """
+        return Fleet(self, devices, max_workers=max_workers, timeout=timeout)
+
+    def registry(self, ttl: float = 5.0, indexes: Optional[dict] = None):
+        """
+        Cached device list with indexes and change notifications, share one registry between schedulers
+        :param ttl: Seconds a snapshot is served before the next lookup refreshes it
+        :param indexes: Extra or replaced indexes, index name to info field or function of the info
+        :return:
+        """
+        return DeviceRegistry(self.console(), ttl=ttl, indexes=indexes)
+
+    def supervisor(
+        self,
+        registry: Optional[DeviceRegistry] = None,
+        max_concurrent: int = 4,
+        interval: float = 2.0,
+        **kwargs,
+    ):
+        """
+        Background recovery of dropped screen mirroring, start() it or use it as a context manager
+        :param registry: Device registry to watch, a new one is created by default
+        :param max_concurrent: Maximum number of reconnects running at the same time
+        :param interval: Seconds between checks
+        :param kwargs: Back-off and escalation settings of Supervisor
+        :return:
+        """
+        return Supervisor(
+            self,
+            registry=registry,
+            max_concurrent=max_concurrent,
+            interval=interval,
+            **kwargs,
+        )
+
+    def transfers(
+        self,
+        max_concurrent: int = 4,
+        per_device: int = 1,
+        chunk_bytes: int = 32 << 20,
+        chunk_files: int = 20,
+        retries: int = 2,
+    ):
+        """
+        Transfer manager running chunked uploads and downloads concurrently within kernel and device limits
+        :param max_concurrent: Maximum number of chunks running on the kernel at the same time
+        :param per_device: Maximum number of chunks running on one device at the same time
+        :param chunk_bytes: Target size of a chunk in bytes
+        :param chunk_files: Maximum number of files in a chunk
+        :param retries: Attempts after the first one for a failing chunk
+        :return:
+        """
+        return TransferManager(
+            self,
+            max_concurrent=max_concurrent,
+            per_device=per_device,
+            chunk_bytes=chunk_bytes,
+            chunk_files=chunk_files,
+            retries=retries,
+        )
+
+    def close(self):
+        """
+        Close the shared transport and all of its pooled connections
+        :return:
+        """
+        self._scheduler.close()
+        self._transport.close()
 
 
-def api(host: str = "localhost", port: int = 9912):
-    return API(host, port)
+def api(
+    host: str = "localhost",
+    port: int = 9912,
+    pool_connections: int = 10,
+    pool_maxsize: int = 10,
+    pool_block: bool = False,
+    transport: str = "http",
+    templates: Optional[TemplateRegistry] = None,
+    governor: Optional[Governor] = None,
+    policy: Optional[CallPolicy] = None,
+):
+    """
+    Create an API bound to one iMouse kernel
+    :param host: Kernel host
+    :param port: Kernel port
+    :param pool_connections: Number of per-host connection pools to keep
+    :param pool_maxsize: Maximum number of keep-alive connections per host, raise it when driving many devices from many threads
+    :param pool_block: Block when all connections of a host are in use instead of opening extra ones
+    :param transport: "http" for pooled HTTP requests, "ws" to multiplex concurrent requests over one websocket
+    :param templates: Template registry shared by the devices, e.g. TemplateRegistry(directory=...) to persist templates
+    :param governor: Adaptive concurrency limits per class of fun, e.g. Governor() to keep a busy kernel from overloading
+    :param policy: Per-fun timeouts, retries of idempotent funs and the circuit breaker of the kernel, CallPolicy() by default
+    :return:
+    """
+    return API(
+        host,
+        port,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        transport=transport,
+        templates=templates,
+        governor=governor,
+        policy=policy,
+    )
 
 
-__all__ = ["api"]
+__all__ = ["api", "CallPolicy", "Governor", "TemplateRegistry"]
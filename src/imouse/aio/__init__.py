@@ -0,0 +1,111 @@
+from typing import Optional
+
+from ..cache import FrameCache, OcrCache
+from ..resilience import CallPolicy
+from ..templates import TemplateRegistry
+from .console import Console
+from .device import Device
+from .governor import AsyncGovernor
+from .registry import DeviceRegistry
+from .scheduler import AsyncCommandScheduler
+from .transport import AsyncHttpTransport, AsyncWebSocketTransport
+
+
+class API:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        transport: str = "http",
+        templates: Optional[TemplateRegistry] = None,
+        governor: Optional[AsyncGovernor] = None,
+        policy: Optional[CallPolicy] = None,
+    ):
+        self._api_url = f"http://{host}:{port}/api"
+        self._ws_url = f"ws://{host}:{port}/ws"
+        self._frame_cache = FrameCache()
+        self._ocr_cache = OcrCache()
+        self._templates = templates if templates is not None else TemplateRegistry()
+        if transport == "http":
+            self._transport = AsyncHttpTransport(
+                self._api_url,
+                limit=limit,
+                limit_per_host=limit_per_host,
+                governor=governor,
+                policy=policy,
+            )
+        elif transport == "ws":
+            self._transport = AsyncWebSocketTransport(
+                self._ws_url, governor=governor, policy=policy
+            )
+        else:
+            raise ValueError(f"Unknown transport: {transport}")
+        self._scheduler = AsyncCommandScheduler(self._transport)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def console(self):
+        return Console(self)
+
+    def device(self, device_id: str):
+        return Device(self, device_id)
+
+    def registry(self, ttl: float = 5.0, indexes: Optional[dict] = None):
+        """
+        Cached device list with indexes and change notifications, share one registry between tasks
+        :param ttl: Seconds a snapshot is served before the next lookup refreshes it
+        :param indexes: Extra or replaced indexes, index name to info field or function of the info
+        :return:
+        """
+        return DeviceRegistry(self.console(), ttl=ttl, indexes=indexes)
+
+    async def close(self):
+        """
+        Close the shared transport and all of its connections
+        :return:
+        """
+        await self._scheduler.close()
+        await self._transport.close()
+
+
+def api(
+    host: str = "localhost",
+    port: int = 9912,
+    limit: int = 100,
+    limit_per_host: int = 0,
+    transport: str = "http",
+    templates: Optional[TemplateRegistry] = None,
+    governor: Optional[AsyncGovernor] = None,
+    policy: Optional[CallPolicy] = None,
+):
+    """
+    Create an asyncio API bound to one iMouse kernel, every method of its devices and console is awaitable
+    :param host: Kernel host
+    :param port: Kernel port
+    :param limit: Maximum number of simultaneous HTTP connections, 0 for no limit
+    :param limit_per_host: Maximum number of simultaneous HTTP connections per host, 0 for no limit
+    :param transport: "http" for pooled HTTP requests, "ws" to multiplex concurrent requests over one websocket
+    :param templates: Template registry shared by the devices, e.g. TemplateRegistry(directory=...) to persist templates
+    :param governor: Adaptive concurrency limits per class of fun, e.g. AsyncGovernor() to keep a busy kernel from overloading
+    :param policy: Per-fun timeouts, retries of idempotent funs and the circuit breaker of the kernel, CallPolicy() by default
+    :return:
+    """
+    return API(
+        host,
+        port,
+        limit=limit,
+        limit_per_host=limit_per_host,
+        transport=transport,
+        templates=templates,
+        governor=governor,
+        policy=policy,
+    )
+
+
+__all__ = ["api", "AsyncGovernor"]
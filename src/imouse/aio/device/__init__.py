@@ -0,0 +1,57 @@
+from functools import cached_property
+from typing import Union
+
+from ... import device
+from .action import Action
+from .keyboard import Keyboard
+from .mouse import Mouse
+from .shortcut import Shortcut
+from .storage import Storage
+from .utility import Utility
+
+
+class Device(device.Device):
+    async def _post(self, data: dict) -> dict:
+        self._invalidate(data)
+        future = self._scheduler.submit(self._device_id, data)
+        if future is not None:
+            return await future
+        return await self._transport.post(data)
+
+    async def _post_binary(self, data: dict) -> Union[bytes, dict]:
+        self._invalidate(data)
+        future = self._scheduler.submit(self._device_id, data, binary=True)
+        if future is not None:
+            return await future
+        return await self._transport.post_binary(data)
+
+    async def _submit(self, data: dict):
+        self._invalidate(data)
+        future = self._scheduler.submit(self._device_id, data)
+        if future is not None:
+            return future
+        return await self._transport.submit(data)
+
+    @cached_property
+    def action(self):
+        return Action(self)
+
+    @cached_property
+    def mouse(self):
+        return Mouse(self)
+
+    @cached_property
+    def keyboard(self):
+        return Keyboard(self)
+
+    @cached_property
+    def shortcut(self):
+        return Shortcut(self)
+
+    @cached_property
+    def storage(self):
+        return Storage(self)
+
+    @cached_property
+    def utility(self):
+        return Utility(self)
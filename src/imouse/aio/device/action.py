@@ -0,0 +1,114 @@
+from typing import TYPE_CHECKING
+
+from ...device.action import ActionChain
+
+if TYPE_CHECKING:
+    from . import Device
+
+
+class Action:
+    def __init__(self, device: "Device"):
+        self._device = device
+
+    def chain(self) -> ActionChain:
+        """
+        Builder queuing actions to send as one key sequence, e.g. await action.chain().move_forward().activate(delay=0.5).run()
+        :return:
+        """
+        return ActionChain(self._device)
+
+    # Basic actions
+    async def help(self):
+        await self._device.keyboard.press("TAB+H")
+
+    # Movement actions
+    async def move_forward(self):
+        await self._device.keyboard.press("TAB")
+
+    async def move_backward(self):
+        await self._device.keyboard.press("SHIFT+TAB")
+
+    async def move_up(self):
+        await self._device.keyboard.press("UpArrow")
+
+    async def move_down(self):
+        await self._device.keyboard.press("DownArrow")
+
+    async def move_left(self):
+        await self._device.keyboard.press("LeftArrow")
+
+    async def move_right(self):
+        await self._device.keyboard.press("RightArrow")
+
+    async def move_to_beginning(self):
+        await self._device.keyboard.press("TAB+LeftArrow")
+
+    async def move_to_end(self):
+        await self._device.keyboard.press("TAB+RightArrow")
+
+    async def move_to_next_item(self):
+        await self._device.keyboard.press("CTRL+TAB")
+
+    async def move_to_previous_item(self):
+        await self._device.keyboard.press("CTRL+SHIFT+TAB")
+
+    async def find(self):
+        await self._device.keyboard.press("TAB+F")
+
+    # Interaction actions
+    async def activate(self):
+        await self._device.keyboard.press(" ")
+
+    async def go_back(self):
+        await self._device.keyboard.press("TAB+B")
+
+    async def contextual_menu(self):
+        await self._device.keyboard.press("TAB+M")
+
+    async def actions(self):
+        await self._device.keyboard.press("TAB+Z")
+
+    # Device actions
+    async def home(self):
+        await self._device.keyboard.press("FN+H")
+
+    async def app_switcher(self):
+        await self._device.keyboard.press("FN+UpArrow")
+
+    async def control_center(self):
+        await self._device.keyboard.press("FN+C")
+
+    async def notification_center(self):
+        await self._device.keyboard.press("FN+N")
+
+    async def lock_screen(self):
+        await self._device.keyboard.press("TAB+L")
+
+    async def restart(self):
+        await self._device.keyboard.press("CTRL+ALT+SHIFT+WIN+R")
+
+    async def siri(self):
+        await self._device.keyboard.press("FN+S")
+
+    async def accessibility_shortcut(self):
+        await self._device.keyboard.press("TAB+X")
+
+    async def sos(self):
+        await self._device.keyboard.press("CTRL+ALT+SHIFT+WIN+S")
+
+    async def rotate_device(self):
+        await self._device.keyboard.press("TAB+R")
+
+    async def analytics(self):
+        await self._device.keyboard.press("CTRL+ALT+SHIFT+WIN+.")
+
+    async def pass_through_mode(self):
+        await self._device.keyboard.press("CTRL+ALT+WIN+P")
+
+    # Gestures actions
+    async def keyboard_gestures(self):
+        await self._device.keyboard.press("TAB+G")
+
+    # Custom actions
+    async def spotlight(self):
+        await self._device.keyboard.press("WIN+ ")
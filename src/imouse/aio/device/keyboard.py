@@ -0,0 +1,99 @@
+import asyncio
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from ...device import keyboard
+from ...device.keyboard import PASTE_KEYS, Step, _failed, _steps, _typeable
+
+if TYPE_CHECKING:
+    from . import Device
+
+
+class Keyboard(keyboard.Keyboard):
+    async def sequence(
+        self, steps: List[Step], delay: float = 0.0, stop_on_error: bool = True
+    ) -> List[Optional[dict]]:
+        """
+        Press key combinations in order, pipelined over one socket in websocket mode
+        Steps without a pause are sent back to back, the pause after a step starts once the kernel acknowledged it
+        :param steps: Keys to press e.g. ["TAB", "TAB", (" ", 0.5)], a (keys, delay) tuple sets the pause after that step
+        :param delay: Pause in seconds after each step without its own
+        :param stop_on_error: Whether to stop after a failed step, steps already pipelined with it are still sent
+        :return: Response of each step in order, None for steps that were not sent
+        """
+        steps = _steps(steps, delay)
+        results = [None] * len(steps)
+        pending = []
+        for index, (keys, pause) in enumerate(steps):
+            payload = self._payload.keyboard_press(device_id=self._device_id, keys=keys)
+            last = index == len(steps) - 1
+            if self._pipelined:
+                pending.append((index, await self._submit(payload)))
+                if pause <= 0 and not last:
+                    continue
+                for position, future in pending:
+                    results[position] = await future
+                sent = [position for position, _ in pending]
+                pending = []
+            else:
+                results[index] = await self._post(payload)
+                sent = [index]
+            if stop_on_error and any(_failed(results[position]) for position in sent):
+                break
+            if pause > 0 and not last:
+                await asyncio.sleep(pause)
+        return results
+
+    async def enter_text(
+        self,
+        text: str,
+        devices: list = [],
+        type_limit: int = 32,
+        chunk: int = 32,
+        timeout: int = 30000,
+        paste_keys: str = PASTE_KEYS,
+    ) -> List[dict]:
+        """
+        Enter text by the fastest route, typed when short printable ASCII, otherwise sent to the clipboard and pasted
+        :param text: Text to enter, any UTF-8
+        :param devices: Other devices receiving the same text e.g. ["device_id1","device_id2"], the clipboard is set on all of them in one devlist request
+        :param type_limit: Longest text typed as keystrokes
+        :param chunk: Characters per keyboard_type request
+        :param timeout: Clipboard shortcut timeout, default 30 seconds
+        :param paste_keys: Key combination pasting the clipboard, default Command+V
+        :return: Responses of the requests in the order they were sent
+        """
+        targets = [
+            self._device,
+            *(self._device._peer(device_id) for device_id in devices),
+        ]
+        results = []
+        if len(text) <= type_limit and _typeable(text):
+            payloads = self._text_payloads(text, targets, chunk)
+        else:
+            results.append(
+                await self._device.utility.send_clipboard(text, devices, timeout)
+            )
+            if _failed(results[0]):
+                return results
+            payloads = self._paste_payloads(targets, paste_keys)
+        if self._pipelined:
+            futures = [await device._submit(payload) for device, payload in payloads]
+            results.extend([await future for future in futures])
+        else:
+            results.extend(await self._post_lanes(payloads))
+        return results
+
+    async def _post_lanes(self, payloads: List[Tuple["Device", dict]]) -> List[dict]:
+        lanes = {}
+        for index, (device, payload) in enumerate(payloads):
+            lanes.setdefault(device._device_id, (device, []))[1].append(
+                (index, payload)
+            )
+        responses = [None] * len(payloads)
+
+        async def lane(device: "Device", items: List[Tuple[int, dict]]):
+            for index, payload in items:
+                responses[index] = await device._post(payload)
+
+        await asyncio.gather(*(lane(device, items) for device, items in lanes.values()))
+        return responses
@@ -0,0 +1,34 @@
+import asyncio
+import time
+from typing import List, Optional
+
+from ...device import mouse
+from ...gesture import Gesture, superseded
+
+
+class Mouse(mouse.Mouse):
+    async def perform(self, gesture: Gesture) -> List[Optional[dict]]:
+        """
+        Run a gesture, each event is sent at its scheduled offset and pipelined in websocket mode so response latency does not stretch it
+        Moves that fall behind the schedule are dropped when the next move is already due
+        :param gesture: Gesture to run
+        :return: Response of each event in order, None for dropped moves
+        """
+        events = gesture.events
+        results = [None] * len(events)
+        pending = []
+        start = time.monotonic()
+        for index, (offset, kind, params) in enumerate(events):
+            delay = offset - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif superseded(events, index, time.monotonic() - start):
+                continue
+            payload = self._gesture_payload(kind, params)
+            if self._pipelined:
+                pending.append((index, await self._submit(payload)))
+            else:
+                results[index] = await self._post(payload)
+        for index, future in pending:
+            results[index] = await future
+        return results
@@ -0,0 +1,225 @@
+import asyncio
+import functools
+import time
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Union,
+)
+
+from ...device.shortcut import SEARCH_FIELD, _Found, _Launched, _Settled
+from ...screenshot import Screenshot
+
+if TYPE_CHECKING:
+    from . import Device
+
+
+class _Screen:
+    def __init__(self, vision, frames: Callable[[float], AsyncIterator[Screenshot]]):
+        """
+        Frames of a sequence of steps, await start() before the first step
+        :param vision: The imouse.vision module
+        :param frames: Fresh frames for a number of seconds, a pushed stream is shared by the steps while polling
+            starts over at each step
+        """
+        self.vision = vision
+        self._open = frames
+        self._frames = frames(0)
+        self.last = None
+
+    async def start(self) -> "_Screen":
+        self.last = await self._frames.__anext__()
+        return self
+
+    async def wait(
+        self, condition: Callable[[Screenshot], bool], deadline: float, fallback: float
+    ):
+        """
+        Consume frames until one meets the condition, the deadline passes or the frames end
+        :param condition: Step condition, run in the default executor
+        :param deadline: time.monotonic() deadline
+        :param fallback: Fixed delay once the frames ended before the deadline
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        frames = self._open(deadline - time.monotonic())
+        if frames is not self._frames:
+            await self._frames.aclose()
+            self._frames = frames
+        async for frame in frames:
+            self.last = frame
+            met = await loop.run_in_executor(None, condition, frame)
+            if met or time.monotonic() >= deadline:
+                return
+        await asyncio.sleep(max(0.0, min(fallback, deadline - time.monotonic())))
+
+    async def aclose(self):
+        await self._frames.aclose()
+
+
+class Shortcut:
+    def __init__(self, device: "Device"):
+        self._device = device
+
+    async def _open(self, timeout: float) -> Optional[_Screen]:
+        """
+        Frames for a sequence of steps, None when py-imouse[vision] is not installed
+        :param timeout: Seconds the whole sequence may take
+        :return:
+        """
+        try:
+            from ... import vision
+        except ImportError:
+            return None
+        utility = self._device.utility
+        if hasattr(self._device._transport, "subscribe"):
+            stream = utility._watch(timeout, 0.05, 0.5)
+            return await _Screen(vision, lambda timeout: stream).start()
+        return await _Screen(
+            vision, lambda timeout: utility._watch(timeout, 0.05, 0.5)
+        ).start()
+
+    async def _step(
+        self,
+        name: str,
+        action: Callable[[], Awaitable],
+        timings: Dict[str, float],
+        screen: Optional[_Screen],
+        until: Callable[[_Screen], Callable[[Screenshot], bool]],
+        timeout: float,
+        fallback: float,
+    ):
+        """
+        Send an input and wait until the screen shows its outcome
+        :param name: Step name in timings
+        :param action: Coroutine function sending the input
+        :param timings: Seconds taken per step, updated in place
+        :param screen: Frames of the sequence, None when py-imouse[vision] is not installed
+        :param until: Builds the condition of the step from the screen before the input
+        :param timeout: Seconds to wait for the condition, a step reaching it moves on
+        :param fallback: Fixed delay used without frames or once they ended
+        :return:
+        """
+        start = time.monotonic()
+        if screen is None:
+            await action()
+            await asyncio.sleep(fallback)
+        else:
+            loop = asyncio.get_running_loop()
+            condition = await loop.run_in_executor(None, until, screen)
+            await action()
+            await screen.wait(condition, start + timeout, fallback)
+        timings[name] = time.monotonic() - start
+
+    async def open_app(
+        self,
+        app_name: str,
+        initialize: bool = False,
+        icon: Union[bytes, str] = None,
+        timeout: float = 5.0,
+        splash: float = 2.0,
+    ) -> Dict[str, float]:
+        """
+        Open an app through Spotlight, each step waits for its outcome on screen instead of a fixed delay
+        Spotlight counts as open once its search field is shown, the search once results or the icon are listed below it,
+        and the app once its screen replaced its launch screen or held still for splash seconds
+        :param app_name: App name typed into Spotlight
+        :param initialize: Whether to close the app in the app switcher and open it again
+        :param icon: Optional app icon, image binary data or a template name loaded into templates, awaited among the search results
+        :param timeout: Seconds to wait for each step, a step reaching it moves on
+        :param splash: Seconds the first still screen of the app must hold to count as the app rather than its launch screen
+        :return: Seconds taken per step
+        """
+        device = self._device
+        timings = {}
+        settled = _Settled
+        launched = functools.partial(_Launched, splash=splash)
+        screen = await self._open(timeout * (9 if initialize else 4))
+        if icon is None or screen is None:
+            search = functools.partial(_Settled, top=SEARCH_FIELD)
+        else:
+            template = device.utility._templates.gray(icon)
+            search = functools.partial(_Found, template=template, top=SEARCH_FIELD)
+        try:
+            await self._step(
+                "home",
+                device.action.home,
+                timings,
+                screen,
+                functools.partial(_Settled, patience=1),
+                timeout,
+                1,
+            )
+            await self._step(
+                "spotlight",
+                device.action.spotlight,
+                timings,
+                screen,
+                functools.partial(_Settled, bottom=SEARCH_FIELD),
+                timeout,
+                1,
+            )
+            await self._step(
+                "search",
+                lambda: device.keyboard.type(app_name),
+                timings,
+                screen,
+                search,
+                timeout,
+                2,
+            )
+            await self._step(
+                "launch", device.action.activate, timings, screen, launched, timeout, 1
+            )
+
+            if initialize:
+                await self._step(
+                    "switcher",
+                    device.action.app_switcher,
+                    timings,
+                    screen,
+                    settled,
+                    timeout,
+                    1,
+                )
+
+                async def close():
+                    await device.mouse.swipe(direction="left")
+                    await device.mouse.swipe(direction="up", start_y=600, end_y=0)
+
+                await self._step("close", close, timings, screen, settled, timeout, 1)
+                await self._step(
+                    "reopen",
+                    device.action.app_switcher,
+                    timings,
+                    screen,
+                    settled,
+                    timeout,
+                    1,
+                )
+                await self._step(
+                    "select",
+                    device.action.move_to_next_item,
+                    timings,
+                    screen,
+                    settled,
+                    timeout,
+                    1,
+                )
+                await self._step(
+                    "relaunch",
+                    device.action.activate,
+                    timings,
+                    screen,
+                    launched,
+                    timeout,
+                    1,
+                )
+        finally:
+            if screen is not None:
+                await screen.aclose()
+        return timings
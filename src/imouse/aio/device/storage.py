@@ -0,0 +1,128 @@
+import asyncio
+import posixpath
+
+from ... import manifest
+from ...device import storage
+
+
+class Storage(storage.Storage):
+    async def get_photos(self, num: int = 5, timeout: int = 30000):
+        """
+        Get phone photo list
+        :param num: Number of photos to get, default 5, maximum 30
+        :param timeout: Timeout, default 30 seconds
+        :return:
+        """
+        if num > 30:
+            num = 30
+        parameter = {"num": num}
+        ret = await self._post(
+            self._payload.shortcut(
+                device_id=self._device_id,
+                id=1,
+                parameter=parameter,
+                timeout=timeout,
+            )
+        )
+        for item in ret.get("retdata") or []:
+            if item.get("ext"):
+                item["name"] = item["name"] + "." + item["ext"]
+            item.pop("ext", None)
+        return ret
+
+    async def get_files(self, path: str = "/", timeout: int = 30000):
+        """
+        Get file list
+        :param path: Path, default is root directory
+        :param timeout: Timeout, default 30 seconds
+        :return:
+        """
+        parameter = {"path": path}
+        ret = await self._post(
+            self._payload.shortcut(
+                device_id=self._device_id,
+                id=4,
+                parameter=parameter,
+                timeout=timeout,
+            )
+        )
+        for item in ret.get("retdata") or []:
+            if item.get("ext"):
+                item["name"] = item["name"] + "." + item["ext"]
+            item.pop("ext", None)
+        return ret
+
+    async def _walk(self, path: str, timeout: int):
+        """
+        List a device directory recursively
+        :return: Signature per file path and the directories that could not be listed
+        """
+        files, failed = {}, []
+        pending = [path]
+        while pending:
+            directory = pending.pop()
+            ret = await self.get_files(directory, timeout)
+            if ret.get("status") != 0:
+                failed.append(directory)
+                continue
+            for item in ret.get("retdata") or []:
+                child = posixpath.join(directory, item["name"])
+                if manifest.is_dir(item):
+                    pending.append(child)
+                else:
+                    files[child] = manifest.signature(item)
+        return files, failed
+
+    async def sync(
+        self,
+        remote_path: str,
+        local_dir: str,
+        media_dir: str,
+        chunk: int = 20,
+        delete: bool = True,
+        timeout: int = 30000,
+    ) -> manifest.SyncResult:
+        """
+        Mirror a device directory recursively into a local directory, later runs only download new or changed files
+        The manifest in local_dir records the size, modification time and hash of every mirrored file
+        :param remote_path: Device directory e.g. "/"
+        :param local_dir: Local mirror directory
+        :param media_dir: Directory the kernel downloads files into, iMouse installation directory\Shortcut\Media\File
+        :param chunk: Maximum number of files per download request
+        :param delete: Whether to delete local files removed from the device, skipped when a directory could not be listed
+        :param timeout: Timeout per request, default 30 seconds
+        :return: SyncResult with the downloaded, deleted and failed paths
+        """
+        loop = asyncio.get_running_loop()
+        mirror = manifest.Manifest(local_dir, remote_path)
+        remote, unlisted = await self._walk(remote_path, timeout)
+        fetch, removed, unchanged, failed = mirror.plan(remote)
+        downloaded = []
+        for paths in manifest.chunks(fetch, chunk):
+            lock = manifest.MediaLock(media_dir, paths)
+            await loop.run_in_executor(None, lock.acquire)
+            try:
+                ret = await self.download_files(paths, timeout)
+                for path in paths:
+                    changed = None
+                    if ret.get("status") == 0:
+                        changed = await loop.run_in_executor(
+                            None, mirror.collect, media_dir, path, remote[path]
+                        )
+                    if changed is None:
+                        failed.append(path)
+                    elif changed:
+                        downloaded.append(path)
+                    else:
+                        unchanged += 1
+            finally:
+                lock.release()
+            mirror.save()
+        deleted = []
+        # A directory that could not be listed looks empty, a failed download does not hide anything
+        if delete and not unlisted:
+            for path in removed:
+                mirror.delete(path)
+                deleted.append(path)
+        mirror.save()
+        return manifest.SyncResult(downloaded, deleted, unchanged, unlisted + failed)
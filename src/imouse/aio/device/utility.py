@@ -0,0 +1,386 @@
+import asyncio
+import functools
+import math
+import time
+from typing import AsyncIterator, Optional, Union
+
+from ... import wait
+from ...device import utility
+from ...screenshot import Screenshot
+from ...types import ColorParams, ColorsParams
+from ..stream import AsyncScreenshotStream
+
+
+class Utility(utility.Utility):
+    async def screenshot(
+        self,
+        zip: bool = False,
+        binary: bool = False,
+        jpg: bool = True,
+        original: bool = False,
+    ):
+        """
+        Capture device screen
+        :param zip: Whether to use gzip compression, only effective in HTTP mode
+        :param binary: Whether to return binary data, only effective in websocket mode
+        :param jpg: Whether to return JPG format image, default BMP
+        :param original: Whether to return high-definition original image, original image will always be JPG format
+        :return: Screenshot, the image is decoded on first access to its bytes, array or save()
+        """
+        payload = self._payload.get_device_screenshot(
+            device_id=self._device_id,
+            zip=zip,
+            binary=binary,
+            jpg=jpg,
+            original=original,
+        )
+        if binary and hasattr(self._transport, "post_binary"):
+            ret = await self._post_binary(payload)
+            if isinstance(ret, bytes):
+                return Screenshot(raw=ret)
+            return Screenshot(ret)
+        return Screenshot(await self._post(payload))
+
+    async def frame(self, original: bool = False):
+        """
+        Current screen for client-side analysis, reused while the device frame cache is enabled and still fresh
+        :param original: Whether to use the high-definition original image
+        :return: Screenshot
+        """
+        frame = self._frame_cache.get(self._device_id, original)
+        if frame is None:
+            generation = self._frame_cache.generation(self._device_id)
+            frame = await self.screenshot(zip=True, jpg=original, original=original)
+            self._frame_cache.put(self._device_id, frame, generation, original)
+        return frame
+
+    async def match_image(
+        self,
+        image: Union[bytes, str],
+        scan_area: list = None,
+        original: bool = False,
+        accuracy: float = 0.8,
+        local: bool = False,
+    ):
+        """
+        Find image
+        :param img: Image binary data or a template name loaded into templates
+        :param scan_area: Region, if empty then full screen [[x,y],[x,y],[x,y],[x,y]] coordinates for top-left, bottom-left, top-right, bottom-right
+        :param original: Whether to use high-definition image for search
+        :param accuracy: Similarity threshold
+        :param local: Whether to match in a worker thread with NumPy against frame() instead of on the kernel, requires py-imouse[vision]
+        :return:
+        """
+        if not local:
+            return await super().match_image(image, scan_area, original, accuracy)
+        frame = await self.frame(original)
+        match = functools.partial(
+            self._match_local, frame, "find_image", [image], scan_area, accuracy
+        )
+        return await asyncio.get_running_loop().run_in_executor(None, match)
+
+    async def match_images(
+        self,
+        images: list,
+        scan_area: list = None,
+        original: bool = False,
+        all: bool = False,
+        repeat: bool = False,
+        accuracy: float = 0.8,
+        local: bool = False,
+    ):
+        """
+        Find image - supports searching multiple images simultaneously and finding duplicate images, recommended to use this interface
+        :param img_list: Image binary data or template name array
+        :param scan_area: Region, if empty then full screen, invalid for multiple image search [[x,y],[x,y],[x,y],[x,y]] coordinates for top-left, bottom-left, top-right, bottom-right
+        :param original: Whether to use high-definition image for search
+        :param all: Whether to search all images
+        :param repeat: Whether to search for duplicate images
+        :param accuracy: Similarity threshold
+        :param local: Whether to match in a worker thread with NumPy against frame() instead of on the kernel, requires py-imouse[vision]
+        :return:
+        """
+        if not local:
+            return await super().match_images(
+                images, scan_area, original, all, repeat, accuracy
+            )
+        frame = await self.frame(original)
+        match = functools.partial(
+            self._match_local,
+            frame,
+            "find_image_ex",
+            images,
+            scan_area,
+            accuracy,
+            all=all,
+            repeat=repeat,
+        )
+        return await asyncio.get_running_loop().run_in_executor(None, match)
+
+    async def ocr(
+        self,
+        scan_area: list,
+        original: bool = False,
+        enhanced: bool = False,
+        cache: bool = False,
+        frame: Optional[Screenshot] = None,
+    ):
+        """
+        OCR text recognition - normal mode
+        :param scan_area: Region [[x,y],[x,y],[x,y],[x,y]] coordinates for top-left, bottom-left, top-right, bottom-right
+        :param original: Whether to use high-definition image
+        :param enhanced: Whether to use enhanced OCR mode
+        :param cache: Whether to reuse the result of a previous call while the pixels of the region are unchanged, requires py-imouse[vision] and the device frame cache or a frame
+        :param frame: Current screen the cache compares, e.g. from stream_screenshots(), by default frame()
+        :return: OCR recognition results
+        """
+        payload = self._payload.ocr(
+            self._device_id,
+            original=original,
+            enhanced=enhanced,
+            area=scan_area,
+        )
+        if not cache:
+            return await self._post(payload)
+        self._ocr_frame_required(frame)
+        if frame is None:
+            frame = await self.frame(original)
+        key = self._ocr_key(frame, scan_area, original, enhanced)
+        ret = self._ocr_cache.get(key)
+        if ret is None:
+            ret = await self._post(payload)
+            if ret.get("status") == 0:
+                self._ocr_cache.put(key, ret)
+        return ret
+
+    async def pick_color(
+        self,
+        color: ColorParams,
+        local: bool = False,
+    ):
+        """
+        Multi-point color finding - same usage as DaMo, full screen search if all region coordinates are empty or 0
+        :param color: Color parameters including region, color values, similarity and direction
+        :param local: Whether to search in a worker thread with NumPy against frame() instead of on the kernel, requires py-imouse[vision]
+        :return: Color finding results
+        """
+        if not local:
+            return await super().pick_color(color)
+        frame = await self.frame()
+        pick = functools.partial(self._pick_local, frame, color=color)
+        return await asyncio.get_running_loop().run_in_executor(None, pick)
+
+    async def pick_colors(
+        self,
+        colors: ColorsParams,
+        local: bool = False,
+    ):
+        """
+        Multi-point color finding - same usage as DaMo, full screen search if all region coordinates are empty or 0
+        :param colors: Colors parameters including color values, similarity and direction
+        :param local: Whether to search in a worker thread with NumPy against frame() instead of on the kernel, requires py-imouse[vision]
+        :return: Color finding results
+        """
+        if not local:
+            return await super().pick_colors(colors)
+        frame = await self.frame()
+        pick = functools.partial(self._pick_local, frame, colors=colors)
+        return await asyncio.get_running_loop().run_in_executor(None, pick)
+
+    def stream_screenshots(self, duration: int = 300, jpg: bool = False):
+        """
+        Stream device screen frames pushed by the kernel, only effective in websocket mode
+        :param duration: Streaming duration in seconds
+        :param jpg: Whether to stream JPG frames, default BMP
+        :return: Async iterator of Screenshot, close it or leave the async with block to stop the stream
+        """
+        return AsyncScreenshotStream(
+            self._transport,
+            self._payload,
+            self._device_id,
+            duration=duration,
+            jpg=jpg,
+        )
+
+    async def _watch(
+        self, timeout: float, interval: float, max_interval: float
+    ) -> AsyncIterator[Screenshot]:
+        """
+        Fresh frames until the timeout, pushed by the kernel in websocket mode and polled with back-off otherwise
+        """
+        deadline = time.monotonic() + timeout
+        if hasattr(self._transport, "subscribe"):
+            duration = max(1, math.ceil(timeout))
+            async with self.stream_screenshots(duration=duration) as stream:
+                async for frame in stream:
+                    yield frame
+                    if time.monotonic() >= deadline:
+                        return
+            return
+        yield await self.screenshot(zip=True, jpg=False)
+        for delay in wait.intervals(timeout, interval, max_interval):
+            await asyncio.sleep(delay)
+            yield await self.screenshot(zip=True, jpg=False)
+
+    async def _watch_for(
+        self, check, timeout: float, interval: float, max_interval: float
+    ):
+        """
+        First truthy result of check run in a worker thread on watched frames
+        """
+        loop = asyncio.get_running_loop()
+        frames = self._watch(timeout, interval, max_interval)
+        try:
+            async for frame in frames:
+                ret = await loop.run_in_executor(None, check, frame)
+                if ret:
+                    return ret
+        finally:
+            await frames.aclose()
+        return None
+
+    async def wait_for_image(
+        self,
+        image: Union[bytes, str],
+        scan_area: list = None,
+        original: bool = False,
+        accuracy: float = 0.8,
+        local: bool = False,
+        timeout: float = 10.0,
+        interval: float = 0.1,
+        max_interval: float = 1.0,
+    ) -> Optional[dict]:
+        """
+        Wait until an image appears on screen
+        :param image: Image binary data or a template name loaded into templates
+        :param scan_area: Region, if empty then full screen [[x,y],[x,y],[x,y],[x,y]]
+        :param original: Whether to use high-definition image for search
+        :param accuracy: Similarity threshold
+        :param local: Whether to match in a worker thread, frames are streamed in websocket mode
+        :param timeout: Timeout in seconds
+        :param interval: First delay between checks in seconds, grows up to max_interval
+        :param max_interval: Largest delay between checks in seconds
+        :return: match_image response once found, None on timeout
+        """
+        if local and not original:
+            return await self._watch_for(
+                lambda frame: wait.found(
+                    self._match_local(frame, "find_image", [image], scan_area, accuracy)
+                ),
+                timeout,
+                interval,
+                max_interval,
+            )
+
+        async def check():
+            ret = await self.match_image(image, scan_area, original, accuracy, local)
+            return wait.found(ret)
+
+        return await wait.apoll(check, timeout, interval, max_interval)
+
+    async def wait_for_text(
+        self,
+        text: str,
+        scan_area: list,
+        original: bool = False,
+        enhanced: bool = False,
+        timeout: float = 10.0,
+        interval: float = 0.1,
+        max_interval: float = 1.0,
+    ) -> Optional[dict]:
+        """
+        Wait until OCR of a region contains a text
+        :param text: Text to look for
+        :param scan_area: Region [[x,y],[x,y],[x,y],[x,y]]
+        :param original: Whether to use high-definition image
+        :param enhanced: Whether to use enhanced OCR mode
+        :param timeout: Timeout in seconds
+        :param interval: First delay between checks in seconds, grows up to max_interval
+        :param max_interval: Largest delay between checks in seconds
+        :return: ocr response once the text is recognised, None on timeout
+        """
+
+        async def check():
+            ret = await self.ocr(scan_area, original, enhanced)
+            return wait.contains_text(ret, text)
+
+        return await wait.apoll(check, timeout, interval, max_interval)
+
+    async def wait_for_color(
+        self,
+        color: ColorParams,
+        local: bool = False,
+        timeout: float = 10.0,
+        interval: float = 0.1,
+        max_interval: float = 1.0,
+    ) -> Optional[dict]:
+        """
+        Wait until a multi-point color is found
+        :param color: Color parameters including region, color values, similarity and direction
+        :param local: Whether to search in a worker thread, frames are streamed in websocket mode
+        :param timeout: Timeout in seconds
+        :param interval: First delay between checks in seconds, grows up to max_interval
+        :param max_interval: Largest delay between checks in seconds
+        :return: pick_color response once found, None on timeout
+        """
+        if local:
+            return await self._watch_for(
+                lambda frame: wait.found(self._pick_local(frame, color=color)),
+                timeout,
+                interval,
+                max_interval,
+            )
+
+        async def check():
+            return wait.found(await self.pick_color(color))
+
+        return await wait.apoll(check, timeout, interval, max_interval)
+
+    async def wait_for_change(
+        self,
+        scan_area: list = None,
+        timeout: float = 10.0,
+        interval: float = 0.1,
+        max_interval: float = 1.0,
+    ) -> Optional[Screenshot]:
+        """
+        Wait until a region of the screen changes from how it looks when called, requires py-imouse[vision]
+        :param scan_area: Region, if empty then full screen [[x,y],[x,y],[x,y],[x,y]]
+        :param timeout: Timeout in seconds
+        :param interval: First delay between checks in seconds, grows up to max_interval
+        :param max_interval: Largest delay between checks in seconds
+        :return: First changed frame, None on timeout
+        """
+        from ... import vision
+
+        baseline = None
+
+        def changed(frame):
+            nonlocal baseline
+            fingerprint = vision.fingerprint(frame, scan_area)
+            if baseline is None:
+                baseline = fingerprint
+            elif fingerprint != baseline:
+                return frame
+            return None
+
+        return await self._watch_for(changed, timeout, interval, max_interval)
+
+    async def get_clipboard(self, devices: list = [], timeout: int = 30000):
+        """
+        Get phone clipboard content
+        :param devices: Synchronous operation device list e.g. ["device_id1","device_id2"]
+        :param timeout: Timeout, default 30 seconds
+        :return:
+        """
+        ret = await self._post(
+            self._payload.shortcut(
+                device_id=self._device_id,
+                id=11,
+                devices=devices,
+                timeout=timeout,
+            )
+        )
+        if "retdata" in ret:
+            ret["retdata"]["text"] = self._hex_to_utf8(ret["retdata"]["hex"])
+        return ret
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from ..governor import Governor, _Token, classify, latency_key
+
+
+class AsyncGovernor(Governor):
+    """
+    Governor whose acquire() waits without blocking the event loop, share it between the tasks of one loop
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waiters = []
+
+    async def acquire(self, data: dict) -> _Token:
+        """
+        Wait until the class of a payload has room for another request
+        :param data: Payload
+        :return: Token to release once the response arrived
+        """
+        budget = classify(data)
+        while True:
+            with self._lock:
+                if self._take(budget):
+                    break
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        return _Token(budget, latency_key(data), time.monotonic())
+
+    def release(self, token: _Token, ok: bool = True):
+        """
+        Record the outcome of a request and free its slot
+        :param token: Token returned by acquire()
+        :param ok: Whether the kernel answered, see succeeded(), failures shrink the limit
+        :return:
+        """
+        with self._lock:
+            self._record(token, ok)
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
@@ -0,0 +1,110 @@
+import asyncio
+from typing import Any, List, Optional, Set
+
+from .. import registry
+
+
+class DeviceRegistry(registry.DeviceRegistry):
+    # len(), in and iteration read the current snapshot, await refresh() or a lookup to renew it
+
+    async def refresh(self) -> bool:
+        """
+        Fetch the device list now
+        :return: Whether the console answered, the previous snapshot is kept otherwise
+        """
+        try:
+            ret = await self._console.device.get_all()
+        except Exception:
+            self._failed()
+            raise
+        if ret.get("status") != 0:
+            self._failed()
+            return False
+        self._emit(self._apply(ret))
+        return True
+
+    def _refresh_lock(self) -> asyncio.Lock:
+        if not isinstance(self._refreshing, asyncio.Lock):
+            # Created on first use so it belongs to the running loop
+            self._refreshing = asyncio.Lock()
+        return self._refreshing
+
+    async def _fresh(self):
+        if not self._stale():
+            return
+        async with self._refresh_lock():
+            # Another task may have refreshed while this one waited
+            if self._stale():
+                await self.refresh()
+
+    async def get(self, device_id: str) -> Optional[dict]:
+        """
+        Info of a device
+        :param device_id: Device ID
+        :return: Device info or None when unknown
+        """
+        await self._fresh()
+        return self._devices.get(device_id)
+
+    async def find(self, **criteria) -> List[str]:
+        """
+        Devices matching every criterion, e.g. await find(gid="1", airplay=1)
+        :param criteria: Index name to value
+        :return: Device IDs
+        """
+        await self._fresh()
+        return self._lookup(criteria)
+
+    async def values(self, index: str) -> Set[Any]:
+        """
+        Distinct values of an index
+        :param index: Index name
+        :return:
+        """
+        await self._fresh()
+        with self._lock:
+            return set(self._indexes[index])
+
+    def __contains__(self, device_id: str) -> bool:
+        return device_id in self._devices
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __iter__(self):
+        return iter(list(self._devices))
+
+    def start(self, interval: Optional[float] = None):
+        """
+        Refresh in a background task so listeners are notified without lookups
+        :param interval: Seconds between refreshes, default the TTL
+        :return:
+        """
+        if self._thread is not None:
+            return
+        interval = self._ttl if interval is None else interval
+
+        async def run():
+            while True:
+                try:
+                    async with self._refresh_lock():
+                        await self.refresh()
+                except Exception:
+                    # A kernel hiccup must not end the task, the next refresh retries
+                    pass
+                await asyncio.sleep(interval)
+
+        self._thread = asyncio.ensure_future(run())
+
+    async def stop(self):
+        """
+        Stop the background refresh
+        :return:
+        """
+        if self._thread is not None:
+            self._thread.cancel()
+            try:
+                await self._thread
+            except asyncio.CancelledError:
+                pass
+            self._thread = None
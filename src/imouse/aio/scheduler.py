@@ -0,0 +1,109 @@
+import asyncio
+from typing import Optional
+
+from ..scheduler import CommandQueue, current_priority, resolve
+
+
+class _Worker:
+    def __init__(self, transport, rate: Optional[float], coalesce: bool):
+        self._transport = transport
+        self.queue = CommandQueue(rate, coalesce)
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, data: dict, priority: int, binary: bool) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.queue.push(data, priority, future, binary)
+        self._ready.set()
+        return future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        sent = 0.0
+        while True:
+            while not len(self.queue) and not self._closed:
+                self._ready.clear()
+                await self._ready.wait()
+            command = self.queue.pop()
+            if command is None:
+                return
+            delay = sent + self.queue.interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            sent = loop.time()
+            post = (
+                self._transport.post_binary if command.binary else self._transport.post
+            )
+            try:
+                resolve(command.futures, await post(command.data))
+            except Exception as e:
+                resolve(command.futures, error=e)
+
+    def close(self):
+        self._closed = True
+        self._ready.set()
+
+
+class AsyncCommandScheduler:
+    def __init__(self, transport):
+        """
+        Opt-in per-device command queues sending the commands of a device one at a time, by priority and within a rate
+        :param transport: Transport of the API
+        """
+        self._transport = transport
+        self._workers = {}
+        self._closing = set()
+
+    def enable(
+        self, device_id: str, rate: Optional[float] = None, coalesce: bool = True
+    ):
+        """
+        Queue the commands of a device, call from the event loop
+        :param device_id: Device ID
+        :param rate: Maximum commands per second, None for no limit
+        :param coalesce: Whether consecutive queued mouse_move commands collapse into the last one
+        :return:
+        """
+        self.disable(device_id)
+        self._workers[device_id] = _Worker(self._transport, rate, coalesce)
+
+    def disable(self, device_id: str):
+        """
+        Stop queueing, the commands already queued are still sent
+        :param device_id: Device ID
+        :return:
+        """
+        worker = self._workers.pop(device_id, None)
+        if worker is not None:
+            worker.close()
+            self._closing.add(worker.task)
+            worker.task.add_done_callback(self._closing.discard)
+
+    def enabled(self, device_id: str) -> bool:
+        return device_id in self._workers
+
+    def submit(
+        self, device_id: str, data: dict, binary: bool = False
+    ) -> Optional[asyncio.Future]:
+        """
+        Queue a command at the priority of the calling task
+        :param device_id: Device ID
+        :param data: Payload
+        :param binary: Whether the kernel answers with a binary frame, sent with post_binary
+        :return: Future resolved with the response, None when the device is not scheduled
+        """
+        worker = self._workers.get(device_id)
+        if worker is None:
+            return None
+        return worker.submit(data, current_priority(), binary)
+
+    async def close(self):
+        """
+        Send the queued commands of every device and stop queueing
+        :return:
+        """
+        for device_id in list(self._workers):
+            self.disable(device_id)
+        if self._closing:
+            await asyncio.gather(*self._closing)
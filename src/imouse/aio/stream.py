@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from ..payload import Payload
+from ..screenshot import Screenshot
+from ..stream import _STOP, _is_frame_of
+
+
+class AsyncScreenshotStream:
+    def __init__(
+        self,
+        transport,
+        payload: Payload,
+        device_id: str,
+        duration: int = 300,
+        jpg: bool = False,
+        buffer: int = 2,
+    ):
+        """
+        Async iterator over frames pushed by loop_device_screenshot, the oldest frames are dropped when the consumer falls behind
+        :param transport: Async transport supporting subscribe()
+        :param payload: Payload builder
+        :param device_id: Device ID
+        :param duration: Streaming duration in seconds
+        :param jpg: Whether to stream JPG frames, default BMP
+        :param buffer: Number of undelivered frames to keep
+        """
+        if not hasattr(transport, "subscribe"):
+            raise RuntimeError("Screenshot streaming requires the websocket transport")
+        self._transport = transport
+        self._payload = payload
+        self._device_id = device_id
+        self._duration = duration
+        self._jpg = jpg
+        self._frames = asyncio.Queue(maxsize=buffer)
+        self._unsubscribe = None
+        self._deadline = None
+        self._closed = False
+
+    def _on_message(self, message: dict):
+        if not _is_frame_of(message, self._device_id):
+            return
+        if self._frames.full():
+            self._frames.get_nowait()
+        self._frames.put_nowait(message)
+
+    async def start(self):
+        """
+        Subscribe to pushed frames and ask the kernel to start the loop
+        :return:
+        """
+        if self._unsubscribe is not None or self._closed:
+            return
+        self._unsubscribe = self._transport.subscribe(self._on_message)
+        self._deadline = time.monotonic() + self._duration
+        await self._transport.post(
+            self._payload.start_stream_device_screenshots(
+                device_id=self._device_id,
+                duration=self._duration,
+                jpg=self._jpg,
+            )
+        )
+
+    async def close(self):
+        """
+        Stop the loop on the kernel and end the iteration
+        :return:
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+            await self._transport.post(
+                self._payload.stop_stream_device_screenshots(device_id=self._device_id)
+            )
+        # Wake up a consumer waiting on the queue
+        if not self._frames.full():
+            self._frames.put_nowait(_STOP)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Screenshot:
+        await self.start()
+        remaining = self._deadline - time.monotonic() if self._deadline else 0
+        if self._closed or remaining <= 0:
+            await self.close()
+            raise StopAsyncIteration
+        try:
+            message = await asyncio.wait_for(self._frames.get(), remaining)
+        except asyncio.TimeoutError:
+            message = _STOP
+        if message is _STOP or self._closed:
+            await self.close()
+            raise StopAsyncIteration
+        return Screenshot(message)
@@ -0,0 +1,316 @@
+import asyncio
+import collections
+import itertools
+import json
+import logging
+from typing import Callable, Optional, Tuple, Union
+
+import aiohttp
+
+from ..exceptions import KernelTimeout, TransportError
+from ..governor import succeeded
+from ..resilience import CallPolicy, CircuitBreaker, parse
+from ..transport import _issued
+from .governor import AsyncGovernor
+
+logger = logging.getLogger(__name__)
+
+
+def _bind(policy: Optional[CallPolicy], url: str) -> CallPolicy:
+    return (policy if policy is not None else CallPolicy()).bind(url)
+
+
+def _released(governor: AsyncGovernor, token) -> Callable[[asyncio.Future], None]:
+    def release(future: asyncio.Future):
+        governor.release(
+            token, not future.cancelled() and succeeded(future.exception())
+        )
+
+    return release
+
+
+class AsyncHttpTransport:
+    def __init__(
+        self,
+        api_url: str,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        governor: Optional[AsyncGovernor] = None,
+        policy: Optional[CallPolicy] = None,
+    ):
+        """
+        Non-blocking keep-alive HTTP transport shared by every async Device and Console of an API
+        :param api_url: Kernel API url e.g. http://localhost:9912/api
+        :param limit: Maximum number of simultaneous connections, 0 for no limit
+        :param limit_per_host: Maximum number of simultaneous connections per host, 0 for no limit
+        :param governor: Concurrency limits requests wait for, None for no limits
+        :param policy: Timeouts, retries and circuit breaking, CallPolicy() by default
+        """
+        self._api_url = api_url
+        self._governor = governor
+        self._policy = _bind(policy, api_url)
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The session must be created inside the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _request(self, data: dict, timeout: float) -> dict:
+        try:
+            async with self._get_session().post(
+                self._api_url, json=data, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as res:
+                status_code, body = res.status, await res.read()
+        except asyncio.TimeoutError as e:
+            raise KernelTimeout(data.get("fun"), timeout) from e
+        except aiohttp.ClientError as e:
+            raise TransportError(str(e)) from e
+        return parse(data, status_code, body)
+
+    async def _send(self, data: dict, timeout: float) -> dict:
+        if self._governor is None:
+            return await self._request(data, timeout)
+        token = await self._governor.acquire(data)
+        error = None
+        try:
+            return await self._request(data, timeout)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._governor.release(token, succeeded(error))
+
+    async def post(self, data: dict) -> dict:
+        return await self._policy.acall(data, self._send)
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """
+        Circuit breaker of the transport, e.g. breaker.reset() after restarting the kernel
+        """
+        return self._policy.breaker
+
+    async def close(self):
+        """
+        Close all pooled connections
+        :return:
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class _Connection:
+    def __init__(self, ws: aiohttp.ClientWebSocketResponse):
+        """
+        One socket and the requests waiting for an answer on it
+        """
+        self.ws = ws
+        self.reader = None
+        self.pending = {}
+        # Binary frames carry no msgid, they answer binary requests in send order
+        self.binary_msgids = collections.deque()
+
+
+class AsyncWebSocketTransport:
+    def __init__(
+        self,
+        ws_url: str,
+        connect_timeout: float = 10,
+        governor: Optional[AsyncGovernor] = None,
+        policy: Optional[CallPolicy] = None,
+    ):
+        """
+        Non-blocking websocket transport multiplexing concurrent requests over one socket by msgid
+        :param ws_url: Kernel websocket url e.g. ws://localhost:9912/ws
+        :param connect_timeout: Timeout in seconds for opening the socket
+        :param governor: Concurrency limits requests wait for before they are sent, None for no limits
+        :param policy: Timeouts, retries and circuit breaking of post() and post_binary(), CallPolicy() by default
+        """
+        self._ws_url = ws_url
+        self._governor = governor
+        self._policy = _bind(policy, ws_url)
+        self._connect_timeout = connect_timeout
+        self._session = None
+        self._connection = None
+        self._msgids = itertools.count(1)
+        self._last_msgid = 0
+        self._listeners = []
+        self._lock = None
+
+    async def _connect(self) -> "_Connection":
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            connection = self._connection
+            if connection is not None and not connection.ws.closed:
+                return connection
+            if self._session is None or self._session.closed:
+                timeout = aiohttp.ClientTimeout(
+                    total=None, connect=self._connect_timeout
+                )
+                self._session = aiohttp.ClientSession(timeout=timeout)
+            try:
+                ws = await self._session.ws_connect(self._ws_url, max_msg_size=0)
+            except aiohttp.ClientError as e:
+                raise TransportError(str(e)) from e
+            connection = _Connection(ws)
+            self._connection = connection
+            connection.reader = asyncio.ensure_future(self._read_loop(connection))
+            return connection
+
+    async def _read_loop(self, connection: "_Connection"):
+        try:
+            async for message in connection.ws:
+                if message.type == aiohttp.WSMsgType.ERROR:
+                    break
+                try:
+                    if message.type == aiohttp.WSMsgType.TEXT:
+                        self._dispatch(connection, json.loads(message.data))
+                    elif message.type == aiohttp.WSMsgType.BINARY:
+                        self._dispatch_binary(connection, message.data)
+                except Exception:
+                    # One bad message must not stop the responses behind it
+                    logger.exception("Dropped websocket message")
+        finally:
+            self._fail_pending(connection)
+
+    def _dispatch(self, connection: "_Connection", message: dict):
+        msgid = message.get("msgid")
+        future = connection.pending.pop(msgid, None)
+        if msgid in connection.binary_msgids:
+            # A binary request answered with JSON, usually an error status
+            connection.binary_msgids.remove(msgid)
+        if future is not None:
+            if not future.done():
+                future.set_result(message)
+            return
+        if _issued(msgid, self._last_msgid):
+            # The request timed out, its response is dropped
+            return
+        # Responses without a pending msgid are events pushed by the kernel
+        for listener in list(self._listeners):
+            try:
+                listener(message)
+            except Exception:
+                logger.exception("Websocket listener failed")
+
+    def _dispatch_binary(self, connection: "_Connection", message: bytes):
+        if not connection.binary_msgids:
+            return
+        # Each frame answers the oldest binary request, a timed out one drops its late frame
+        future = connection.pending.pop(connection.binary_msgids.popleft(), None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def _fail_pending(self, connection: "_Connection"):
+        if self._connection is connection:
+            self._connection = None
+        # Requests sent on this socket can only be answered on it
+        pending, connection.pending = connection.pending, {}
+        connection.binary_msgids.clear()
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(TransportError("WebSocket connection closed"))
+
+    async def submit(self, data: dict, binary: bool = False) -> asyncio.Future:
+        """
+        Send a request without waiting for its response
+        :param data: Payload, its msgid is replaced by a unique one
+        :param binary: Whether the kernel answers with a binary frame instead of JSON
+        :return: Future resolved with the response carrying the same msgid, or the raw bytes of the binary frame
+        """
+        return (await self._submit(data, binary))[2]
+
+    async def _submit(
+        self, data: dict, binary: bool
+    ) -> Tuple["_Connection", int, asyncio.Future]:
+        if self._governor is None:
+            return await self._send(data, binary)
+        token = await self._governor.acquire(data)
+        try:
+            connection, msgid, future = await self._send(data, binary)
+        except BaseException:
+            self._governor.release(token, False)
+            raise
+        future.add_done_callback(_released(self._governor, token))
+        return connection, msgid, future
+
+    async def _send(
+        self, data: dict, binary: bool
+    ) -> Tuple["_Connection", int, asyncio.Future]:
+        connection = await self._connect()
+        future = asyncio.get_running_loop().create_future()
+        msgid = self._last_msgid = next(self._msgids)
+        connection.pending[msgid] = future
+        if binary:
+            connection.binary_msgids.append(msgid)
+        try:
+            await connection.ws.send_str(json.dumps({**data, "msgid": msgid}))
+        except (aiohttp.ClientError, ConnectionError) as e:
+            connection.pending.pop(msgid, None)
+            if msgid in connection.binary_msgids:
+                connection.binary_msgids.remove(msgid)
+            raise TransportError(str(e)) from e
+        return connection, msgid, future
+
+    async def _wait(
+        self, data: dict, timeout: float, binary: bool = False
+    ) -> Union[bytes, dict]:
+        connection, msgid, future = await self._submit(data, binary)
+        try:
+            # Cancels the request on timeout, a late binary frame still consumes its place in the order
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            connection.pending.pop(msgid, None)
+            raise KernelTimeout(data.get("fun"), timeout) from None
+
+    async def post(self, data: dict) -> dict:
+        return await self._policy.acall(data, self._wait)
+
+    async def post_binary(self, data: dict) -> Union[bytes, dict]:
+        """
+        Send a request answered by a binary frame
+        :param data: Payload
+        :return: Raw bytes of the binary frame, or the JSON response if the kernel answered with one
+        """
+        return await self._policy.acall(
+            data, lambda data, timeout: self._wait(data, timeout, binary=True)
+        )
+
+    def subscribe(self, listener: Callable[[dict], None]) -> Callable[[], None]:
+        """
+        Receive messages pushed by the kernel that do not answer a pending request
+        :param listener: Called from the event loop with each message
+        :return: Function removing the listener
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """
+        Circuit breaker of the transport, e.g. breaker.reset() after restarting the kernel
+        """
+        return self._policy.breaker
+
+    async def close(self):
+        """
+        Close the socket, pending requests fail with TransportError
+        :return:
+        """
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            await connection.ws.close()
+            self._fail_pending(connection)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,161 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from .screenshot import Screenshot
+
+# Funs that change what is on screen, cached frames are dropped after them
+INPUT_FUNS = frozenset(
+    {
+        "click",
+        "swipe",
+        "mouse_up",
+        "mouse_down",
+        "mouse_move",
+        "mouse_wheel",
+        "mouse_reset_pos",
+        "key_release_all",
+        "key_release",
+        "key_down",
+        "send_key",
+        "shortcut",
+        "restart_device",
+    }
+)
+
+
+class FrameCache:
+    def __init__(self):
+        """
+        Short-lived per-device screen frames shared by the client-side analysis features of Utility
+        Devices are opted in with enable(), a frame lives until its TTL expires or an input command is sent to the device
+        """
+        self._ttls = {}
+        self._frames = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def enable(self, device_id: str, ttl: float = 0.15):
+        """
+        Cache frames of a device
+        :param device_id: Device ID
+        :param ttl: Frame lifetime in seconds
+        :return:
+        """
+        with self._lock:
+            self._ttls[device_id] = ttl
+
+    def disable(self, device_id: str):
+        """
+        Stop caching frames of a device
+        :param device_id: Device ID
+        :return:
+        """
+        with self._lock:
+            self._ttls.pop(device_id, None)
+            self._drop(device_id)
+
+    def enabled(self, device_id: str) -> bool:
+        return device_id in self._ttls
+
+    def generation(self, device_id: str) -> int:
+        """
+        Invalidation counter of a device, read it before capturing a frame and hand it to put()
+        :param device_id: Device ID
+        :return:
+        """
+        return self._generations.get(device_id, 0)
+
+    def get(self, device_id: str, original: bool = False) -> Optional[Screenshot]:
+        with self._lock:
+            ttl = self._ttls.get(device_id)
+            entry = self._frames.get((device_id, original))
+            if ttl is None or entry is None:
+                return None
+            captured, frame = entry
+            if time.monotonic() - captured > ttl:
+                del self._frames[(device_id, original)]
+                return None
+            return frame
+
+    def put(
+        self,
+        device_id: str,
+        frame: Screenshot,
+        generation: int,
+        original: bool = False,
+    ):
+        """
+        Store a frame unless the device received input since its capture started
+        :param device_id: Device ID
+        :param frame: Captured frame
+        :param generation: generation() read before the capture
+        :param original: Whether the frame is the high-definition original image
+        :return:
+        """
+        with self._lock:
+            if device_id not in self._ttls or not frame.ok:
+                return
+            if self._generations.get(device_id, 0) != generation:
+                return
+            self._frames[(device_id, original)] = (time.monotonic(), frame)
+
+    def invalidate(self, device_id: str):
+        """
+        Drop the frames of a device and discard captures still in flight
+        :param device_id: Device ID
+        :return:
+        """
+        with self._lock:
+            self._generations[device_id] = self._generations.get(device_id, 0) + 1
+            self._drop(device_id)
+
+    def _drop(self, device_id: str):
+        self._frames.pop((device_id, False), None)
+        self._frames.pop((device_id, True), None)
+
+
+class OcrCache:
+    def __init__(self, max_entries: int = 256):
+        """
+        Least recently used OCR results keyed by device, scan area, mode and region fingerprint
+        :param max_entries: Maximum number of cached results
+        """
+        self._max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._results.move_to_end(key)
+        # Callers may modify the response they get back
+        return copy.deepcopy(result)
+
+    def put(self, key: Hashable, result: dict):
+        with self._lock:
+            self._results[key] = copy.deepcopy(result)
+            self._results.move_to_end(key)
+            while len(self._results) > self._max_entries:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every result and reset the counters
+        :return:
+        """
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
@@ -1,21 +1,23 @@
-from ..payload import Payload
-import requests
+from typing import TYPE_CHECKING
 
+from ..payload import Payload
 from .airplay import AirPlay
 from .device import Device
 from .group import Group
 from .mouse import Mouse
 from .usb import Usb
 
+if TYPE_CHECKING:
+    from .. import API
+
 
 class Console:
-    def __init__(self, api_url: str):
+    def __init__(self, api: "API"):
         self._payload = Payload()
-        self._api_url = api_url
+        self._transport = api._transport
 
     def _post(self, data: dict) -> dict:
-        res = requests.post(self._api_url, json=data)
-        return res.json()
+        return self._transport.post(data)
 
     @property
     def airplay(self):
@@ -1,45 +1,144 @@
-import requests
+from functools import cached_property
+from typing import TYPE_CHECKING, Union
 
-from .mouse import Mouse
+from .. import scheduler
+from ..cache import INPUT_FUNS
+from ..payload import Payload
+from .action import Action
 from .keyboard import Keyboard
+from .mouse import Mouse
+from .shortcut import Shortcut
 from .storage import Storage
 from .utility import Utility
 
-from ..payload import Payload
-from .action import Action
-from .shortcut import Shortcut
+if TYPE_CHECKING:
+    from .. import API
 
 
 class Device:
-    def __init__(self, api_url: str, device_id: str):
-        self._api_url = api_url
+    def __init__(self, api: "API", device_id: str):
+        self._api = api
+        self._transport = api._transport
+        self._frame_cache = api._frame_cache
+        self._templates = api._templates
+        self._ocr_cache = api._ocr_cache
+        self._scheduler = api._scheduler
         self._device_id = device_id
         self._payload = Payload()
 
+    def _invalidate(self, data: dict):
+        """
+        Drop cached frames of every device an input command reaches, including the devlist
+        :param data: Payload
+        :return:
+        """
+        if data["fun"] not in INPUT_FUNS:
+            return
+        params = data.get("data") or {}
+        self._frame_cache.invalidate(params.get("deviceid", self._device_id))
+        for device_id in params.get("devlist") or []:
+            self._frame_cache.invalidate(device_id)
+
+    def _peer(self, device_id: str) -> "Device":
+        """
+        Device of the same API, commands for another device go through it to be queued and invalidate frames there
+        :param device_id: Device ID
+        :return:
+        """
+        if device_id == self._device_id:
+            return self
+        return type(self)(self._api, device_id)
+
     def _post(self, data: dict) -> dict:
-        res = requests.post(self._api_url, json=data)
-        return res.json()
+        self._invalidate(data)
+        future = self._scheduler.submit(self._device_id, data)
+        if future is not None:
+            return future.result()
+        return self._transport.post(data)
+
+    def _post_binary(self, data: dict) -> Union[bytes, dict]:
+        """
+        Send a request answered by a binary frame, only available on transports supporting post_binary
+        :param data: Payload
+        :return: Raw bytes of the binary frame, or the JSON response if the kernel answered with one
+        """
+        self._invalidate(data)
+        future = self._scheduler.submit(self._device_id, data, binary=True)
+        if future is not None:
+            return future.result()
+        return self._transport.post_binary(data)
+
+    def _submit(self, data: dict):
+        """
+        Send a request without waiting for its response, only available on pipelining transports
+        :param data: Payload
+        :return: Future resolved with the response
+        """
+        self._invalidate(data)
+        future = self._scheduler.submit(self._device_id, data)
+        if future is not None:
+            return future
+        return self._transport.submit(data)
+
+    def enable_frame_cache(self, ttl: float = 0.15):
+        """
+        Share captured frames between the client-side analysis features of utility, frames are dropped after any input command
+        :param ttl: Frame lifetime in seconds
+        :return:
+        """
+        self._frame_cache.enable(self._device_id, ttl)
+
+    def disable_frame_cache(self):
+        """
+        Stop sharing captured frames
+        :return:
+        """
+        self._frame_cache.disable(self._device_id)
+
+    def enable_scheduler(self, rate: float = None, coalesce: bool = True):
+        """
+        Send the commands of this device one at a time through a queue shared by every thread, by priority and within a rate
+        :param rate: Maximum commands per second, None for no limit
+        :param coalesce: Whether consecutive queued mouse_move commands collapse into the last one
+        :return:
+        """
+        self._scheduler.enable(self._device_id, rate, coalesce)
+
+    def disable_scheduler(self):
+        """
+        Send the queued commands and stop queueing
+        :return:
+        """
+        self._scheduler.disable(self._device_id)
+
+    def priority(self, level: int):
+        """
+        Context manager running the commands sent inside it at another priority, e.g. with device.priority(0): ...
+        :param level: Priority, lower runs first, default 10
+        :return:
+        """
+        return scheduler.priority(level)
 
-    @property
+    @cached_property
     def action(self):
         return Action(self)
 
-    @property
+    @cached_property
     def shortcut(self):
         return Shortcut(self)
 
-    @property
+    @cached_property
     def mouse(self):
         return Mouse(self)
 
-    @property
+    @cached_property
     def keyboard(self):
         return Keyboard(self)
 
-    @property
+    @cached_property
     def storage(self):
         return Storage(self)
 
-    @property
+    @cached_property
     def utility(self):
         return Utility(self)
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Optional
 
 if TYPE_CHECKING:
     from . import Device
@@ -8,6 +8,13 @@ class Action:
     def __init__(self, device: "Device"):
         self._device = device
 
+    def chain(self) -> "ActionChain":
+        """
+        Builder queuing actions to send as one key sequence, e.g. action.chain().move_forward().activate(delay=0.5).run()
+        :return:
+        """
+        return ActionChain(self._device)
+
     # Basic actions
     def help(self):
         self._device.keyboard.press("TAB+H")
@@ -103,3 +110,59 @@ class Action:
     # Custom actions
     def spotlight(self):
         self._device.keyboard.press("WIN+ ")
+
+
+class _Recorder:
+    # Stands in for a Device, collecting the keys pressed by Action methods
+    def __init__(self):
+        self.keys = []
+        self.keyboard = self
+
+    def press(self, keys: str):
+        self.keys.append(keys)
+
+
+class ActionChain:
+    def __init__(self, device: "Device"):
+        """
+        Queue of actions sent in order by keyboard.sequence()
+        Every Action method is available and takes an optional delay, the pause in seconds after it
+        :param device: Device running the chain
+        """
+        self._device = device
+        self._recorder = _Recorder()
+        self._actions = Action(self._recorder)
+        self._steps = []
+
+    def __getattr__(self, name: str):
+        action = getattr(self._actions, name)
+
+        def add(delay: float = 0.0) -> "ActionChain":
+            start = len(self._recorder.keys)
+            action()
+            for keys in self._recorder.keys[start:]:
+                self._steps.append((keys, delay))
+            return self
+
+        return add
+
+    def press(self, keys: str, delay: float = 0.0) -> "ActionChain":
+        """
+        Queue a key combination
+        :param keys: Keys to press
+        :param delay: Pause in seconds after it
+        :return:
+        """
+        self._steps.append((keys, delay))
+        return self
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def run(self, stop_on_error: bool = True) -> List[Optional[dict]]:
+        """
+        Send the queued actions
+        :param stop_on_error: Whether to stop after a failed step
+        :return: Response of each step in order, None for steps that were not sent
+        """
+        return self._device.keyboard.sequence(self._steps, stop_on_error=stop_on_error)
@@ -1,14 +1,43 @@
-from typing import TYPE_CHECKING
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
 if TYPE_CHECKING:
     from . import Device
 
+Step = Union[str, Tuple[str, float]]
+
+# Command+V, WIN is the Command key as in the Spotlight chord "WIN+ " of Action
+PASTE_KEYS = "WIN+V"
+
+
+def _steps(steps: List[Step], delay: float) -> List[Tuple[str, float]]:
+    """
+    Normalise sequence steps to (keys, pause after the step) pairs
+    """
+    return [(step, delay) if isinstance(step, str) else tuple(step) for step in steps]
+
+
+def _failed(ret: Optional[dict]) -> bool:
+    return ret is None or ret.get("status") != 0
+
+
+def _typeable(text: str) -> bool:
+    """
+    Whether keyboard_type can enter the text, it only sends printable ASCII
+    """
+    return all(" " <= char <= "~" for char in text)
+
 
 class Keyboard:
     def __init__(self, device: "Device"):
+        self._device = device
         self._device_id = device._device_id
         self._payload = device._payload
         self._post = device._post
+        self._submit = device._submit
+        self._pipelined = hasattr(device._transport, "submit")
 
     def up(self, key: str):
         """
@@ -60,3 +89,130 @@ class Keyboard:
                 keys=keys,
             )
         )
+
+    def sequence(
+        self, steps: List[Step], delay: float = 0.0, stop_on_error: bool = True
+    ) -> List[Optional[dict]]:
+        """
+        Press key combinations in order, pipelined over one socket in websocket mode
+        Steps without a pause are sent back to back, the pause after a step starts once the kernel acknowledged it
+        :param steps: Keys to press e.g. ["TAB", "TAB", (" ", 0.5)], a (keys, delay) tuple sets the pause after that step
+        :param delay: Pause in seconds after each step without its own
+        :param stop_on_error: Whether to stop after a failed step, steps already pipelined with it are still sent
+        :return: Response of each step in order, None for steps that were not sent
+        """
+        steps = _steps(steps, delay)
+        results = [None] * len(steps)
+        pending = []
+        for index, (keys, pause) in enumerate(steps):
+            payload = self._payload.keyboard_press(device_id=self._device_id, keys=keys)
+            last = index == len(steps) - 1
+            if self._pipelined:
+                pending.append((index, self._submit(payload)))
+                if pause <= 0 and not last:
+                    continue
+                for position, future in pending:
+                    results[position] = future.result()
+                sent = [position for position, _ in pending]
+                pending = []
+            else:
+                results[index] = self._post(payload)
+                sent = [index]
+            if stop_on_error and any(_failed(results[position]) for position in sent):
+                break
+            if pause > 0 and not last:
+                time.sleep(pause)
+        return results
+
+    def _text_payloads(
+        self, text: str, devices: List["Device"], chunk: int
+    ) -> List[Tuple["Device", dict]]:
+        return [
+            (
+                device,
+                self._payload.keyboard_type(
+                    device_id=device._device_id, text=text[i : i + chunk]
+                ),
+            )
+            for device in devices
+            for i in range(0, len(text), chunk)
+        ]
+
+    def _paste_payloads(
+        self, devices: List["Device"], keys: str
+    ) -> List[Tuple["Device", dict]]:
+        return [
+            (
+                device,
+                self._payload.keyboard_press(device_id=device._device_id, keys=keys),
+            )
+            for device in devices
+        ]
+
+    def _post_lanes(self, payloads: List[Tuple["Device", dict]]) -> List[dict]:
+        """
+        Post the payloads of each device in order, the devices side by side
+        :param payloads: (device, payload) pairs
+        :return: Responses in the order of the payloads
+        """
+        lanes = {}
+        for index, (device, payload) in enumerate(payloads):
+            lanes.setdefault(device._device_id, (device, []))[1].append(
+                (index, payload)
+            )
+        responses = [None] * len(payloads)
+
+        def lane(device: "Device", items: List[Tuple[int, dict]]):
+            for index, payload in items:
+                responses[index] = device._post(payload)
+
+        if len(lanes) == 1:
+            lane(*next(iter(lanes.values())))
+            return responses
+        with ThreadPoolExecutor(max_workers=len(lanes)) as executor:
+            # Each lane keeps the priority of the caller
+            futures = [
+                executor.submit(contextvars.copy_context().run, lane, device, items)
+                for device, items in lanes.values()
+            ]
+            for future in futures:
+                future.result()
+        return responses
+
+    def enter_text(
+        self,
+        text: str,
+        devices: list = [],
+        type_limit: int = 32,
+        chunk: int = 32,
+        timeout: int = 30000,
+        paste_keys: str = PASTE_KEYS,
+    ) -> List[dict]:
+        """
+        Enter text by the fastest route, typed when short printable ASCII, otherwise sent to the clipboard and pasted
+        :param text: Text to enter, any UTF-8
+        :param devices: Other devices receiving the same text e.g. ["device_id1","device_id2"], the clipboard is set on all of them in one devlist request
+        :param type_limit: Longest text typed as keystrokes
+        :param chunk: Characters per keyboard_type request
+        :param timeout: Clipboard shortcut timeout, default 30 seconds
+        :param paste_keys: Key combination pasting the clipboard, default Command+V
+        :return: Responses of the requests in the order they were sent
+        """
+        targets = [
+            self._device,
+            *(self._device._peer(device_id) for device_id in devices),
+        ]
+        results = []
+        if len(text) <= type_limit and _typeable(text):
+            payloads = self._text_payloads(text, targets, chunk)
+        else:
+            results.append(self._device.utility.send_clipboard(text, devices, timeout))
+            if _failed(results[0]):
+                return results
+            payloads = self._paste_payloads(targets, paste_keys)
+        if self._pipelined:
+            futures = [device._submit(payload) for device, payload in payloads]
+            results.extend(future.result() for future in futures)
+        else:
+            results.extend(self._post_lanes(payloads))
+        return results
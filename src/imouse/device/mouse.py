@@ -1,4 +1,7 @@
-from typing import TYPE_CHECKING
+import time
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+from ..gesture import Gesture, Point, superseded
 
 if TYPE_CHECKING:
     from . import Device
@@ -9,6 +12,8 @@ class Mouse:
         self._device_id = device._device_id
         self._payload = device._payload
         self._post = device._post
+        self._submit = device._submit
+        self._pipelined = hasattr(device._transport, "submit")
 
     def click(
         self,
@@ -124,3 +129,78 @@ class Mouse:
         :return:
         """
         return self._post(self._payload.mouse_reset(device_id=self._device_id))
+
+    def _gesture_payload(self, kind: str, params: dict) -> dict:
+        if kind == "down":
+            return self._payload.mouse_down(device_id=self._device_id, **params)
+        if kind == "up":
+            return self._payload.mouse_up(device_id=self._device_id, **params)
+        return self._payload.mouse_move(device_id=self._device_id, **params)
+
+    def perform(self, gesture: Gesture) -> List[Optional[dict]]:
+        """
+        Run a gesture, each event is sent at its scheduled offset and pipelined in websocket mode so response latency does not stretch it
+        Moves that fall behind the schedule are dropped when the next move is already due
+        :param gesture: Gesture to run
+        :return: Response of each event in order, None for dropped moves
+        """
+        events = gesture.events
+        results = [None] * len(events)
+        pending = []
+        start = time.monotonic()
+        for index, (offset, kind, params) in enumerate(events):
+            delay = offset - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+            elif superseded(events, index, time.monotonic() - start):
+                continue
+            payload = self._gesture_payload(kind, params)
+            if self._pipelined:
+                pending.append((index, self._submit(payload)))
+            else:
+                results[index] = self._post(payload)
+        for index, future in pending:
+            results[index] = future.result()
+        return results
+
+    def drag(
+        self,
+        start_x: int,
+        start_y: int,
+        end_x: int,
+        end_y: int,
+        duration: float = 0.3,
+        hold: float = 0.0,
+        button: str = "left",
+    ):
+        """
+        Drag in a straight line, a hold turns it into a long-press-and-drag
+        :param start_x: Start coordinate X
+        :param start_y: Start coordinate Y
+        :param end_x: End coordinate X
+        :param end_y: End coordinate Y
+        :param duration: Seconds the move takes
+        :param hold: Seconds to hold still after pressing
+        :param button: Mouse button "left"(left button), "right"(right button)
+        :return: Response of each event
+        """
+        return self.perform(
+            Gesture.drag((start_x, start_y), (end_x, end_y), duration, hold, button)
+        )
+
+    def path(
+        self,
+        points: Sequence[Point],
+        duration: float = 0.5,
+        hold: float = 0.0,
+        button: str = "left",
+    ):
+        """
+        Drag along a Bezier curve
+        :param points: Start point, control points and end point e.g. [(100, 600), (300, 300), (100, 100)]
+        :param duration: Seconds the move takes
+        :param hold: Seconds to hold still after pressing
+        :param button: Mouse button "left"(left button), "right"(right button)
+        :return: Response of each event
+        """
+        return self.perform(Gesture.path(points, duration, hold, button))
@@ -1,32 +1,305 @@
+import functools
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Union
+
+from ..screenshot import Screenshot
 
 if TYPE_CHECKING:
     from . import Device
 
+# Bottom edge of the Spotlight search field as a share of the screen height, results are listed below it
+SEARCH_FIELD = 0.2
+
+
+def _band(frame: Screenshot, top: float, bottom: float) -> list:
+    """
+    Scan area of a horizontal band of a frame
+    :param frame: Screenshot
+    :param top: Top edge as a share of the frame height
+    :param bottom: Bottom edge as a share of the frame height
+    :return: [[x,y],[x,y],[x,y],[x,y]]
+    """
+    height, width = frame.array.shape[:2]
+    y1, y2 = int(height * top), max(int(height * top), int(height * bottom) - 1)
+    return [[0, y1], [0, y2], [width - 1, y1], [width - 1, y2]]
+
+
+class _Screen:
+    def __init__(self, vision, frames: Callable[[float], Iterator[Screenshot]]):
+        """
+        Frames of a sequence of steps
+        :param vision: The imouse.vision module
+        :param frames: Fresh frames for a number of seconds, a pushed stream is shared by the steps while polling
+            starts over at each step
+        """
+        self.vision = vision
+        self._open = frames
+        self._frames = frames(0)
+        self.last = next(self._frames)
+
+    def wait(
+        self, condition: Callable[[Screenshot], bool], deadline: float, fallback: float
+    ):
+        """
+        Consume frames until one meets the condition, the deadline passes or the frames end
+        :param condition: Step condition
+        :param deadline: time.monotonic() deadline
+        :param fallback: Fixed delay once the frames ended before the deadline
+        :return:
+        """
+        frames = self._open(deadline - time.monotonic())
+        if frames is not self._frames:
+            self._frames.close()
+            self._frames = frames
+        for frame in frames:
+            self.last = frame
+            if condition(frame) or time.monotonic() >= deadline:
+                return
+        time.sleep(max(0.0, min(fallback, deadline - time.monotonic())))
+
+    def close(self):
+        self._frames.close()
+
+
+class _Settled:
+    def __init__(
+        self,
+        screen: _Screen,
+        top: float = 0.0,
+        bottom: float = 1.0,
+        patience: Optional[float] = None,
+    ):
+        """
+        Met once a band of the screen differs from how it looked before the input and then holds still
+        :param screen: Frames of the sequence
+        :param top: Top edge of the band as a share of the screen height
+        :param bottom: Bottom edge of the band as a share of the screen height
+        :param patience: Seconds after which a band left as it is counts as changed, None to require a change
+        """
+        self._fingerprint = screen.vision.fingerprint
+        self._area = _band(screen.last, top, bottom)
+        self._baseline = self._fingerprint(screen.last, self._area)
+        self._previous = self._baseline
+        self._changed = False
+        self._deadline = None if patience is None else time.monotonic() + patience
+
+    def __call__(self, frame: Screenshot) -> bool:
+        current = self._fingerprint(frame, self._area)
+        if self._changed and current == self._previous:
+            return True
+        if current != self._baseline or (
+            self._deadline is not None and time.monotonic() >= self._deadline
+        ):
+            self._changed = True
+        self._previous = current
+        return False
+
+
+class _Found:
+    def __init__(self, screen: _Screen, template, top: float = 0.0):
+        """
+        Met once a template is shown below a share of the screen height
+        :param screen: Frames of the sequence
+        :param template: Template luminance array
+        :param top: Top edge of the searched band as a share of the screen height
+        """
+        self._match = screen.vision.match_templates
+        self._template = template
+        self._area = _band(screen.last, top, 1.0)
+
+    def __call__(self, frame: Screenshot) -> bool:
+        return bool(self._match(frame, [self._template], area=self._area))
+
+
+class _Launched:
+    def __init__(self, screen: _Screen, splash: float):
+        """
+        Met once the screen left how it looked before the input and shows the app
+        The first still screen may be the launch screen of the app, it counts as the app only once it held still for
+        splash seconds, a still screen replacing it counts at once
+        :param screen: Frames of the sequence
+        :param splash: Seconds a first still screen must hold to count as the app
+        """
+        self._fingerprint = screen.vision.fingerprint
+        self._baseline = self._fingerprint(screen.last)
+        self._splash = splash
+        self._previous = None
+        self._still_since = None
+        self._first = None
+
+    def __call__(self, frame: Screenshot) -> bool:
+        now = time.monotonic()
+        current = self._fingerprint(frame)
+        if current == self._baseline:
+            self._previous = None
+            return False
+        if current != self._previous:
+            self._previous = current
+            self._still_since = now
+            return False
+        if self._first is None:
+            self._first = current
+        elif current != self._first:
+            return True
+        return now - self._still_since >= self._splash
+
 
 class Shortcut:
     def __init__(self, device: "Device"):
         self._device = device
 
-    def open_app(self, app_name: str, initialize: bool = False):
-        self._device.action.home()
-        time.sleep(1)
-        self._device.action.spotlight()
-        time.sleep(1)
-        self._device.keyboard.type(app_name)
-        time.sleep(2)
-        self._device.action.activate()
-
-        if initialize:
-            time.sleep(1)
-            self._device.action.app_switcher()
-            time.sleep(1)
-            self._device.mouse.swipe(direction="left")
-            self._device.mouse.swipe(direction="up", start_y=600, end_y=0)
-            time.sleep(1)
-            self._device.action.app_switcher()
-            time.sleep(1)
-            self._device.action.move_to_next_item()
-            time.sleep(1)
-            self._device.action.activate()
+    def _open(self, timeout: float) -> Optional[_Screen]:
+        """
+        Frames for a sequence of steps, None when py-imouse[vision] is not installed
+        :param timeout: Seconds the whole sequence may take
+        :return:
+        """
+        try:
+            from .. import vision
+        except ImportError:
+            return None
+        utility = self._device.utility
+        if hasattr(self._device._transport, "subscribe"):
+            stream = utility._watch(timeout, 0.05, 0.5)
+            return _Screen(vision, lambda timeout: stream)
+        return _Screen(vision, lambda timeout: utility._watch(timeout, 0.05, 0.5))
+
+    def _step(
+        self,
+        name: str,
+        action: Callable,
+        timings: Dict[str, float],
+        screen: Optional[_Screen],
+        until: Callable[[_Screen], Callable[[Screenshot], bool]],
+        timeout: float,
+        fallback: float,
+    ):
+        """
+        Send an input and wait until the screen shows its outcome
+        :param name: Step name in timings
+        :param action: Input to send
+        :param timings: Seconds taken per step, updated in place
+        :param screen: Frames of the sequence, None when py-imouse[vision] is not installed
+        :param until: Builds the condition of the step from the screen before the input
+        :param timeout: Seconds to wait for the condition, a step reaching it moves on
+        :param fallback: Fixed delay used without frames or once they ended
+        :return:
+        """
+        start = time.monotonic()
+        if screen is None:
+            action()
+            time.sleep(fallback)
+        else:
+            condition = until(screen)
+            action()
+            screen.wait(condition, start + timeout, fallback)
+        timings[name] = time.monotonic() - start
+
+    def open_app(
+        self,
+        app_name: str,
+        initialize: bool = False,
+        icon: Union[bytes, str] = None,
+        timeout: float = 5.0,
+        splash: float = 2.0,
+    ) -> Dict[str, float]:
+        """
+        Open an app through Spotlight, each step waits for its outcome on screen instead of a fixed delay
+        Spotlight counts as open once its search field is shown, the search once results or the icon are listed below it,
+        and the app once its screen replaced its launch screen or held still for splash seconds
+        :param app_name: App name typed into Spotlight
+        :param initialize: Whether to close the app in the app switcher and open it again
+        :param icon: Optional app icon, image binary data or a template name loaded into templates, awaited among the search results
+        :param timeout: Seconds to wait for each step, a step reaching it moves on
+        :param splash: Seconds the first still screen of the app must hold to count as the app rather than its launch screen
+        :return: Seconds taken per step
+        """
+        device = self._device
+        timings = {}
+        settled = _Settled
+        launched = functools.partial(_Launched, splash=splash)
+        screen = self._open(timeout * (9 if initialize else 4))
+        if icon is None or screen is None:
+            search = functools.partial(_Settled, top=SEARCH_FIELD)
+        else:
+            template = device.utility._templates.gray(icon)
+            search = functools.partial(_Found, template=template, top=SEARCH_FIELD)
+        try:
+            self._step(
+                "home",
+                device.action.home,
+                timings,
+                screen,
+                functools.partial(_Settled, patience=1),
+                timeout,
+                1,
+            )
+            self._step(
+                "spotlight",
+                device.action.spotlight,
+                timings,
+                screen,
+                functools.partial(_Settled, bottom=SEARCH_FIELD),
+                timeout,
+                1,
+            )
+            self._step(
+                "search",
+                lambda: device.keyboard.type(app_name),
+                timings,
+                screen,
+                search,
+                timeout,
+                2,
+            )
+            self._step(
+                "launch", device.action.activate, timings, screen, launched, timeout, 1
+            )
+
+            if initialize:
+                self._step(
+                    "switcher",
+                    device.action.app_switcher,
+                    timings,
+                    screen,
+                    settled,
+                    timeout,
+                    1,
+                )
+
+                def close():
+                    device.mouse.swipe(direction="left")
+                    device.mouse.swipe(direction="up", start_y=600, end_y=0)
+
+                self._step("close", close, timings, screen, settled, timeout, 1)
+                self._step(
+                    "reopen",
+                    device.action.app_switcher,
+                    timings,
+                    screen,
+                    settled,
+                    timeout,
+                    1,
+                )
+                self._step(
+                    "select",
+                    device.action.move_to_next_item,
+                    timings,
+                    screen,
+                    settled,
+                    timeout,
+                    1,
+                )
+                self._step(
+                    "relaunch",
+                    device.action.activate,
+                    timings,
+                    screen,
+                    launched,
+                    timeout,
+                    1,
+                )
+        finally:
+            if screen is not None:
+                screen.close()
+        return timings
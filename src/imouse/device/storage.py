@@ -1,5 +1,8 @@
+import posixpath
 from typing import TYPE_CHECKING
 
+from .. import manifest
+
 if TYPE_CHECKING:
     from . import Device
 
@@ -28,9 +31,10 @@ class Storage:
                 timeout=timeout,
             )
         )
-        for item in ret["retdata"]:
-            item["name"] = item["name"] + "." + item["ext"]
-            del item["ext"]
+        for item in ret.get("retdata") or []:
+            if item.get("ext"):
+                item["name"] = item["name"] + "." + item["ext"]
+            item.pop("ext", None)
         return ret
 
     def download_photos(self, files: list, timeout: int = 30000):
@@ -83,9 +87,10 @@ class Storage:
                 timeout=timeout,
             )
         )
-        for item in ret["retdata"]:
-            item["name"] = item["name"] + "." + item["ext"]
-            del item["ext"]
+        for item in ret.get("retdata") or []:
+            if item.get("ext"):
+                item["name"] = item["name"] + "." + item["ext"]
+            item.pop("ext", None)
         return ret
 
     def download_files(self, files: list, timeout: int = 30000):
@@ -173,3 +178,71 @@ class Storage:
                 timeout=timeout,
             )
         )
+
+    def _walk(self, path: str, timeout: int):
+        """
+        List a device directory recursively
+        :return: Signature per file path and the directories that could not be listed
+        """
+        files, failed = {}, []
+        pending = [path]
+        while pending:
+            directory = pending.pop()
+            ret = self.get_files(directory, timeout)
+            if ret.get("status") != 0:
+                failed.append(directory)
+                continue
+            for item in ret.get("retdata") or []:
+                child = posixpath.join(directory, item["name"])
+                if manifest.is_dir(item):
+                    pending.append(child)
+                else:
+                    files[child] = manifest.signature(item)
+        return files, failed
+
+    def sync(
+        self,
+        remote_path: str,
+        local_dir: str,
+        media_dir: str,
+        chunk: int = 20,
+        delete: bool = True,
+        timeout: int = 30000,
+    ) -> manifest.SyncResult:
+        """
+        Mirror a device directory recursively into a local directory, later runs only download new or changed files
+        The manifest in local_dir records the size, modification time and hash of every mirrored file
+        :param remote_path: Device directory e.g. "/"
+        :param local_dir: Local mirror directory
+        :param media_dir: Directory the kernel downloads files into, iMouse installation directory\Shortcut\Media\File
+        :param chunk: Maximum number of files per download request
+        :param delete: Whether to delete local files removed from the device, skipped when a directory could not be listed
+        :param timeout: Timeout per request, default 30 seconds
+        :return: SyncResult with the downloaded, deleted and failed paths
+        """
+        mirror = manifest.Manifest(local_dir, remote_path)
+        remote, unlisted = self._walk(remote_path, timeout)
+        fetch, removed, unchanged, failed = mirror.plan(remote)
+        downloaded = []
+        for paths in manifest.chunks(fetch, chunk):
+            with manifest.MediaLock(media_dir, paths):
+                ret = self.download_files(paths, timeout)
+                for path in paths:
+                    changed = None
+                    if ret.get("status") == 0:
+                        changed = mirror.collect(media_dir, path, remote[path])
+                    if changed is None:
+                        failed.append(path)
+                    elif changed:
+                        downloaded.append(path)
+                    else:
+                        unchanged += 1
+            mirror.save()
+        deleted = []
+        # A directory that could not be listed looks empty, a failed download does not hide anything
+        if delete and not unlisted:
+            for path in removed:
+                mirror.delete(path)
+                deleted.append(path)
+        mirror.save()
+        return manifest.SyncResult(downloaded, deleted, unchanged, unlisted + failed)
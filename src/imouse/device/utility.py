@@ -1,6 +1,11 @@
-from typing import TYPE_CHECKING
+import math
+import time
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+from .. import wait
+from ..screenshot import Screenshot
+from ..stream import ScreenshotStream
 from ..types import ColorParams, ColorsParams
-import base64
 
 if TYPE_CHECKING:
     from . import Device
@@ -11,6 +16,27 @@ class Utility:
         self._device_id = device._device_id
         self._payload = device._payload
         self._post = device._post
+        self._post_binary = device._post_binary
+        self._transport = device._transport
+        self._frame_cache = device._frame_cache
+        self._templates = device._templates
+        self._ocr_cache = device._ocr_cache
+
+    @property
+    def templates(self):
+        """
+        Template registry shared by every device of the API, names loaded into it are accepted by match_image/match_images
+        :return:
+        """
+        return self._templates
+
+    @property
+    def ocr_cache(self):
+        """
+        OCR result cache shared by every device of the API, with hits and misses counters
+        :return:
+        """
+        return self._ocr_cache
 
     def _utf8_to_hex(self, input_str: str) -> str:
         """
@@ -52,35 +78,100 @@ class Utility:
         :param binary: Whether to return binary data, only effective in websocket mode
         :param jpg: Whether to return JPG format image, default BMP
         :param original: Whether to return high-definition original image, original image will always be JPG format
-        :return:
+        :return: Screenshot, the image is decoded on first access to its bytes, array or save()
+        """
+        payload = self._payload.get_device_screenshot(
+            device_id=self._device_id,
+            zip=zip,
+            binary=binary,
+            jpg=jpg,
+            original=original,
+        )
+        if binary and hasattr(self._transport, "post_binary"):
+            ret = self._post_binary(payload)
+            if isinstance(ret, bytes):
+                return Screenshot(raw=ret)
+            return Screenshot(ret)
+        return Screenshot(self._post(payload))
+
+    def frame(self, original: bool = False):
+        """
+        Current screen for client-side analysis, reused while the device frame cache is enabled and still fresh
+        :param original: Whether to use the high-definition original image
+        :return: Screenshot
+        """
+        frame = self._frame_cache.get(self._device_id, original)
+        if frame is None:
+            generation = self._frame_cache.generation(self._device_id)
+            frame = self.screenshot(zip=True, jpg=original, original=original)
+            self._frame_cache.put(self._device_id, frame, generation, original)
+        return frame
+
+    def stream_screenshots(self, duration: int = 300, jpg: bool = False):
+        """
+        Stream device screen frames pushed by the kernel, only effective in websocket mode
+        :param duration: Streaming duration in seconds
+        :param jpg: Whether to stream JPG frames, default BMP
+        :return: Iterator of Screenshot, close it or leave the with block to stop the stream
+        """
+        return ScreenshotStream(
+            self._transport,
+            self._payload,
+            self._device_id,
+            duration=duration,
+            jpg=jpg,
+        )
+
+    def _match_local(
+        self,
+        frame,
+        fun: str,
+        images: list,
+        scan_area: list,
+        accuracy: float,
+        all: bool = False,
+        repeat: bool = False,
+    ) -> dict:
         """
-        return self._post(
-            self._payload.get_device_screenshot(
-                device_id=self._device_id,
-                zip=zip,
-                binary=binary,
-                jpg=jpg,
-                original=original,
-            )
+        Run template matching on a frame locally instead of on the kernel
+        :return: Response in the kernel envelope
+        """
+        from .. import vision
+
+        templates = [self._templates.gray(image) for image in images]
+        matches = vision.match_templates(
+            frame,
+            templates,
+            accuracy=accuracy,
+            area=scan_area,
+            all=all,
+            repeat=repeat,
         )
+        return vision.response(fun, self._device_id, vision.image_result(fun, matches))
 
     def match_image(
         self,
-        image: bytes,
+        image: Union[bytes, str],
         scan_area: list = None,
         original: bool = False,
         accuracy: float = 0.8,
+        local: bool = False,
     ):
         """
         Find image
-        :param img: Image binary data
+        :param img: Image binary data or a template name loaded into templates
         :param scan_area: Region, if empty then full screen [[x,y],[x,y],[x,y],[x,y]] coordinates for top-left, bottom-left, top-right, bottom-right
         :param original: Whether to use high-definition image for search
         :param accuracy: Similarity threshold
+        :param local: Whether to match on this machine with NumPy against frame() instead of on the kernel, requires py-imouse[vision]
         :return:
         """
+        if local:
+            return self._match_local(
+                self.frame(original), "find_image", [image], scan_area, accuracy
+            )
 
-        base64_image = base64.b64encode(image).decode()
+        base64_image = self._templates.encoded(image)
 
         return self._post(
             self._payload.match_image(
@@ -100,20 +191,33 @@ class Utility:
         all: bool = False,
         repeat: bool = False,
         accuracy: float = 0.8,
+        local: bool = False,
     ):
         """
         Find image - supports searching multiple images simultaneously and finding duplicate images, recommended to use this interface
-        :param img_list: Image binary data array
+        :param img_list: Image binary data or template name array
         :param scan_area: Region, if empty then full screen, invalid for multiple image search [[x,y],[x,y],[x,y],[x,y]] coordinates for top-left, bottom-left, top-right, bottom-right
         :param original: Whether to use high-definition image for search
         :param all: Whether to search all images
         :param repeat: Whether to search for duplicate images
         :param accuracy: Similarity threshold
+        :param local: Whether to match on this machine with NumPy against frame() instead of on the kernel, requires py-imouse[vision]
         :return:
         """
+        if local:
+            return self._match_local(
+                self.frame(original),
+                "find_image_ex",
+                images,
+                scan_area,
+                accuracy,
+                all=all,
+                repeat=repeat,
+            )
+
         base64_images = []
         for image in images:
-            base64_images.append(base64.b64encode(image).decode())
+            base64_images.append(self._templates.encoded(image))
 
         return self._post(
             self._payload.match_images(
@@ -127,32 +231,85 @@ class Utility:
             )
         )
 
-    def ocr(self, scan_area: list, original: bool = False, enhanced: bool = False):
+    def _ocr_key(self, frame, scan_area: list, original: bool, enhanced: bool):
+        from .. import vision
+
+        area = tuple(tuple(point) for point in scan_area) if scan_area else None
+        digest = vision.region_digest(frame, scan_area)
+        return self._device_id, area, original, enhanced, digest
+
+    def _ocr_frame_required(self, frame: Optional[Screenshot]):
+        if frame is None and not self._frame_cache.enabled(self._device_id):
+            raise RuntimeError(
+                "OCR caching needs a current frame, enable the device frame cache"
+                " or pass a frame from stream_screenshots()"
+            )
+
+    def ocr(
+        self,
+        scan_area: list,
+        original: bool = False,
+        enhanced: bool = False,
+        cache: bool = False,
+        frame: Optional[Screenshot] = None,
+    ):
         """
         OCR text recognition - normal mode
         :param scan_area: Region [[x,y],[x,y],[x,y],[x,y]] coordinates for top-left, bottom-left, top-right, bottom-right
         :param original: Whether to use high-definition image
         :param enhanced: Whether to use enhanced OCR mode
+        :param cache: Whether to reuse the result of a previous call while the pixels of the region are unchanged, requires py-imouse[vision] and the device frame cache or a frame
+        :param frame: Current screen the cache compares, e.g. from stream_screenshots(), by default frame()
         :return: OCR recognition results
         """
-        return self._post(
-            self._payload.ocr(
-                self._device_id,
-                scan_area,
-                original=original,
-                enhanced=enhanced,
-            )
+        payload = self._payload.ocr(
+            self._device_id,
+            original=original,
+            enhanced=enhanced,
+            area=scan_area,
         )
+        if not cache:
+            return self._post(payload)
+        self._ocr_frame_required(frame)
+        if frame is None:
+            frame = self.frame(original)
+        key = self._ocr_key(frame, scan_area, original, enhanced)
+        ret = self._ocr_cache.get(key)
+        if ret is None:
+            ret = self._post(payload)
+            if ret.get("status") == 0:
+                self._ocr_cache.put(key, ret)
+        return ret
+
+    def _pick_local(
+        self, frame, color: ColorParams = None, colors: ColorsParams = None
+    ):
+        """
+        Run multi-point color finding on a frame locally instead of on the kernel
+        :return: Response in the kernel envelope
+        """
+        from .. import vision
+
+        pixels = vision.frame_rgb(frame)
+        if color is not None:
+            point = vision.find_color(pixels, color)
+            return vision.response("find_multi_color", self._device_id, point or [])
+        result = vision.find_colors(pixels, colors)
+        return vision.response("find_multi_color_ex", self._device_id, result)
 
     def pick_color(
         self,
         color: ColorParams,
+        local: bool = False,
     ):
         """
         Multi-point color finding - same usage as DaMo, full screen search if all region coordinates are empty or 0
         :param color: Color parameters including region, color values, similarity and direction
+        :param local: Whether to search on this machine with NumPy against frame() instead of on the kernel, requires py-imouse[vision]
         :return: Color finding results
         """
+        if local:
+            return self._pick_local(self.frame(), color=color)
         return self._post(
             self._payload.pick_color(
                 self._device_id,
@@ -163,12 +320,16 @@ class Utility:
     def pick_colors(
         self,
         colors: ColorsParams,
+        local: bool = False,
     ):
         """
         Multi-point color finding - same usage as DaMo, full screen search if all region coordinates are empty or 0
         :param colors: Colors parameters including color values, similarity and direction
+        :param local: Whether to search on this machine with NumPy against frame() instead of on the kernel, requires py-imouse[vision]
         :return: Color finding results
         """
+        if local:
+            return self._pick_local(self.frame(), colors=colors)
         return self._post(
             self._payload.pick_colors(
                 self._device_id,
@@ -176,6 +337,150 @@ class Utility:
             )
         )
 
+    def _watch(
+        self, timeout: float, interval: float, max_interval: float
+    ) -> Iterator[Screenshot]:
+        """
+        Fresh frames until the timeout, pushed by the kernel in websocket mode and polled with back-off otherwise
+        """
+        deadline = time.monotonic() + timeout
+        if hasattr(self._transport, "subscribe"):
+            duration = max(1, math.ceil(timeout))
+            with self.stream_screenshots(duration=duration) as stream:
+                for frame in stream:
+                    yield frame
+                    if time.monotonic() >= deadline:
+                        return
+            return
+        yield self.screenshot(zip=True, jpg=False)
+        for delay in wait.intervals(timeout, interval, max_interval):
+            time.sleep(delay)
+            yield self.screenshot(zip=True, jpg=False)
+
+    def wait_for_image(
+        self,
+        image: Union[bytes, str],
+        scan_area: list = None,
+        original: bool = False,
+        accuracy: float = 0.8,
+        local: bool = False,
+        timeout: float = 10.0,
+        interval: float = 0.1,
+        max_interval: float = 1.0,
+    ) -> Optional[dict]:
+        """
+        Wait until an image appears on screen
+        :param image: Image binary data or a template name loaded into templates
+        :param scan_area: Region, if empty then full screen [[x,y],[x,y],[x,y],[x,y]]
+        :param original: Whether to use high-definition image for search
+        :param accuracy: Similarity threshold
+        :param local: Whether to match on this machine, frames are streamed in websocket mode
+        :param timeout: Timeout in seconds
+        :param interval: First delay between checks in seconds, grows up to max_interval
+        :param max_interval: Largest delay between checks in seconds
+        :return: match_image response once found, None on timeout
+        """
+        if local and not original:
+            for frame in self._watch(timeout, interval, max_interval):
+                ret = self._match_local(
+                    frame, "find_image", [image], scan_area, accuracy
+                )
+                if wait.found(ret):
+                    return ret
+            return None
+        return wait.poll(
+            lambda: wait.found(
+                self.match_image(image, scan_area, original, accuracy, local)
+            ),
+            timeout,
+            interval,
+            max_interval,
+        )
+
+    def wait_for_text(
+        self,
+        text: str,
+        scan_area: list,
+        original: bool = False,
+        enhanced: bool = False,
+        timeout: float = 10.0,
+        interval: float = 0.1,
+        max_interval: float = 1.0,
+    ) -> Optional[dict]:
+        """
+        Wait until OCR of a region contains a text
+        :param text: Text to look for
+        :param scan_area: Region [[x,y],[x,y],[x,y],[x,y]]
+        :param original: Whether to use high-definition image
+        :param enhanced: Whether to use enhanced OCR mode
+        :param timeout: Timeout in seconds
+        :param interval: First delay between checks in seconds, grows up to max_interval
+        :param max_interval: Largest delay between checks in seconds
+        :return: ocr response once the text is recognised, None on timeout
+        """
+        return wait.poll(
+            lambda: wait.contains_text(self.ocr(scan_area, original, enhanced), text),
+            timeout,
+            interval,
+            max_interval,
+        )
+
+    def wait_for_color(
+        self,
+        color: ColorParams,
+        local: bool = False,
+        timeout: float = 10.0,
+        interval: float = 0.1,
+        max_interval: float = 1.0,
+    ) -> Optional[dict]:
+        """
+        Wait until a multi-point color is found
+        :param color: Color parameters including region, color values, similarity and direction
+        :param local: Whether to search on this machine, frames are streamed in websocket mode
+        :param timeout: Timeout in seconds
+        :param interval: First delay between checks in seconds, grows up to max_interval
+        :param max_interval: Largest delay between checks in seconds
+        :return: pick_color response once found, None on timeout
+        """
+        if local:
+            for frame in self._watch(timeout, interval, max_interval):
+                ret = self._pick_local(frame, color=color)
+                if wait.found(ret):
+                    return ret
+            return None
+        return wait.poll(
+            lambda: wait.found(self.pick_color(color)),
+            timeout,
+            interval,
+            max_interval,
+        )
+
+    def wait_for_change(
+        self,
+        scan_area: list = None,
+        timeout: float = 10.0,
+        interval: float = 0.1,
+        max_interval: float = 1.0,
+    ) -> Optional[Screenshot]:
+        """
+        Wait until a region of the screen changes from how it looks when called, requires py-imouse[vision]
+        :param scan_area: Region, if empty then full screen [[x,y],[x,y],[x,y],[x,y]]
+        :param timeout: Timeout in seconds
+        :param interval: First delay between checks in seconds, grows up to max_interval
+        :param max_interval: Largest delay between checks in seconds
+        :return: First changed frame, None on timeout
+        """
+        from .. import vision
+
+        baseline = None
+        for frame in self._watch(timeout, interval, max_interval):
+            fingerprint = vision.fingerprint(frame, scan_area)
+            if baseline is None:
+                baseline = fingerprint
+            elif fingerprint != baseline:
+                return frame
+        return None
+
     def send_clipboard(self, text: str, devices: list = [], timeout: int = 30000):
         """
         Send text to phone clipboard
@@ -0,0 +1,71 @@
+from typing import Optional
+
+
+class IMouseError(Exception):
+    """
+    Base of the errors raised by the client
+    """
+
+
+class TransportError(IMouseError, ConnectionError):
+    """
+    The kernel could not be reached or the connection dropped before it answered
+    """
+
+
+class CircuitOpenError(TransportError):
+    def __init__(self, kernel: str, retry_after: float):
+        """
+        Calls to a kernel are refused after repeated failures until a trial call succeeds
+        :param kernel: Kernel host and port
+        :param retry_after: Seconds until the next trial call is allowed
+        """
+        super().__init__(
+            f"Circuit open for kernel {kernel}, retry in {retry_after:.1f}s"
+        )
+        self.kernel = kernel
+        self.retry_after = retry_after
+
+
+class KernelTimeout(IMouseError, TimeoutError):
+    def __init__(self, fun: str, timeout: float):
+        """
+        The kernel did not answer in time
+        :param fun: Fun of the request
+        :param timeout: Timeout in seconds
+        """
+        super().__init__(f"{fun} got no response within {timeout:g}s")
+        self.fun = fun
+        self.timeout = timeout
+
+
+class ResponseError(IMouseError, ValueError):
+    def __init__(self, fun: str, status_code: Optional[int], body: str):
+        """
+        The kernel answered with something other than a JSON response, e.g. an HTML error page
+        :param fun: Fun of the request
+        :param status_code: HTTP status code, None over the websocket
+        :param body: Start of the response body
+        """
+        super().__init__(f"{fun} got an invalid response ({status_code}): {body[:200]}")
+        self.fun = fun
+        self.status_code = status_code
+        self.body = body
+
+    @property
+    def retryable(self) -> bool:
+        """
+        Whether the kernel or a proxy in front of it failed rather than the request
+        """
+        return self.status_code is None or self.status_code >= 500
+
+
+class CommandError(IMouseError, ValueError):
+    def __init__(self, response: dict):
+        """
+        The kernel answered with a non-zero status
+        :param response: JSON response
+        """
+        super().__init__(f"{response.get('message')} (status {response.get('status')})")
+        self.response = response
+        self.status = response.get("status")
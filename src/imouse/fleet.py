@@ -0,0 +1,289 @@
+import inspect
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from .registry import _entries
+
+if TYPE_CHECKING:
+    from . import API
+    from .device import Device
+
+# Calls that only change device state, one devlist request does the same as one request per device
+BROADCAST_METHODS = frozenset(
+    {
+        ("keyboard", "enter_text"),
+        ("storage", "delete_files"),
+        ("storage", "delete_photos"),
+        ("storage", "upload_files"),
+        ("storage", "upload_photos"),
+        ("utility", "open_url"),
+        ("utility", "send_clipboard"),
+        ("utility", "set_brightness"),
+        ("utility", "settings"),
+    }
+)
+
+
+class FleetResult(NamedTuple):
+    device_id: str
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class FleetResults:
+    def __init__(self, futures: dict, started: dict, timeout: Optional[float]):
+        """
+        Results of one fan-out call, iterate to receive them as devices finish
+        :param futures: Future per device ID
+        :param started: Start time per device ID, filled in by the workers
+        :param timeout: Per-device timeout in seconds counted from when the device's call starts
+        """
+        self._futures = futures
+        self._started = started
+        self._timeout = timeout
+        self._results = {}
+
+    def _deadline(self, device_id: str) -> Optional[float]:
+        started = self._started.get(device_id)
+        if self._timeout is None or started is None:
+            return None
+        return started + self._timeout
+
+    def __iter__(self) -> Iterator[FleetResult]:
+        yield from list(self._results.values())
+        # Devices of one devlist request share a future
+        pending = {}
+        for device_id, future in self._futures.items():
+            if device_id not in self._results:
+                pending.setdefault(future, []).append(device_id)
+        while pending:
+            deadlines = [
+                self._deadline(device_id)
+                for device_ids in pending.values()
+                for device_id in device_ids
+            ]
+            deadlines = [deadline for deadline in deadlines if deadline is not None]
+            wait_for = None
+            if deadlines:
+                wait_for = max(0, min(deadlines) - time.monotonic())
+            elif self._timeout is not None:
+                # Nothing started yet, check again once a worker picked a device up
+                wait_for = 0.05
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future, device_ids in list(pending.items()):
+                if future in done:
+                    error = future.exception()
+                    value = None if error else future.result()
+                else:
+                    deadline = self._deadline(device_ids[0])
+                    if deadline is None or now < deadline:
+                        continue
+                    # The request cannot be interrupted, its result is dropped
+                    future.cancel()
+                del pending[future]
+                for device_id in device_ids:
+                    if future in done:
+                        result = FleetResult(device_id, value, error)
+                    else:
+                        timeout = TimeoutError(f"Device {device_id} timed out")
+                        result = FleetResult(device_id, None, timeout)
+                    self._results[device_id] = result
+                    yield result
+
+    def wait(self) -> Dict[str, FleetResult]:
+        """
+        Wait for every device
+        :return: Result per device ID
+        """
+        for _ in self:
+            pass
+        return dict(self._results)
+
+    def results(self) -> Dict[str, Any]:
+        """
+        Wait for every device
+        :return: Return value per device ID of the devices that succeeded
+        """
+        return {
+            device_id: result.result
+            for device_id, result in self.wait().items()
+            if result.ok
+        }
+
+    def errors(self) -> Dict[str, BaseException]:
+        """
+        Wait for every device
+        :return: Exception per device ID of the devices that failed or timed out
+        """
+        return {
+            device_id: result.error
+            for device_id, result in self.wait().items()
+            if not result.ok
+        }
+
+
+class _FleetCall:
+    def __init__(self, fleet: "Fleet", path: tuple):
+        self._fleet = fleet
+        self._path = path
+
+    def __getattr__(self, name: str) -> "_FleetCall":
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _FleetCall(self._fleet, self._path + (name,))
+
+    def __call__(self, *args, **kwargs) -> FleetResults:
+        path = self._path
+
+        def call(device: "Device"):
+            target = device
+            for name in path:
+                target = getattr(target, name)
+            return target(*args, **kwargs)
+
+        return self._fleet.run(call)
+
+
+class _BroadcastCall:
+    def __init__(self, fleet: "Fleet", path: tuple):
+        self._fleet = fleet
+        self._path = path
+
+    def __getattr__(self, name: str) -> "_BroadcastCall":
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _BroadcastCall(self._fleet, self._path + (name,))
+
+    def __call__(self, *args, **kwargs) -> FleetResults:
+        return self._fleet._broadcast(self._path, args, kwargs)
+
+
+class Fleet:
+    def __init__(
+        self,
+        api: "API",
+        devices: Union[dict, List[str]],
+        max_workers: int = 16,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Run the same Device call on many devices concurrently, e.g. fleet.mouse.click(100, 200)
+        :param api: API the devices belong to
+        :param devices: Device ID list or the Console.device.get_all() response
+        :param max_workers: Maximum number of devices called at the same time, keep the API pool_maxsize at least as large
+        :param timeout: Default per-device timeout in seconds
+        """
+        if isinstance(devices, dict):
+            # get_all() lists data keyed by device ID or as entries, a plain dict is keyed by ID
+            devices = list(
+                _entries(devices if "data" in devices else {"data": devices})
+            )
+        self._devices = {device_id: api.device(device_id) for device_id in devices}
+        self._timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    @property
+    def device_ids(self) -> List[str]:
+        return list(self._devices)
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __getattr__(self, name: str) -> _FleetCall:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _FleetCall(self, (name,))
+
+    @property
+    def broadcast(self) -> _BroadcastCall:
+        """
+        Send a shortcut call to the whole fleet as a single devlist request, e.g. fleet.broadcast.utility.open_url(url)
+        Only the write-only calls of BROADCAST_METHODS are coalesced, reads such as get_clipboard and other methods
+        fall back to parallel per-device calls so every device reports its own result, the devices argument is set by the fleet
+        :return:
+        """
+        return _BroadcastCall(self, ())
+
+    def _broadcast(self, path: tuple, args: tuple, kwargs: dict) -> FleetResults:
+        if not self._devices:
+            return self.run(lambda device: None)
+        if path not in BROADCAST_METHODS:
+            return _FleetCall(self, path)(*args, **kwargs)
+        device_ids = list(self._devices)
+        method = self._devices[device_ids[0]]
+        for name in path:
+            method = getattr(method, name)
+        arguments = inspect.signature(method).bind_partial(*args, **kwargs)
+        if "devices" in arguments.arguments:
+            raise TypeError(
+                f"{'.'.join(path)}() is broadcast to the devices of the fleet, "
+                "devices cannot be passed"
+            )
+        # The first device leads the request, the kernel repeats it on the devlist
+        arguments.arguments["devices"] = device_ids[1:]
+
+        started = {}
+
+        def call():
+            now = time.monotonic()
+            for device_id in device_ids:
+                started[device_id] = now
+            return method(*arguments.args, **arguments.kwargs)
+
+        future = self._executor.submit(call)
+        futures = {device_id: future for device_id in device_ids}
+        return FleetResults(futures, started, self._timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def run(
+        self,
+        fn: Callable[["Device"], Any],
+        timeout: Optional[float] = None,
+    ) -> FleetResults:
+        """
+        Call a function with every device of the fleet
+        :param fn: Function receiving a Device
+        :param timeout: Per-device timeout in seconds, default is the fleet timeout
+        :return: Results, iterate to receive them as devices finish
+        """
+        started = {}
+
+        def call(device_id: str, device: "Device"):
+            started[device_id] = time.monotonic()
+            return fn(device)
+
+        futures = {
+            device_id: self._executor.submit(call, device_id, device)
+            for device_id, device in self._devices.items()
+        }
+        return FleetResults(
+            futures, started, self._timeout if timeout is None else timeout
+        )
+
+    def close(self):
+        """
+        Shut down the worker threads, devices still running are not interrupted
+        :return:
+        """
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,216 @@
+import math
+from typing import Callable, List, Sequence, Tuple
+
+Point = Tuple[int, int]
+
+
+def linear(t: float) -> float:
+    return t
+
+
+def ease_in_out(t: float) -> float:
+    """
+    Smoothstep easing, slow at both ends like a finger
+    """
+    return t * t * (3 - 2 * t)
+
+
+def bezier(points: Sequence[Point], t: float) -> Tuple[float, float]:
+    """
+    Point of a Bezier curve by De Casteljau's algorithm
+    :param points: Start point, control points and end point
+    :param t: Curve parameter between 0 and 1
+    :return:
+    """
+    xs = [float(x) for x, _ in points]
+    ys = [float(y) for _, y in points]
+    for n in range(len(points) - 1, 0, -1):
+        for i in range(n):
+            xs[i] += (xs[i + 1] - xs[i]) * t
+            ys[i] += (ys[i + 1] - ys[i]) * t
+    return xs[0], ys[0]
+
+
+class Gesture:
+    def __init__(self, rate: int = 60):
+        """
+        Mouse gesture built on the client as a schedule of mouse_down, mouse_move and mouse_up events
+        Run it with mouse.perform(), each event is sent at its offset from the start instead of after the previous response
+        :param rate: Mouse moves per second along paths
+        """
+        self._rate = rate
+        self._events = []
+        self._time = 0.0
+        self._position = None
+
+    @property
+    def events(self) -> List[Tuple[float, str, dict]]:
+        """
+        Scheduled events as (offset in seconds, "down" | "move" | "up", parameters)
+        :return:
+        """
+        return list(self._events)
+
+    @property
+    def duration(self) -> float:
+        return self._time
+
+    def _move(self, x: float, y: float):
+        point = (round(x), round(y))
+        if point != self._position:
+            self._events.append((self._time, "move", {"x": point[0], "y": point[1]}))
+            self._position = point
+
+    def _follow(
+        self,
+        position: Callable[[float], Tuple[float, float]],
+        duration: float,
+        easing: Callable[[float], float],
+    ):
+        start = self._time
+        steps = max(1, math.ceil(duration * self._rate))
+        for step in range(1, steps + 1):
+            self._time = start + duration * step / steps
+            self._move(*position(easing(step / steps)))
+
+    def press(self, x: int, y: int, button: str = "left") -> "Gesture":
+        """
+        Move to a point and press the button
+        :param x: Screen coordinate X
+        :param y: Screen coordinate Y
+        :param button: Mouse button "left" or "right"
+        :return:
+        """
+        self._move(x, y)
+        self._events.append((self._time, "down", {"button": button}))
+        return self
+
+    def release(self, button: str = "left") -> "Gesture":
+        """
+        Release the button
+        :param button: Mouse button "left" or "right"
+        :return:
+        """
+        self._events.append((self._time, "up", {"button": button}))
+        return self
+
+    def hold(self, seconds: float) -> "Gesture":
+        """
+        Stay still
+        :param seconds: Pause in seconds
+        :return:
+        """
+        self._time += seconds
+        return self
+
+    def move_to(
+        self,
+        x: int,
+        y: int,
+        duration: float = 0.0,
+        easing: Callable[[float], float] = ease_in_out,
+    ) -> "Gesture":
+        """
+        Move in a straight line
+        :param x: Target screen coordinate X
+        :param y: Target screen coordinate Y
+        :param duration: Seconds the move takes, 0 jumps there
+        :param easing: Maps elapsed fraction of the duration to travelled fraction of the path
+        :return:
+        """
+        if self._position is None or duration <= 0:
+            self._move(x, y)
+            return self
+        start_x, start_y = self._position
+        self._follow(
+            lambda t: (start_x + (x - start_x) * t, start_y + (y - start_y) * t),
+            duration,
+            easing,
+        )
+        return self
+
+    def curve_to(
+        self,
+        controls: Sequence[Point],
+        x: int,
+        y: int,
+        duration: float,
+        easing: Callable[[float], float] = ease_in_out,
+    ) -> "Gesture":
+        """
+        Move along a Bezier curve
+        :param controls: Control points e.g. [(200, 100)] for a quadratic curve
+        :param x: Target screen coordinate X
+        :param y: Target screen coordinate Y
+        :param duration: Seconds the move takes
+        :param easing: Maps elapsed fraction of the duration to travelled fraction of the path
+        :return:
+        """
+        if self._position is None:
+            raise ValueError(
+                "curve_to needs a starting point, call press or move_to first"
+            )
+        points = [self._position, *controls, (x, y)]
+        self._follow(lambda t: bezier(points, t), duration, easing)
+        return self
+
+    @classmethod
+    def drag(
+        cls,
+        start: Point,
+        end: Point,
+        duration: float = 0.3,
+        hold: float = 0.0,
+        button: str = "left",
+        rate: int = 60,
+    ) -> "Gesture":
+        """
+        Press, optionally hold still for a long press, move in a straight line and release
+        :param start: Start point
+        :param end: End point
+        :param duration: Seconds the move takes
+        :param hold: Seconds to hold before moving
+        :param button: Mouse button "left" or "right"
+        :param rate: Mouse moves per second
+        :return:
+        """
+        gesture = cls(rate).press(*start, button=button).hold(hold)
+        return gesture.move_to(*end, duration=duration).release(button)
+
+    @classmethod
+    def path(
+        cls,
+        points: Sequence[Point],
+        duration: float = 0.5,
+        hold: float = 0.0,
+        button: str = "left",
+        rate: int = 60,
+    ) -> "Gesture":
+        """
+        Press at the first point and drag along the Bezier curve shaped by the others
+        :param points: Start point, control points and end point
+        :param duration: Seconds the move takes
+        :param hold: Seconds to hold before moving
+        :param button: Mouse button "left" or "right"
+        :param rate: Mouse moves per second
+        :return:
+        """
+        gesture = cls(rate).press(*points[0], button=button).hold(hold)
+        gesture.curve_to(points[1:-1], *points[-1], duration=duration)
+        return gesture.release(button)
+
+
+def superseded(
+    events: List[Tuple[float, str, dict]], index: int, elapsed: float
+) -> bool:
+    """
+    Whether an event is a move already superseded by a later move that is also due, dropping it keeps the schedule
+    :param events: Gesture events
+    :param index: Index of the event about to be sent
+    :param elapsed: Seconds since the gesture started
+    :return:
+    """
+    if index + 1 >= len(events):
+        return False
+    offset, kind, _ = events[index + 1]
+    return events[index][1] == "move" and kind == "move" and offset <= elapsed
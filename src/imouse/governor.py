@@ -0,0 +1,199 @@
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .cache import INPUT_FUNS
+from .exceptions import ResponseError
+
+# Funs that make the kernel decode, match or encode a full frame
+HEAVY_FUNS = frozenset({"find_image_ex", "ocr_ex", "find_multi_color_ex"})
+
+# Budget per class as (initial, minimum, maximum) requests in flight
+BUDGETS = {
+    "heavy": (2, 1, 8),
+    "input": (16, 2, 64),
+    "shortcut": (4, 1, 16),
+    "default": (8, 1, 32),
+}
+
+
+def latency_key(data: dict) -> str:
+    """
+    Name latencies are measured under, the fun with the modifiers that change its cost
+    Shortcuts run very different iOS shortcuts and are measured per shortcut id
+    """
+    fun = data.get("fun", "")
+    params = data.get("data") or {}
+    if fun == "get_device_screenshot" and params.get("original"):
+        return "get_device_screenshot/original"
+    if fun == "shortcut" and "id" in params:
+        return f"shortcut/{params['id']}"
+    return fun
+
+
+def classify(data: dict) -> str:
+    """
+    Budget class of a payload, "heavy", "input", "shortcut" or "default"
+    """
+    if data.get("fun") == "shortcut":
+        return "shortcut"
+    key = latency_key(data)
+    if key in HEAVY_FUNS or key == "get_device_screenshot/original":
+        return "heavy"
+    if key in INPUT_FUNS:
+        return "input"
+    return "default"
+
+
+def succeeded(error: Optional[BaseException]) -> bool:
+    """
+    Outcome of a request for release(), a request the kernel rejected with a 4xx status was still answered in time
+    :param error: Exception the request failed with, None when it succeeded
+    :return:
+    """
+    return error is None or (isinstance(error, ResponseError) and not error.retryable)
+
+
+class _Token(NamedTuple):
+    budget: str
+    key: str
+    started: float
+
+
+class _Latency:
+    __slots__ = ("average", "baseline", "count", "updated")
+
+    def __init__(self):
+        self.average = None
+        self.baseline = None
+        self.count = 0
+        self.updated = 0.0
+
+
+class _Limit:
+    __slots__ = ("limit", "minimum", "maximum", "in_flight", "decreased")
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.decreased = 0.0
+
+
+class Governor:
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, Tuple[int, int, int]]] = None,
+        tolerance: float = 2.0,
+        backoff: float = 0.7,
+        smoothing: float = 0.3,
+        drift: float = 0.01,
+        warmup: int = 5,
+    ):
+        """
+        Client-side AIMD concurrency limits protecting the kernel, one limit per class of fun
+        A limit grows by one request per round trip while latencies stay near their baseline and shrinks by backoff
+        when the average latency of a fun exceeds tolerance times its baseline or a request fails
+        Share one governor between the APIs talking to the same kernel
+        :param budgets: Replaced classes as class name to (initial, minimum, maximum) requests in flight
+        :param tolerance: Ratio of the average latency of a fun to its baseline treated as overload
+        :param backoff: Factor a limit is multiplied by on overload
+        :param smoothing: Weight of a new sample in the average latency of a fun
+        :param drift: Share the baseline of a fun may rise per second, so it follows lasting changes
+        :param warmup: Samples of a fun before its latency can shrink a limit
+        """
+        self._limits = {
+            name: _Limit(*budget)
+            for name, budget in {**BUDGETS, **(budgets or {})}.items()
+        }
+        self._tolerance = tolerance
+        self._backoff = backoff
+        self._smoothing = smoothing
+        self._drift = drift
+        self._warmup = warmup
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+
+    def _take(self, budget: str) -> bool:
+        limit = self._limits[budget]
+        if limit.in_flight + 1 > max(limit.minimum, int(limit.limit)):
+            return False
+        limit.in_flight += 1
+        return True
+
+    def _record(self, token: _Token, ok: bool):
+        now = time.monotonic()
+        limit = self._limits[token.budget]
+        limit.in_flight -= 1
+        latency = self._latencies.setdefault(token.key, _Latency())
+        overloaded = not ok
+        if ok:
+            sample = now - token.started
+            latency.count += 1
+            if latency.average is None:
+                latency.average = latency.baseline = sample
+            else:
+                latency.average += self._smoothing * (sample - latency.average)
+                latency.baseline = min(
+                    latency.average,
+                    latency.baseline * (1 + self._drift * (now - latency.updated)),
+                )
+            latency.updated = now
+            overloaded = (
+                latency.count > self._warmup
+                and latency.average > self._tolerance * latency.baseline
+            )
+        if overloaded:
+            # Requests sent before the last decrease do not reflect it yet
+            if token.started >= limit.decreased:
+                limit.limit = max(limit.minimum, limit.limit * self._backoff)
+                limit.decreased = now
+        elif limit.in_flight + 1 >= int(limit.limit):
+            # Only a limit that is actually reached has shown it can grow
+            limit.limit = min(limit.maximum, limit.limit + 1 / limit.limit)
+
+    def acquire(self, data: dict) -> _Token:
+        """
+        Wait until the class of a payload has room for another request
+        :param data: Payload
+        :return: Token to release once the response arrived
+        """
+        budget = classify(data)
+        with self._condition:
+            while not self._take(budget):
+                self._condition.wait()
+        return _Token(budget, latency_key(data), time.monotonic())
+
+    def release(self, token: _Token, ok: bool = True):
+        """
+        Record the outcome of a request and free its slot
+        :param token: Token returned by acquire()
+        :param ok: Whether the kernel answered, see succeeded(), failures shrink the limit
+        :return:
+        """
+        with self._condition:
+            self._record(token, ok)
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """
+        Current limits and measured latencies
+        :return: {"limits": {class: {"limit", "in_flight"}}, "latencies": {fun: {"average", "baseline", "count"}}}
+        """
+        with self._lock:
+            return {
+                "limits": {
+                    name: {"limit": limit.limit, "in_flight": limit.in_flight}
+                    for name, limit in self._limits.items()
+                },
+                "latencies": {
+                    key: {
+                        "average": latency.average,
+                        "baseline": latency.baseline,
+                        "count": latency.count,
+                    }
+                    for key, latency in self._latencies.items()
+                },
+            }
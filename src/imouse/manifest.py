@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import posixpath
+import shutil
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+MANIFEST_NAME = ".imouse-manifest.json"
+
+# Media directory name to [lock, holders and waiters], entries are dropped once nobody uses them
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+class SyncResult(NamedTuple):
+    downloaded: List[str]
+    deleted: List[str]
+    unchanged: int
+    failed: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+def is_dir(item: dict) -> bool:
+    """
+    Whether a get_files entry is a directory
+    """
+    return bool(item.get("isdir") or item.get("type") in ("dir", "folder"))
+
+
+def signature(item: dict) -> dict:
+    """
+    Change marker of a get_files entry, fields the kernel does not report stay None
+    """
+    return {"size": item.get("size"), "mtime": item.get("mtime", item.get("time"))}
+
+
+def _sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, local_dir: str, remote_root: str):
+        """
+        Record of the files mirrored into a local directory, kept in the directory itself
+        :param local_dir: Local mirror directory
+        :param remote_root: Device directory mirrored into it
+        """
+        self.local_dir = local_dir
+        self.remote_root = remote_root
+        self._path = os.path.join(local_dir, MANIFEST_NAME)
+        self.entries = {}
+        if os.path.exists(self._path):
+            with open(self._path) as f:
+                self.entries = json.load(f)
+
+    def local_path(self, remote_path: str) -> str:
+        """
+        Mirror path of a device file
+        :param remote_path: Device file path below remote_root
+        :return:
+        """
+        relative = posixpath.relpath(remote_path, self.remote_root)
+        root = os.path.abspath(self.local_dir)
+        target = os.path.abspath(os.path.join(root, *relative.split("/")))
+        if target == root or os.path.commonpath([root, target]) != root:
+            raise ValueError(f"{remote_path} is outside of {self.remote_root}")
+        return target
+
+    def plan(
+        self, remote: Dict[str, dict]
+    ) -> Tuple[List[str], List[str], int, List[str]]:
+        """
+        Compare a device listing with the manifest
+        Files the listing reports without size and modification time cannot be compared and are fetched again,
+        collect() then tells from their hash whether they changed
+        :param remote: Signature per remote file path
+        :return: Paths to download, paths removed from the device, number of unchanged files, paths outside the mirror
+        """
+        fetch, rejected, unchanged = [], [], 0
+        for path, current in remote.items():
+            try:
+                local = self.local_path(path)
+            except ValueError:
+                rejected.append(path)
+                continue
+            entry = self.entries.get(path)
+            known = {key: value for key, value in current.items() if value is not None}
+            if (
+                entry is None
+                or not known
+                or any(entry.get(key) != value for key, value in known.items())
+                or not os.path.exists(local)
+            ):
+                fetch.append(path)
+            else:
+                unchanged += 1
+        removed = [path for path in self.entries if path not in remote]
+        return fetch, removed, unchanged, rejected
+
+    def collect(
+        self, media_dir: str, remote_path: str, current: dict
+    ) -> Optional[bool]:
+        """
+        Move a file downloaded by the kernel from its media directory into the mirror
+        :param media_dir: Directory the kernel downloads files into
+        :param remote_path: Device file path
+        :param current: Signature of the file in the listing
+        :return: None when the file was not found, otherwise whether its hash differs from the recorded one
+        """
+        source = os.path.join(media_dir, posixpath.basename(remote_path))
+        if not os.path.exists(source):
+            return None
+        target = self.local_path(remote_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(source, target)
+        sha1 = _sha1(target)
+        previous = self.entries.get(remote_path, {}).get("sha1")
+        self.entries[remote_path] = {**current, "sha1": sha1}
+        return sha1 != previous
+
+    def delete(self, remote_path: str):
+        """
+        Remove a file that is gone from the device
+        :param remote_path: Device file path
+        :return:
+        """
+        target = self.local_path(remote_path)
+        if os.path.exists(target):
+            os.remove(target)
+        self.entries.pop(remote_path, None)
+
+    def save(self):
+        os.makedirs(self.local_dir, exist_ok=True)
+        temporary = self._path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(temporary, self._path)
+
+
+def chunks(paths: List[str], size: int) -> Iterator[List[str]]:
+    """
+    Group paths by directory, then split the groups, files with one name never share a download
+    """
+    groups = {}
+    for path in paths:
+        groups.setdefault(posixpath.dirname(path), []).append(path)
+    for group in groups.values():
+        for i in range(0, len(group), size):
+            yield group[i : i + size]
+
+
+class MediaLock:
+    def __init__(self, media_dir: str, paths: List[str]):
+        """
+        Hold the media directory names of a download so devices syncing at the same time do not take each other's files
+        :param media_dir: Directory the kernel downloads files into
+        :param paths: Device file paths of the download
+        """
+        self._keys = sorted({(media_dir, posixpath.basename(path)) for path in paths})
+        self._held = []
+
+    def acquire(self):
+        with _locks_lock:
+            for key in self._keys:
+                entry = _locks.setdefault(key, [threading.Lock(), 0])
+                entry[1] += 1
+                self._held.append(entry[0])
+        for lock in self._held:
+            lock.acquire()
+
+    def release(self):
+        for lock in reversed(self._held):
+            lock.release()
+        self._held = []
+        with _locks_lock:
+            for key in self._keys:
+                entry = _locks[key]
+                entry[1] -= 1
+                if not entry[1]:
+                    del _locks[key]
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,272 @@
+import json
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    from .console import Console
+
+# Index name to device info field, the fields of get_device_list entries
+INDEXES = {
+    "name": "device_name",
+    "gid": "gid",
+    "model": "model",
+    "airplay": "state",
+    "usb": "usb",
+}
+
+EVENTS = ("added", "removed", "changed")
+
+# Seconds before retrying a failed refresh, doubled after every further failure up to the TTL
+RETRY_DELAY = 0.5
+
+Listener = Callable[[str, Optional[dict], Optional[dict]], None]
+
+
+def _entries(ret: dict) -> Dict[str, dict]:
+    """
+    Device info per device ID from a get_device_list response keyed by ID or listing entries with a deviceid
+    """
+    data = ret.get("data") or {}
+    if isinstance(data, dict):
+        return {
+            device_id: (
+                {**info, "deviceid": device_id}
+                if isinstance(info, dict)
+                else {"deviceid": device_id}
+            )
+            for device_id, info in data.items()
+        }
+    return {item["deviceid"]: item for item in data}
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+class DeviceRegistry:
+    def __init__(
+        self,
+        console: "Console",
+        ttl: float = 5.0,
+        indexes: Optional[Dict[str, Union[str, Callable[[dict], Any]]]] = None,
+    ):
+        """
+        Snapshot of the console device list refreshed at most once per TTL, with indexes for constant time lookups
+        Refreshes that change the list notify the added, removed and changed listeners
+        :param console: Console listing the devices
+        :param ttl: Seconds a snapshot is served before the next lookup refreshes it
+        :param indexes: Extra or replaced indexes, index name to info field or function of the info
+        """
+        self._console = console
+        self._ttl = ttl
+        self._fields = {**INDEXES, **(indexes or {})}
+        self._devices = {}
+        self._indexes = {name: {} for name in self._fields}
+        self._next = None
+        self._failures = 0
+        self._lock = threading.RLock()
+        self._refreshing = threading.Lock()
+        self._listeners = {event: [] for event in EVENTS}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _value(self, name: str, info: dict) -> Any:
+        field = self._fields[name]
+        value = field(info) if callable(field) else info.get(field)
+        return _hashable(value)
+
+    def _index(self, device_id: str, info: dict, add: bool):
+        for name, index in self._indexes.items():
+            value = self._value(name, info)
+            if add:
+                index.setdefault(value, set()).add(device_id)
+                continue
+            ids = index.get(value)
+            if ids is not None:
+                ids.discard(device_id)
+                if not ids:
+                    del index[value]
+
+    def _apply(
+        self, ret: dict
+    ) -> List[Tuple[str, str, Optional[dict], Optional[dict]]]:
+        """
+        Replace the snapshot with a get_device_list response
+        :return: Events as (event, device ID, current info, previous info)
+        """
+        devices = _entries(ret)
+        events = []
+        with self._lock:
+            for device_id in list(self._devices):
+                if device_id not in devices:
+                    previous = self._devices.pop(device_id)
+                    self._index(device_id, previous, add=False)
+                    events.append(("removed", device_id, None, previous))
+            for device_id, info in devices.items():
+                previous = self._devices.get(device_id)
+                if previous == info:
+                    continue
+                if previous is not None:
+                    self._index(device_id, previous, add=False)
+                self._devices[device_id] = info
+                self._index(device_id, info, add=True)
+                event = "added" if previous is None else "changed"
+                events.append((event, device_id, info, previous))
+            self._next = time.monotonic() + self._ttl
+            self._failures = 0
+        return events
+
+    def _emit(self, events: list):
+        for event, device_id, current, previous in events:
+            for listener in list(self._listeners[event]):
+                listener(device_id, current, previous)
+
+    def _stale(self) -> bool:
+        return self._next is None or time.monotonic() >= self._next
+
+    def _failed(self):
+        """
+        Put off the next refresh after a failed one, so lookups do not all hit a struggling console
+        :return:
+        """
+        with self._lock:
+            delay = min(self._ttl, RETRY_DELAY * 2**self._failures)
+            self._failures += 1
+            self._next = time.monotonic() + delay
+
+    def refresh(self) -> bool:
+        """
+        Fetch the device list now
+        :return: Whether the console answered, the previous snapshot is kept otherwise
+        """
+        try:
+            ret = self._console.device.get_all()
+        except Exception:
+            self._failed()
+            raise
+        if ret.get("status") != 0:
+            self._failed()
+            return False
+        self._emit(self._apply(ret))
+        return True
+
+    def _refresh_locked(self) -> bool:
+        """
+        Fetch the device list once no other thread is fetching it
+        :return: Whether the console answered
+        """
+        with self._refreshing:
+            return self.refresh()
+
+    def _fresh(self):
+        if not self._stale():
+            return
+        with self._refreshing:
+            # Another thread may have refreshed while this one waited
+            if self._stale():
+                self.refresh()
+
+    def on(self, event: str, listener: Listener) -> Callable[[], None]:
+        """
+        Receive changes found by refreshes
+        :param event: "added", "removed" or "changed"
+        :param listener: Called with the device ID, its current info (None when removed) and previous info (None when added)
+        :return: Function removing the listener
+        """
+        if event not in self._listeners:
+            raise ValueError(f"Unknown event: {event}")
+        self._listeners[event].append(listener)
+
+        def remove():
+            if listener in self._listeners[event]:
+                self._listeners[event].remove(listener)
+
+        return remove
+
+    def get(self, device_id: str) -> Optional[dict]:
+        """
+        Info of a device
+        :param device_id: Device ID
+        :return: Device info or None when unknown
+        """
+        self._fresh()
+        return self._devices.get(device_id)
+
+    def find(self, **criteria) -> List[str]:
+        """
+        Devices matching every criterion, e.g. find(gid="1", airplay=1)
+        :param criteria: Index name to value
+        :return: Device IDs
+        """
+        self._fresh()
+        return self._lookup(criteria)
+
+    def _lookup(self, criteria: dict) -> List[str]:
+        with self._lock:
+            matches = None
+            for name, value in criteria.items():
+                if name not in self._indexes:
+                    raise KeyError(f"Unknown index: {name}")
+                ids = self._indexes[name].get(_hashable(value), set())
+                matches = set(ids) if matches is None else matches & ids
+                if not matches:
+                    return []
+            return list(self._devices if matches is None else matches)
+
+    def values(self, index: str) -> Set[Any]:
+        """
+        Distinct values of an index, e.g. values("gid") for the groups in use
+        :param index: Index name
+        :return:
+        """
+        self._fresh()
+        with self._lock:
+            return set(self._indexes[index])
+
+    def __contains__(self, device_id: str) -> bool:
+        self._fresh()
+        return device_id in self._devices
+
+    def __len__(self) -> int:
+        self._fresh()
+        return len(self._devices)
+
+    def __iter__(self):
+        self._fresh()
+        return iter(list(self._devices))
+
+    def start(self, interval: Optional[float] = None):
+        """
+        Refresh in a background thread so listeners are notified without lookups
+        :param interval: Seconds between refreshes, default the TTL
+        :return:
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        interval = self._ttl if interval is None else interval
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self._refresh_locked()
+                except Exception:
+                    # A kernel hiccup must not end the thread, the next refresh retries
+                    pass
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=run, name="imouse-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background refresh
+        :return:
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
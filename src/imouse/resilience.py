@@ -0,0 +1,259 @@
+import asyncio
+import copy
+import json
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+from .exceptions import CircuitOpenError, KernelTimeout, ResponseError, TransportError
+
+T = TypeVar("T")
+
+# Seconds to wait for a response when a fun has no entry in TIMEOUTS
+DEFAULT_TIMEOUT = 10.0
+
+TIMEOUTS = {
+    "get_device_screenshot": 20.0,
+    "find_image": 30.0,
+    "find_image_ex": 30.0,
+    "find_multi_color": 30.0,
+    "find_multi_color_ex": 30.0,
+    "ocr": 30.0,
+    "ocr_ex": 30.0,
+    "auto_connect_screen": 30.0,
+    "auto_connect_screen_all": 30.0,
+    "restart_usb": 30.0,
+    "restart_device": 60.0,
+    "restart": 60.0,
+}
+
+# Extra seconds over the outtime a payload asks the kernel to wait, for the kernel to answer
+OUTTIME_MARGIN = 5.0
+
+# Funs that only read state, sending them twice does nothing a single send would not
+IDEMPOTENT_FUNS = frozenset(
+    {
+        "get_device_list",
+        "get_devicemodel_list",
+        "get_group_list",
+        "get_usb_list",
+        "get_airplay_mode",
+        "get_airplaysrvnum",
+        "get_usb_autoairplay",
+        "get_device_screenshot",
+        "find_image",
+        "find_image_ex",
+        "find_multi_color",
+        "find_multi_color_ex",
+        "ocr",
+        "ocr_ex",
+    }
+)
+
+
+class CircuitBreaker:
+    def __init__(self, kernel: str, threshold: int = 5, reset_timeout: float = 10.0):
+        """
+        Refuse calls to a kernel after consecutive failures, then let one trial call through every reset_timeout
+        :param kernel: Kernel host and port, shown in errors
+        :param threshold: Consecutive failures that open the circuit
+        :param reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.kernel = kernel
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        "closed", "open" or "half-open"
+        """
+        with self._lock:
+            if self._opened is None:
+                return "closed"
+            if self._trial or time.monotonic() - self._opened >= self._reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before(self):
+        """
+        Raise CircuitOpenError unless a call may be sent now
+        :return:
+        """
+        with self._lock:
+            if self._opened is None:
+                return
+            retry_after = self._opened + self._reset_timeout - time.monotonic()
+            if self._trial or retry_after > 0:
+                raise CircuitOpenError(self.kernel, max(retry_after, 0.0))
+            self._trial = True
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self._threshold:
+                self._opened = time.monotonic()
+            self._trial = False
+
+    def release(self):
+        """
+        Give up a trial call without an outcome
+        :return:
+        """
+        with self._lock:
+            self._trial = False
+
+    def reset(self):
+        """
+        Close the circuit, e.g. after restarting the kernel
+        :return:
+        """
+        self.success()
+
+
+def parse(data: dict, status_code: Optional[int], body: bytes) -> dict:
+    """
+    JSON response of a request, ResponseError for error statuses and bodies that are not JSON such as HTML error pages
+    :param data: Payload
+    :param status_code: HTTP status code, None over the websocket
+    :param body: Response body
+    :return:
+    """
+    if status_code is not None and status_code >= 400:
+        raise ResponseError(data.get("fun"), status_code, body.decode(errors="replace"))
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise ResponseError(
+            data.get("fun"), status_code, body.decode(errors="replace")
+        ) from None
+
+
+class CallPolicy:
+    def __init__(
+        self,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = DEFAULT_TIMEOUT,
+        retries: int = 2,
+        backoff: float = 0.2,
+        max_backoff: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Timeouts, retries and circuit breaking of the requests a transport sends
+        Idempotent funs are retried with jittered exponential back-off on transport failures, timeouts and 5xx responses
+        :param timeouts: Replaced timeouts in seconds per fun
+        :param default_timeout: Timeout in seconds of the funs without an entry
+        :param retries: Attempts after the first one for idempotent funs
+        :param backoff: Delay before the first retry in seconds, doubled after every further one
+        :param max_backoff: Longest delay between attempts in seconds
+        :param breaker: Circuit breaker shared by every transport using the policy, by default each transport has its own
+        """
+        self._timeouts = {**TIMEOUTS, **(timeouts or {})}
+        self._default_timeout = default_timeout
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self.breaker = breaker
+
+    def bind(self, url: str) -> "CallPolicy":
+        """
+        Copy of the policy for one transport, so transports never change each other's policy
+        :param url: Kernel API or websocket url of the transport
+        :return: Copy with the breaker of the policy, or a new one for the kernel of the url
+        """
+        policy = copy.copy(self)
+        if policy.breaker is None:
+            policy.breaker = CircuitBreaker(urlsplit(url).netloc)
+        return policy
+
+    def timeout(self, data: dict) -> float:
+        """
+        Seconds to wait for the response of a payload, the outtime it carries plus a margin if any
+        :param data: Payload
+        :return:
+        """
+        outtime = (data.get("data") or {}).get("outtime")
+        if outtime:
+            return outtime / 1000 + OUTTIME_MARGIN
+        return self._timeouts.get(data.get("fun"), self._default_timeout)
+
+    def _attempts(self, data: dict) -> int:
+        return self._retries + 1 if data.get("fun") in IDEMPOTENT_FUNS else 1
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self._max_backoff, self._backoff * 2**attempt))
+
+    def _failed(self, error: Exception) -> bool:
+        """
+        Record a failed attempt
+        :return: Whether it may be retried
+        """
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, ResponseError) and not error.retryable:
+            # The kernel answered, the request was at fault
+            self.breaker.success()
+            return False
+        self.breaker.failure()
+        return True
+
+    def call(self, data: dict, send: Callable[[dict, float], T]) -> T:
+        """
+        Send a payload under the policy
+        :param data: Payload
+        :param send: Sends the payload with a timeout in seconds
+        :return: Response
+        """
+        attempts = self._attempts(data)
+        for attempt in range(attempts):
+            self.breaker.before()
+            try:
+                ret = send(data, self.timeout(data))
+            except (TransportError, KernelTimeout, ResponseError) as e:
+                if not self._failed(e) or attempt + 1 == attempts:
+                    raise
+                time.sleep(self._delay(attempt))
+                continue
+            except BaseException:
+                # Not a kernel failure, a pending trial call must not keep the circuit open
+                self.breaker.release()
+                raise
+            self.breaker.success()
+            return ret
+
+    async def acall(self, data: dict, send: Callable[[dict, float], Awaitable[T]]) -> T:
+        """
+        Send a payload under the policy without blocking the event loop
+        :param data: Payload
+        :param send: Coroutine function sending the payload with a timeout in seconds
+        :return: Response
+        """
+        attempts = self._attempts(data)
+        for attempt in range(attempts):
+            self.breaker.before()
+            try:
+                ret = await send(data, self.timeout(data))
+            except (TransportError, KernelTimeout, ResponseError) as e:
+                if not self._failed(e) or attempt + 1 == attempts:
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            except BaseException:
+                # Not a kernel failure, a pending trial call must not keep the circuit open
+                self.breaker.release()
+                raise
+            self.breaker.success()
+            return ret
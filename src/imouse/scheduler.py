@@ -0,0 +1,218 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+# Lower runs first, bulk work uses the default
+DEFAULT_PRIORITY = 10
+
+_priority = contextvars.ContextVar("imouse_priority", default=DEFAULT_PRIORITY)
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """
+    Run the commands sent inside the block at another priority on scheduled devices
+    :param level: Priority, lower runs first, default 10
+    :return:
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class _Command:
+    __slots__ = ("priority", "sequence", "data", "binary", "futures")
+
+    def __init__(
+        self, priority: int, sequence: int, data: dict, future, binary: bool = False
+    ):
+        self.priority = priority
+        self.sequence = sequence
+        self.data = data
+        self.binary = binary
+        self.futures = [future]
+
+    def __lt__(self, other: "_Command") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class CommandQueue:
+    def __init__(self, rate: Optional[float] = None, coalesce: bool = True):
+        """
+        Priority queue of the commands of one device, first in first out within a priority
+        :param rate: Maximum commands per second, None for no limit
+        :param coalesce: Whether a mouse_move replaces a mouse_move queued right before it
+        """
+        self.interval = 1 / rate if rate else 0.0
+        self._coalesce = coalesce
+        self._heap = []
+        self._sequence = itertools.count()
+        self._last = None
+
+    def push(self, data: dict, priority: int, future, binary: bool = False):
+        """
+        Queue a command
+        :param data: Payload
+        :param priority: Priority, lower runs first
+        :param future: Resolved with the response, shared with the command replacing it when coalesced
+        :param binary: Whether the kernel answers with a binary frame, sent with post_binary
+        :return:
+        """
+        last = self._last
+        if (
+            self._coalesce
+            and data["fun"] == "mouse_move"
+            and last is not None
+            and last.data["fun"] == "mouse_move"
+            and last.priority == priority
+        ):
+            # Only the final position of consecutive moves matters
+            last.data = data
+            last.futures.append(future)
+            return
+        self._last = _Command(priority, next(self._sequence), data, future, binary)
+        heapq.heappush(self._heap, self._last)
+
+    def pop(self) -> Optional[_Command]:
+        if not self._heap:
+            return None
+        command = heapq.heappop(self._heap)
+        if command is self._last:
+            self._last = None
+        return command
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+def resolve(futures: List, result=None, error: Optional[BaseException] = None):
+    for future in futures:
+        if future.done():
+            continue
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+class _Worker:
+    def __init__(
+        self, transport, device_id: str, rate: Optional[float], coalesce: bool
+    ):
+        self._transport = transport
+        self.queue = CommandQueue(rate, coalesce)
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"imouse-scheduler-{device_id}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, data: dict, priority: int, binary: bool) -> Future:
+        future = Future()
+        with self._condition:
+            self.queue.push(data, priority, future, binary)
+            self._condition.notify()
+        return future
+
+    def _run(self):
+        sent = 0.0
+        while True:
+            with self._condition:
+                while not len(self.queue) and not self._closed:
+                    self._condition.wait()
+                command = self.queue.pop()
+            if command is None:
+                return
+            delay = sent + self.queue.interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            sent = time.monotonic()
+            post = (
+                self._transport.post_binary if command.binary else self._transport.post
+            )
+            try:
+                resolve(command.futures, post(command.data))
+            except Exception as e:
+                resolve(command.futures, error=e)
+
+    def close(self):
+        """
+        Stop once the queued commands are sent
+        :return:
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+
+class CommandScheduler:
+    def __init__(self, transport):
+        """
+        Opt-in per-device command queues sending the commands of a device one at a time, by priority and within a rate
+        :param transport: Transport of the API
+        """
+        self._transport = transport
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def enable(
+        self, device_id: str, rate: Optional[float] = None, coalesce: bool = True
+    ):
+        """
+        Queue the commands of a device
+        :param device_id: Device ID
+        :param rate: Maximum commands per second, None for no limit
+        :param coalesce: Whether consecutive queued mouse_move commands collapse into the last one
+        :return:
+        """
+        self.disable(device_id)
+        with self._lock:
+            self._workers[device_id] = _Worker(
+                self._transport, device_id, rate, coalesce
+            )
+
+    def disable(self, device_id: str):
+        """
+        Send the queued commands of a device and stop queueing
+        :param device_id: Device ID
+        :return:
+        """
+        with self._lock:
+            worker = self._workers.pop(device_id, None)
+        if worker is not None:
+            worker.close()
+
+    def enabled(self, device_id: str) -> bool:
+        return device_id in self._workers
+
+    def submit(
+        self, device_id: str, data: dict, binary: bool = False
+    ) -> Optional[Future]:
+        """
+        Queue a command at the priority of the calling context
+        :param device_id: Device ID
+        :param data: Payload
+        :param binary: Whether the kernel answers with a binary frame, sent with post_binary
+        :return: Future resolved with the response, None when the device is not scheduled
+        """
+        worker = self._workers.get(device_id)
+        if worker is None:
+            return None
+        return worker.submit(data, current_priority(), binary)
+
+    def close(self):
+        for device_id in list(self._workers):
+            self.disable(device_id)
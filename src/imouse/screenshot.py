@@ -0,0 +1,122 @@
+import base64
+import io
+import struct
+import zlib
+from typing import Optional, Union
+
+from .exceptions import CommandError
+
+# Base64 characters decoded per step when inflating, a multiple of 4
+_CHUNK = 1 << 16
+
+
+def _inflate_base64(image: str) -> bytearray:
+    """
+    Decode a base64 gzip image into a single preallocated buffer
+    :param image: Base64 encoded gzip data
+    :return: Decompressed data
+    """
+    # The gzip trailer ends with the uncompressed size modulo 2^32
+    tail = base64.b64decode(image[-12:])
+    size = struct.unpack("<I", tail[-4:])[0]
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    decompressor = zlib.decompressobj(wbits=31)
+    position = 0
+
+    def write(data: bytes):
+        nonlocal view, position
+        end = position + len(data)
+        if end > len(buffer):
+            # Images over 4 GiB wrap the trailer size, grow instead of failing
+            view.release()
+            buffer.extend(bytes(end - len(buffer)))
+            view = memoryview(buffer)
+        view[position:end] = data
+        position = end
+
+    for start in range(0, len(image), _CHUNK):
+        write(decompressor.decompress(base64.b64decode(image[start : start + _CHUNK])))
+    write(decompressor.flush())
+    view.release()
+    del buffer[position:]
+    return buffer
+
+
+class Screenshot:
+    def __init__(self, response: Optional[dict] = None, raw: Optional[bytes] = None):
+        """
+        Screen capture keeping the encoded payload, decoding happens on first access
+        :param response: JSON response with a base64 image in data.img
+        :param raw: Raw image bytes of a binary websocket frame
+        """
+        self.response = response if response is not None else {"status": 0}
+        self._raw = raw
+
+    def __getitem__(self, key):
+        return self.response[key]
+
+    def get(self, key, default=None):
+        return self.response.get(key, default)
+
+    @property
+    def ok(self) -> bool:
+        return self._raw is not None or self.response.get("status") == 0
+
+    @property
+    def bytes(self) -> Union[bytes, bytearray]:
+        """
+        Image bytes, base64 and gzip are decoded on first access and kept on the screenshot, the response is left as it was
+        :return:
+        """
+        if self._raw is None:
+            if not self.ok:
+                raise CommandError(self.response)
+            data = self.response["data"]
+            if data.get("gzip"):
+                self._raw = _inflate_base64(data["img"])
+            else:
+                self._raw = base64.b64decode(data["img"])
+        return self._raw
+
+    @property
+    def format(self) -> str:
+        """
+        Image format guessed from the leading bytes
+        :return: "jpg" or "bmp"
+        """
+        return "bmp" if self.bytes[:2] == b"BM" else "jpg"
+
+    @property
+    def array(self):
+        """
+        Image pixels in RGB order as a NumPy array of shape (height, width, 3)
+        BMP images are returned as a view over the decoded bytes, JPG images are decoded with Pillow
+        :return:
+        """
+        import numpy as np
+
+        data = self.bytes
+        if self.format != "bmp":
+            from PIL import Image
+
+            return np.asarray(Image.open(io.BytesIO(data)))
+        offset = struct.unpack_from("<I", data, 10)[0]
+        width, height = struct.unpack_from("<ii", data, 18)
+        channels = struct.unpack_from("<H", data, 28)[0] // 8
+        stride = (width * channels + 3) & ~3
+        rows = np.frombuffer(
+            data, dtype=np.uint8, count=stride * abs(height), offset=offset
+        ).reshape(abs(height), stride)
+        pixels = rows[:, : width * channels].reshape(abs(height), width, channels)
+        # Positive heights are stored bottom-up, BMP stores BGR(A), the view reverses it without a copy
+        return pixels[::-1, :, 2::-1] if height > 0 else pixels[:, :, 2::-1]
+
+    def save(self, path: str):
+        """
+        Write the image to a file
+        :param path: File path, its extension should match the format
+        :return:
+        """
+        with open(path, "wb") as f:
+            f.write(self.bytes)
@@ -0,0 +1,127 @@
+import queue
+import time
+
+from .payload import Payload
+from .screenshot import Screenshot
+
+_STOP = object()
+
+
+def _is_frame_of(message: dict, device_id: str) -> bool:
+    """
+    Check whether a message is a loop_device_screenshot frame pushed for a device
+    :param message: Message pushed by the kernel
+    :param device_id: Device ID
+    :return:
+    """
+    if message.get("fun") != "loop_device_screenshot":
+        return False
+    data = message.get("data") or {}
+    return data.get("deviceid", device_id) == device_id and bool(data.get("img"))
+
+
+class ScreenshotStream:
+    def __init__(
+        self,
+        transport,
+        payload: Payload,
+        device_id: str,
+        duration: int = 300,
+        jpg: bool = False,
+        buffer: int = 2,
+    ):
+        """
+        Iterator over frames pushed by loop_device_screenshot, the oldest frames are dropped when the consumer falls behind
+        :param transport: Transport supporting subscribe()
+        :param payload: Payload builder
+        :param device_id: Device ID
+        :param duration: Streaming duration in seconds
+        :param jpg: Whether to stream JPG frames, default BMP
+        :param buffer: Number of undelivered frames to keep
+        """
+        if not hasattr(transport, "subscribe"):
+            raise RuntimeError("Screenshot streaming requires the websocket transport")
+        self._transport = transport
+        self._payload = payload
+        self._device_id = device_id
+        self._duration = duration
+        self._jpg = jpg
+        self._frames = queue.Queue(maxsize=buffer)
+        self._unsubscribe = None
+        self._deadline = None
+        self._closed = False
+
+    def _on_message(self, message: dict):
+        if not _is_frame_of(message, self._device_id):
+            return
+        while True:
+            try:
+                self._frames.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._frames.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def start(self):
+        """
+        Subscribe to pushed frames and ask the kernel to start the loop
+        :return:
+        """
+        if self._unsubscribe is not None or self._closed:
+            return
+        self._unsubscribe = self._transport.subscribe(self._on_message)
+        self._deadline = time.monotonic() + self._duration
+        self._transport.post(
+            self._payload.start_stream_device_screenshots(
+                device_id=self._device_id,
+                duration=self._duration,
+                jpg=self._jpg,
+            )
+        )
+
+    def close(self):
+        """
+        Stop the loop on the kernel and end the iteration
+        :return:
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+            self._transport.post(
+                self._payload.stop_stream_device_screenshots(device_id=self._device_id)
+            )
+        # Wake up a consumer blocked on the queue
+        try:
+            self._frames.put_nowait(_STOP)
+        except queue.Full:
+            pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        self.start()
+        return self
+
+    def __next__(self) -> Screenshot:
+        remaining = self._deadline - time.monotonic() if self._deadline else 0
+        if self._closed or remaining <= 0:
+            self.close()
+            raise StopIteration
+        try:
+            message = self._frames.get(timeout=remaining)
+        except queue.Empty:
+            message = _STOP
+        if message is _STOP or self._closed:
+            self.close()
+            raise StopIteration
+        return Screenshot(message)
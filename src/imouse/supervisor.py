@@ -0,0 +1,240 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+from .registry import DeviceRegistry
+
+if TYPE_CHECKING:
+    from . import API
+
+
+def _mirrored(info: dict) -> bool:
+    return bool(info.get("state"))
+
+
+class Supervisor:
+    def __init__(
+        self,
+        api: "API",
+        registry: Optional[DeviceRegistry] = None,
+        max_concurrent: int = 4,
+        interval: float = 2.0,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        force_after: int = 2,
+        usb_after: int = 4,
+        bulk_ratio: float = 0.5,
+        is_online: Callable[[dict], bool] = _mirrored,
+        on_recovered: Optional[Callable[[str, float], None]] = None,
+    ):
+        """
+        Watch the device list and bring dropped screen mirroring back, reconnecting devices concurrently with jittered exponential back-off
+        :param api: API of the kernel
+        :param registry: Device registry to watch, a new one is created by default
+        :param max_concurrent: Maximum number of reconnects running at the same time
+        :param interval: Seconds between checks
+        :param base_delay: Back-off after the first failed attempt in seconds, doubled after every further one
+        :param max_delay: Longest back-off in seconds
+        :param force_after: Attempts after which connect is forced
+        :param usb_after: Every this many attempts the USB device is restarted before connecting
+        :param bulk_ratio: Share of offline devices from which connect_all is sent once before reconnecting them one by one
+        :param is_online: Whether a device info from the list is mirroring
+        :param on_recovered: Called with the device ID and the seconds it was down
+        """
+        self._console = api.console()
+        self._transport = api._transport
+        if registry is None:
+            registry = DeviceRegistry(self._console, ttl=interval)
+        self._registry = registry
+        self._interval = interval
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._force_after = force_after
+        self._usb_after = usb_after
+        self._bulk_ratio = bulk_ratio
+        self._is_online = is_online
+        self._on_recovered = on_recovered
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent)
+        self._lock = threading.Lock()
+        self._attempts = {}
+        self._next = {}
+        self._down_since = {}
+        self._errors = {}
+        self._running = set()
+        self._bulk_sent = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _delay(self, attempts: int) -> float:
+        delay = min(self._max_delay, self._base_delay * 2 ** (attempts - 1))
+        # Equal jitter keeps devices that dropped together from retrying together
+        return random.uniform(delay / 2, delay)
+
+    def _reconnect(self, device_id: str):
+        with self._lock:
+            attempt = self._attempts.get(device_id, 0) + 1
+        error = None
+        try:
+            if self._usb_after and attempt % self._usb_after == 0:
+                self._console.usb.restart(device_id)
+            ret = self._console.airplay.connect(device_id, attempt > self._force_after)
+            if ret.get("status") != 0:
+                error = ret.get("message")
+        except Exception as e:
+            error = e
+        with self._lock:
+            self._attempts[device_id] = attempt
+            self._next[device_id] = time.monotonic() + self._delay(attempt)
+            self._errors[device_id] = error
+            self._running.discard(device_id)
+
+    def _recovered(self, device_id: str, now: float):
+        with self._lock:
+            down_since = self._down_since.pop(device_id, None)
+            self._attempts.pop(device_id, None)
+            self._next.pop(device_id, None)
+            self._errors.pop(device_id, None)
+        if down_since is not None and self._on_recovered is not None:
+            self._on_recovered(device_id, now - down_since)
+
+    def _prune(self, device_ids: set):
+        """
+        Forget devices that left the device list
+        :param device_ids: Devices in the list
+        :return:
+        """
+        with self._lock:
+            for state in (self._down_since, self._attempts, self._next, self._errors):
+                for device_id in [key for key in state if key not in device_ids]:
+                    del state[device_id]
+
+    def check(self):
+        """
+        Run one supervision pass, start() runs it every interval
+        :return:
+        """
+        if not self._registry._refresh_locked():
+            # The previous snapshot may be stale, acting on it could reconnect devices that are back
+            return
+        now = time.monotonic()
+        device_ids = list(self._registry)
+        self._prune(set(device_ids))
+        offline = []
+        for device_id in device_ids:
+            info = self._registry.get(device_id)
+            if info is not None and self._is_online(info):
+                self._recovered(device_id, now)
+            else:
+                offline.append(device_id)
+                with self._lock:
+                    self._down_since.setdefault(device_id, now)
+
+        if not offline:
+            self._bulk_sent = False
+            return
+        if (
+            not self._bulk_sent
+            and len(offline) > 1
+            and len(offline) >= self._bulk_ratio * len(device_ids)
+        ):
+            # A kernel-wide outage, one request starts mirroring everywhere
+            self._bulk_sent = True
+            self._console.airplay.connect_all()
+            with self._lock:
+                for device_id in offline:
+                    self._next[device_id] = now + self._delay(1)
+            return
+
+        with self._lock:
+            due = [
+                device_id
+                for device_id in offline
+                if device_id not in self._running
+                and self._next.get(device_id, 0) <= now
+            ]
+            self._running.update(due)
+        for device_id in due:
+            self._executor.submit(self._reconnect, device_id)
+
+    def status(self) -> Dict[str, dict]:
+        """
+        Devices being recovered
+        :return: Per device ID the attempts so far, seconds down and the last error
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                device_id: {
+                    "attempts": self._attempts.get(device_id, 0),
+                    "down": now - since,
+                    "error": self._errors.get(device_id),
+                }
+                for device_id, since in self._down_since.items()
+            }
+
+    def restart_console(self):
+        """
+        Restart the kernel and bring every device back in parallel from the next check
+        :return:
+        """
+        # The failures of the old kernel must not block the restart nor the checks of the new one
+        self._transport.breaker.reset()
+        try:
+            ret = self._console.restart()
+        finally:
+            self._transport.breaker.reset()
+        with self._lock:
+            self._attempts.clear()
+            self._next.clear()
+            self._bulk_sent = False
+        return ret
+
+    def start(self):
+        """
+        Check in a background thread
+        :return:
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.check()
+                except Exception:
+                    # The kernel may be restarting, keep watching
+                    pass
+                self._stop.wait(self._interval)
+
+        self._thread = threading.Thread(
+            target=run, name="imouse-supervisor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop checking, reconnects already running finish
+        :return:
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """
+        Stop checking and wait for running reconnects
+        :return:
+        """
+        self.stop()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
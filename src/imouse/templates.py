@@ -0,0 +1,160 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Union
+
+
+class _Template:
+    def __init__(self, key: str, image: bytes):
+        self.key = key
+        self.image = image
+        self.encoded = base64.b64encode(image).decode()
+        self._gray = None
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            from .vision import decode_template
+
+            self._gray = decode_template(self.image)
+        return self._gray
+
+    @property
+    def size(self) -> int:
+        size = len(self.image) + len(self.encoded)
+        if self._gray is not None:
+            size += self._gray.nbytes
+        return size
+
+
+class TemplateRegistry:
+    def __init__(self, max_bytes: int = 64 << 20, directory: Optional[str] = None):
+        """
+        Template images stored once by content hash, with their base64 form for the kernel and luminance for the local matcher
+        :param max_bytes: Memory budget, least recently used templates are evicted beyond it
+        :param directory: Optional directory persisting templates and their names across runs
+        """
+        self._max_bytes = max_bytes
+        self._directory = directory
+        self._templates = OrderedDict()
+        self._names = {}
+        self._size = 0
+        self._lock = threading.RLock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            index = os.path.join(directory, "names.json")
+            if os.path.exists(index):
+                with open(index) as f:
+                    self._names = json.load(f)
+
+    def load(self, name: str, image: Union[str, bytes]) -> str:
+        """
+        Register a template under a name
+        :param name: Name accepted by match_image/match_images
+        :param image: Image file path or image binary data
+        :return: Content hash of the template
+        """
+        if isinstance(image, str):
+            with open(image, "rb") as f:
+                image = f.read()
+        key = self._add(image).key
+        with self._lock:
+            self._names[name] = key
+            self._save_names()
+        return key
+
+    def remove(self, name: str):
+        """
+        Forget a template name, its content stays cached until evicted
+        :param name: Template name
+        :return:
+        """
+        with self._lock:
+            if self._names.pop(name, None) is not None:
+                self._save_names()
+
+    def _save_names(self):
+        if self._directory is not None:
+            with open(os.path.join(self._directory, "names.json"), "w") as f:
+                json.dump(self._names, f)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+
+    def encoded(self, image: Union[str, bytes]) -> str:
+        """
+        Base64 form of a template
+        :param image: Template name or image binary data
+        :return:
+        """
+        return self._get(image).encoded
+
+    def gray(self, image: Union[str, bytes]):
+        """
+        Luminance array of a template for the local matcher, requires py-imouse[vision]
+        :param image: Template name or image binary data
+        :return:
+        """
+        template = self._get(image)
+        with self._lock:
+            before = template.size
+            gray = template.gray
+            if self._templates.get(template.key) is template:
+                self._size += template.size - before
+                self._evict(keep=template.key)
+        return gray
+
+    def _get(self, image: Union[str, bytes]) -> _Template:
+        if isinstance(image, str):
+            with self._lock:
+                key = self._names.get(image)
+                if key is None:
+                    raise KeyError(f"Unknown template: {image}")
+                template = self._templates.get(key)
+                if template is not None:
+                    self._templates.move_to_end(key)
+                    return template
+            # Evicted or loaded by a previous run, reload it from disk
+            path = self._path(key)
+            if path is None or not os.path.exists(path):
+                raise KeyError(f"Template {image} was evicted and is not persisted")
+            with open(path, "rb") as f:
+                image = f.read()
+        return self._add(image)
+
+    def _add(self, image: bytes) -> _Template:
+        key = hashlib.sha1(image).hexdigest()
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                return template
+        # Encode outside the lock, the same content may be encoded twice at worst
+        template = _Template(key, image)
+        with self._lock:
+            if key in self._templates:
+                return self._templates[key]
+            self._templates[key] = template
+            self._size += template.size
+            path = self._path(key)
+            if path is not None and not os.path.exists(path):
+                with open(path, "wb") as f:
+                    f.write(image)
+            self._evict(keep=key)
+        return template
+
+    def _evict(self, keep: Optional[str] = None):
+        while self._size > self._max_bytes and len(self._templates) > 1:
+            key = next(iter(self._templates))
+            if key == keep:
+                self._templates.move_to_end(key)
+                key = next(iter(self._templates))
+            self._size -= self._templates.pop(key).size
+
+    def _path(self, key: str) -> Optional[str]:
+        if self._directory is None:
+            return None
+        return os.path.join(self._directory, key)
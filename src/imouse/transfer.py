@@ -0,0 +1,349 @@
+import collections
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from . import API
+
+
+class _Chunk:
+    def __init__(self, files: list, size: int):
+        self.files = files
+        self.size = size
+
+
+class Transfer:
+    def __init__(
+        self,
+        chunks: List[_Chunk],
+        on_progress: Optional[Callable[["Transfer"], None]] = None,
+    ):
+        """
+        Progress of one transfer, its chunks complete in any order
+        :param chunks: Chunks of the transfer
+        :param on_progress: Called with the transfer after every chunk
+        """
+        self._on_progress = on_progress
+        self._lock = threading.Lock()
+        self._futures = []
+        self._started = time.monotonic()
+        self._finished = None
+        self._remaining = len(chunks)
+        self.files_total = sum(len(chunk.files) for chunk in chunks)
+        self.bytes_total = sum(chunk.size for chunk in chunks)
+        self.files_done = 0
+        self.bytes_done = 0
+        self.retries = 0
+        self.results = []
+        self.failed = []
+        if not chunks:
+            self._finished = self._started
+
+    def _retried(self):
+        with self._lock:
+            self.retries += 1
+
+    def _finish(self, chunk: _Chunk, ret, ok: bool):
+        with self._lock:
+            if ok:
+                self.files_done += len(chunk.files)
+                self.bytes_done += chunk.size
+                self.results.append(ret)
+            else:
+                self.failed.append((chunk.files, ret))
+            self._remaining -= 1
+            if self._remaining == 0:
+                self._finished = time.monotonic()
+        if self._on_progress is not None:
+            self._on_progress(self)
+
+    @property
+    def done(self) -> bool:
+        return self._finished is not None
+
+    @property
+    def ok(self) -> bool:
+        return self.done and not self.failed
+
+    @property
+    def elapsed(self) -> float:
+        end = self._finished if self._finished is not None else time.monotonic()
+        return end - self._started
+
+    @property
+    def throughput(self) -> float:
+        """
+        Transferred bytes per second so far, 0 when the sizes are unknown
+        :return:
+        """
+        elapsed = self.elapsed
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    def wait(self, timeout: Optional[float] = None) -> "Transfer":
+        """
+        Wait for every chunk
+        :param timeout: Timeout in seconds
+        :return:
+        """
+        wait(self._futures, timeout=timeout)
+        return self
+
+
+class TransferManager:
+    def __init__(
+        self,
+        api: "API",
+        max_concurrent: int = 4,
+        per_device: int = 1,
+        chunk_bytes: int = 32 << 20,
+        chunk_files: int = 20,
+        retries: int = 2,
+        backoff: float = 1.0,
+        max_backoff: float = 10.0,
+        timeout: int = 30000,
+        file_timeout: int = 2000,
+        min_rate: int = 1 << 20,
+    ):
+        """
+        Split file and photo transfers into size-aware chunks and run them concurrently within kernel and device limits
+        Each chunk is one storage shortcut call, only failed chunks are retried
+        :param api: API whose devices transfer
+        :param max_concurrent: Maximum number of chunks running on the kernel at the same time
+        :param per_device: Maximum number of chunks running on one device at the same time, shortcuts on a device run one after another
+        :param chunk_bytes: Target size of a chunk in bytes
+        :param chunk_files: Maximum number of files in a chunk
+        :param retries: Attempts after the first one for a failing chunk
+        :param backoff: Longest delay before the first retry of a chunk in seconds, doubled after every further one, jittered
+        :param max_backoff: Longest delay between attempts in seconds
+        :param timeout: Base timeout of a chunk in milliseconds
+        :param file_timeout: Extra timeout per file in milliseconds
+        :param min_rate: Slowest expected rate in bytes per second, extends the timeout of large chunks
+        """
+        self._api = api
+        self._per_device = per_device
+        self._chunk_bytes = chunk_bytes
+        self._chunk_files = chunk_files
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._timeout = timeout
+        self._file_timeout = file_timeout
+        self._min_rate = min_rate
+        self._kernel = threading.Semaphore(max_concurrent)
+        self._devices = {}
+        self._lock = threading.Lock()
+        # Workers mostly wait on the semaphores, so there can be more of them than running chunks
+        self._executor = ThreadPoolExecutor(max_workers=max(64, max_concurrent))
+
+    def _device_limit(self, device_id: str) -> threading.Semaphore:
+        with self._lock:
+            if device_id not in self._devices:
+                self._devices[device_id] = threading.Semaphore(self._per_device)
+            return self._devices[device_id]
+
+    def _chunks(self, files: list, sizes: Dict[str, int]) -> List[_Chunk]:
+        chunks = []
+        current, size = [], 0
+        for file in files:
+            file_size = sizes.get(file, 0)
+            if current and (
+                len(current) >= self._chunk_files
+                or size + file_size > self._chunk_bytes
+            ):
+                chunks.append(_Chunk(current, size))
+                current, size = [], 0
+            current.append(file)
+            size += file_size
+        if current:
+            chunks.append(_Chunk(current, size))
+        return chunks
+
+    def _chunk_timeout(self, chunk: _Chunk) -> int:
+        return (
+            self._timeout
+            + self._file_timeout * len(chunk.files)
+            + chunk.size * 1000 // self._min_rate
+        )
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self._max_backoff, self._backoff * 2**attempt))
+
+    def _lane(
+        self,
+        transfer: Transfer,
+        queue: collections.deque,
+        call: Callable,
+        device_ids: List[str],
+    ):
+        limits = [self._device_limit(device_id) for device_id in sorted(device_ids)]
+        while True:
+            try:
+                chunk = queue.popleft()
+            except IndexError:
+                return
+            ret = None
+            for attempt in range(self._retries + 1):
+                if attempt:
+                    # Back off outside the limits so other chunks run meanwhile
+                    time.sleep(self._delay(attempt - 1))
+                    transfer._retried()
+                for limit in limits:
+                    limit.acquire()
+                self._kernel.acquire()
+                try:
+                    ret = call(chunk.files, timeout=self._chunk_timeout(chunk))
+                except Exception as e:
+                    ret = e
+                finally:
+                    self._kernel.release()
+                    for limit in limits:
+                        limit.release()
+                if isinstance(ret, dict) and ret.get("status") == 0:
+                    break
+            transfer._finish(
+                chunk, ret, isinstance(ret, dict) and ret.get("status") == 0
+            )
+
+    def _start(
+        self,
+        call: Callable,
+        device_ids: List[str],
+        files: list,
+        sizes: Dict[str, int],
+        on_progress: Optional[Callable[[Transfer], None]],
+    ) -> Transfer:
+        chunks = self._chunks(files, sizes)
+        transfer = Transfer(chunks, on_progress)
+        queue = collections.deque(chunks)
+        for _ in range(min(self._per_device, len(chunks))):
+            transfer._futures.append(
+                self._executor.submit(self._lane, transfer, queue, call, device_ids)
+            )
+        return transfer
+
+    @staticmethod
+    def _local_sizes(files: list) -> Dict[str, int]:
+        sizes = {}
+        for file in files:
+            try:
+                sizes[file] = os.path.getsize(file)
+            except OSError:
+                sizes[file] = 0
+        return sizes
+
+    def upload_files(
+        self,
+        device_id: str,
+        files: list,
+        path: str = "/",
+        devices: list = [],
+        on_progress: Optional[Callable[[Transfer], None]] = None,
+    ) -> Transfer:
+        """
+        Upload files in chunks
+        :param device_id: Device ID
+        :param files: Local file paths e.g. ["d:\\abc1.png","d:\\abc2.png"]
+        :param path: Upload path, default is root directory
+        :param devices: Synchronous operation device list, every chunk counts against the limit of each of them
+        :param on_progress: Called with the transfer after every chunk
+        :return: Transfer, wait() for it to finish
+        """
+        storage = self._api.device(device_id).storage
+        return self._start(
+            lambda chunk, timeout: storage.upload_files(chunk, path, devices, timeout),
+            [device_id, *devices],
+            files,
+            self._local_sizes(files),
+            on_progress,
+        )
+
+    def upload_photos(
+        self,
+        device_id: str,
+        files: list,
+        name: str = "",
+        devices: list = [],
+        on_progress: Optional[Callable[[Transfer], None]] = None,
+    ) -> Transfer:
+        """
+        Upload photos in chunks
+        :param device_id: Device ID
+        :param files: Local file paths e.g. ["d:\\abc1.png","d:\\abc2.png"]
+        :param name: Which album to upload to, default uploads to recent items
+        :param devices: Synchronous operation device list, every chunk counts against the limit of each of them
+        :param on_progress: Called with the transfer after every chunk
+        :return: Transfer, wait() for it to finish
+        """
+        storage = self._api.device(device_id).storage
+        return self._start(
+            lambda chunk, timeout: storage.upload_photos(chunk, name, devices, timeout),
+            [device_id, *devices],
+            files,
+            self._local_sizes(files),
+            on_progress,
+        )
+
+    def download_files(
+        self,
+        device_id: str,
+        files: list,
+        sizes: Optional[Dict[str, int]] = None,
+        on_progress: Optional[Callable[[Transfer], None]] = None,
+    ) -> Transfer:
+        """
+        Download files in chunks into the kernel media directory
+        :param device_id: Device ID
+        :param files: File list e.g. ["abc1.png","abc2.png"]
+        :param sizes: Optional size in bytes per file, e.g. from get_files, used for chunking, timeouts and throughput
+        :param on_progress: Called with the transfer after every chunk
+        :return: Transfer, wait() for it to finish
+        """
+        storage = self._api.device(device_id).storage
+        return self._start(
+            lambda chunk, timeout: storage.download_files(chunk, timeout),
+            [device_id],
+            files,
+            sizes or {},
+            on_progress,
+        )
+
+    def download_photos(
+        self,
+        device_id: str,
+        files: list,
+        sizes: Optional[Dict[str, int]] = None,
+        on_progress: Optional[Callable[[Transfer], None]] = None,
+    ) -> Transfer:
+        """
+        Download photos in chunks into the kernel media directory
+        :param device_id: Device ID
+        :param files: File list e.g. ["abc1.png","abc2.png"]
+        :param sizes: Optional size in bytes per file, e.g. from get_photos, used for chunking, timeouts and throughput
+        :param on_progress: Called with the transfer after every chunk
+        :return: Transfer, wait() for it to finish
+        """
+        storage = self._api.device(device_id).storage
+        return self._start(
+            lambda chunk, timeout: storage.download_photos(chunk, timeout),
+            [device_id],
+            files,
+            sizes or {},
+            on_progress,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Wait for running transfers and stop the workers
+        :return:
+        """
+        self._executor.shutdown(wait=True)
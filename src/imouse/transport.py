@@ -0,0 +1,333 @@
+import collections
+import itertools
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, Optional, Tuple, Union
+
+import requests
+import websocket
+from requests.adapters import HTTPAdapter
+
+from .exceptions import KernelTimeout, TransportError
+from .governor import Governor, succeeded
+from .resilience import CallPolicy, CircuitBreaker, parse
+
+logger = logging.getLogger(__name__)
+
+
+def _bind(policy: Optional[CallPolicy], url: str) -> CallPolicy:
+    return (policy if policy is not None else CallPolicy()).bind(url)
+
+
+def _released(governor: Governor, token) -> Callable[[Future], None]:
+    def release(future: Future):
+        governor.release(
+            token, not future.cancelled() and succeeded(future.exception())
+        )
+
+    return release
+
+
+def _issued(msgid, last_msgid: int) -> bool:
+    """
+    Check whether a msgid was given to a request sent by the transport
+    :param msgid: msgid of a received message
+    :param last_msgid: Last msgid given out
+    :return:
+    """
+    return isinstance(msgid, int) and 0 < msgid <= last_msgid
+
+
+class HttpTransport:
+    def __init__(
+        self,
+        api_url: str,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        governor: Optional[Governor] = None,
+        policy: Optional[CallPolicy] = None,
+    ):
+        """
+        Keep-alive HTTP transport shared by every Device and Console of an API
+        :param api_url: Kernel API url e.g. http://localhost:9912/api
+        :param pool_connections: Number of per-host connection pools to keep
+        :param pool_maxsize: Maximum number of keep-alive connections per host
+        :param pool_block: Block when all connections of a host are in use instead of opening extra ones
+        :param governor: Concurrency limits requests wait for, None for no limits
+        :param policy: Timeouts, retries and circuit breaking, CallPolicy() by default
+        """
+        self._api_url = api_url
+        self._governor = governor
+        self._policy = _bind(policy, api_url)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def _request(self, data: dict, timeout: float) -> dict:
+        try:
+            res = self._session.post(self._api_url, json=data, timeout=timeout)
+        except requests.Timeout as e:
+            raise KernelTimeout(data.get("fun"), timeout) from e
+        except requests.RequestException as e:
+            raise TransportError(str(e)) from e
+        return parse(data, res.status_code, res.content)
+
+    def _send(self, data: dict, timeout: float) -> dict:
+        if self._governor is None:
+            return self._request(data, timeout)
+        token = self._governor.acquire(data)
+        error = None
+        try:
+            return self._request(data, timeout)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._governor.release(token, succeeded(error))
+
+    def post(self, data: dict) -> dict:
+        return self._policy.call(data, self._send)
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """
+        Circuit breaker of the transport, e.g. breaker.reset() after restarting the kernel
+        """
+        return self._policy.breaker
+
+    def close(self):
+        """
+        Close all pooled connections
+        :return:
+        """
+        self._session.close()
+
+
+class _Connection:
+    def __init__(self, ws: websocket.WebSocket):
+        """
+        One socket and the requests waiting for an answer on it
+        """
+        self.ws = ws
+        self.pending = {}
+        # Binary frames carry no msgid, they answer binary requests in send order
+        self.binary_msgids = collections.deque()
+
+
+class WebSocketTransport:
+    def __init__(
+        self,
+        ws_url: str,
+        connect_timeout: float = 10,
+        governor: Optional[Governor] = None,
+        policy: Optional[CallPolicy] = None,
+    ):
+        """
+        WebSocket transport multiplexing concurrent requests over one socket by msgid
+        :param ws_url: Kernel websocket url e.g. ws://localhost:9912/ws
+        :param connect_timeout: Timeout in seconds for opening the socket
+        :param governor: Concurrency limits requests wait for before they are sent, None for no limits
+        :param policy: Timeouts, retries and circuit breaking of post() and post_binary(), CallPolicy() by default
+        """
+        self._ws_url = ws_url
+        self._governor = governor
+        self._policy = _bind(policy, ws_url)
+        self._connect_timeout = connect_timeout
+        self._connection = None
+        self._msgids = itertools.count(1)
+        self._last_msgid = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+    def _connect(self) -> "_Connection":
+        with self._lock:
+            connection = self._connection
+            if connection is not None and connection.ws.connected:
+                return connection
+        # Connecting may block for connect_timeout, the reader must keep dispatching meanwhile
+        try:
+            ws = websocket.create_connection(
+                self._ws_url, timeout=self._connect_timeout
+            )
+        except (websocket.WebSocketException, OSError) as e:
+            raise TransportError(str(e)) from e
+        ws.settimeout(None)
+        with self._lock:
+            connection = self._connection
+            if connection is None or not connection.ws.connected:
+                connection = _Connection(ws)
+                self._connection = connection
+        if connection.ws is not ws:
+            # Another thread connected first
+            ws.close()
+            return connection
+        threading.Thread(
+            target=self._read_loop, args=(connection,), daemon=True
+        ).start()
+        return connection
+
+    def _read_loop(self, connection: "_Connection"):
+        try:
+            while True:
+                opcode, message = connection.ws.recv_data()
+                if opcode == websocket.ABNF.OPCODE_CLOSE:
+                    break
+                try:
+                    if opcode == websocket.ABNF.OPCODE_TEXT:
+                        self._dispatch(connection, json.loads(message))
+                    elif opcode == websocket.ABNF.OPCODE_BINARY:
+                        self._dispatch_binary(connection, message)
+                except Exception:
+                    # One bad message must not stop the responses behind it
+                    logger.exception("Dropped websocket message")
+        except (websocket.WebSocketException, OSError):
+            pass
+        finally:
+            self._fail_pending(connection)
+
+    def _dispatch(self, connection: "_Connection", message: dict):
+        with self._lock:
+            msgid = message.get("msgid")
+            future = connection.pending.pop(msgid, None)
+            if msgid in connection.binary_msgids:
+                # A binary request answered with JSON, usually an error status
+                connection.binary_msgids.remove(msgid)
+            late = future is None and _issued(msgid, self._last_msgid)
+        if future is not None:
+            if not future.done():
+                future.set_result(message)
+            return
+        if late:
+            # The request timed out, its response is dropped
+            return
+        # Responses without a pending msgid are events pushed by the kernel
+        for listener in list(self._listeners):
+            try:
+                listener(message)
+            except Exception:
+                logger.exception("Websocket listener failed")
+
+    def _dispatch_binary(self, connection: "_Connection", message: bytes):
+        with self._lock:
+            if not connection.binary_msgids:
+                return
+            # Each frame answers the oldest binary request, a timed out one drops its late frame
+            future = connection.pending.pop(connection.binary_msgids.popleft(), None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def _fail_pending(self, connection: "_Connection"):
+        with self._lock:
+            if self._connection is connection:
+                self._connection = None
+            # Requests sent on this socket can only be answered on it
+            pending, connection.pending = connection.pending, {}
+            connection.binary_msgids.clear()
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(TransportError("WebSocket connection closed"))
+
+    def submit(self, data: dict, binary: bool = False) -> Future:
+        """
+        Send a request without waiting for its response
+        :param data: Payload, its msgid is replaced by a unique one
+        :param binary: Whether the kernel answers with a binary frame instead of JSON
+        :return: Future resolved with the response carrying the same msgid, or the raw bytes of the binary frame
+        """
+        return self._submit(data, binary)[2]
+
+    def _submit(self, data: dict, binary: bool) -> Tuple["_Connection", int, Future]:
+        if self._governor is None:
+            return self._send(data, binary)
+        token = self._governor.acquire(data)
+        try:
+            connection, msgid, future = self._send(data, binary)
+        except BaseException:
+            self._governor.release(token, False)
+            raise
+        future.add_done_callback(_released(self._governor, token))
+        return connection, msgid, future
+
+    def _send(self, data: dict, binary: bool) -> Tuple["_Connection", int, Future]:
+        connection = self._connect()
+        future = Future()
+        with self._lock:
+            msgid = self._last_msgid = next(self._msgids)
+            connection.pending[msgid] = future
+        message = json.dumps({**data, "msgid": msgid})
+        try:
+            with self._send_lock:
+                if binary:
+                    with self._lock:
+                        connection.binary_msgids.append(msgid)
+                connection.ws.send(message)
+        except (websocket.WebSocketException, OSError) as e:
+            with self._lock:
+                connection.pending.pop(msgid, None)
+                if msgid in connection.binary_msgids:
+                    connection.binary_msgids.remove(msgid)
+            raise TransportError(str(e)) from e
+        return connection, msgid, future
+
+    def _wait(
+        self, data: dict, timeout: float, binary: bool = False
+    ) -> Union[bytes, dict]:
+        connection, msgid, future = self._submit(data, binary)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            # A late response is dropped, a late binary frame still consumes its place in the order
+            with self._lock:
+                connection.pending.pop(msgid, None)
+            future.cancel()
+            raise KernelTimeout(data.get("fun"), timeout) from None
+
+    def post(self, data: dict) -> dict:
+        return self._policy.call(data, self._wait)
+
+    def post_binary(self, data: dict) -> Union[bytes, dict]:
+        """
+        Send a request answered by a binary frame
+        :param data: Payload
+        :return: Raw bytes of the binary frame, or the JSON response if the kernel answered with one
+        """
+        return self._policy.call(
+            data, lambda data, timeout: self._wait(data, timeout, binary=True)
+        )
+
+    def subscribe(self, listener: Callable[[dict], None]) -> Callable[[], None]:
+        """
+        Receive messages pushed by the kernel that do not answer a pending request
+        :param listener: Called from the reader thread with each message
+        :return: Function removing the listener
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """
+        Circuit breaker of the transport, e.g. breaker.reset() after restarting the kernel
+        """
+        return self._policy.breaker
+
+    def close(self):
+        """
+        Close the socket, pending requests fail with TransportError
+        :return:
+        """
+        with self._lock:
+            connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.ws.close()
+            self._fail_pending(connection)
@@ -0,0 +1,407 @@
+import functools
+import hashlib
+import io
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .screenshot import Screenshot
+from .types import ColorParams, ColorsParams
+
+# Upper bound of peaks considered per template when searching for repeats
+_MAX_PEAKS = 4096
+
+
+def to_gray(pixels: np.ndarray, bgr: bool = False) -> np.ndarray:
+    """
+    Convert an image array to float32 luminance
+    :param pixels: Array of shape (height, width) or (height, width, channels)
+    :param bgr: Whether the channels are in BGR order
+    :return:
+    """
+    if pixels.ndim == 2:
+        return pixels.astype(np.float32)
+    weights = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    if bgr:
+        weights = weights[::-1]
+    return pixels[:, :, :3].astype(np.float32) @ weights
+
+
+def frame_gray(frame: Screenshot) -> np.ndarray:
+    """
+    Luminance of a screenshot
+    :param frame: Screenshot
+    :return:
+    """
+    return to_gray(frame.array)
+
+
+def decode_template(image: bytes) -> np.ndarray:
+    """
+    Decode template image bytes (PNG, JPG, BMP...) to luminance
+    :param image: Image binary data
+    :return:
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image)) as template:
+        return np.asarray(template.convert("L"), dtype=np.float32)
+
+
+def area_bounds(area: Optional[list], width: int, height: int) -> tuple:
+    """
+    Bounding box of a scan area clipped to the frame
+    :param area: [[x,y],[x,y],[x,y],[x,y]] coordinates, None or all zero for the full frame
+    :param width: Frame width
+    :param height: Frame height
+    :return: (x1, y1, x2, y2) with exclusive x2 and y2
+    """
+    if not area or not any(any(point) for point in area):
+        return 0, 0, width, height
+    xs = [int(point[0]) for point in area]
+    ys = [int(point[1]) for point in area]
+    x1, y1 = max(0, min(xs)), max(0, min(ys))
+    x2, y2 = min(width, max(xs) + 1), min(height, max(ys) + 1)
+    return x1, y1, max(x1, x2), max(y1, y2)
+
+
+def fingerprint(
+    frame: Screenshot, area: Optional[list] = None, size: int = 16
+) -> bytes:
+    """
+    Cheap perceptual fingerprint of a frame region, block means quantised so that encoding noise does not change it
+    :param frame: Screenshot
+    :param area: Scan area [[x,y],[x,y],[x,y],[x,y]], None for the full frame
+    :param size: Number of blocks per side
+    :return:
+    """
+    gray = frame_gray(frame)
+    x1, y1, x2, y2 = area_bounds(area, gray.shape[1], gray.shape[0])
+    region = gray[y1:y2, x1:x2]
+    if region.size == 0:
+        return b""
+    rows = np.array_split(np.arange(region.shape[0]), min(size, region.shape[0]))
+    cols = np.array_split(np.arange(region.shape[1]), min(size, region.shape[1]))
+    row_starts = [block[0] for block in rows]
+    col_starts = [block[0] for block in cols]
+    sums = np.add.reduceat(np.add.reduceat(region, row_starts, 0), col_starts, 1)
+    counts = np.outer([len(block) for block in rows], [len(block) for block in cols])
+    means = sums / counts
+    return (means // 16).astype(np.uint8).tobytes()
+
+
+def region_digest(frame: Screenshot, area: Optional[list] = None) -> bytes:
+    """
+    Exact digest of the pixels of a frame region, any changed pixel changes it
+    :param frame: Screenshot
+    :param area: Scan area [[x,y],[x,y],[x,y],[x,y]], None for the full frame
+    :return:
+    """
+    pixels = frame.array
+    x1, y1, x2, y2 = area_bounds(area, pixels.shape[1], pixels.shape[0])
+    region = np.ascontiguousarray(pixels[y1:y2, x1:x2])
+    digest = hashlib.blake2b(str(region.shape).encode(), digest_size=16)
+    digest.update(region.tobytes())
+    return digest.digest()
+
+
+def _fast_length(n: int) -> int:
+    """
+    Smallest 5-smooth number not below n, FFTs of such lengths are the fastest
+    """
+    best = 1 << (n - 1).bit_length()
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            length = power35
+            while length < n:
+                length *= 2
+            best = min(best, length)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+def _box_sums(integral: np.ndarray, h: int, w: int) -> np.ndarray:
+    return integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+
+
+class _Searcher:
+    def __init__(self, image: np.ndarray, max_h: int, max_w: int):
+        """
+        Normalised cross-correlation of templates against one image, the image FFT and integrals are computed once
+        :param image: Luminance of the searched region
+        :param max_h: Largest template height
+        :param max_w: Largest template width
+        """
+        self.image = image
+        height, width = image.shape
+        self.shape = (
+            _fast_length(height + max_h - 1),
+            _fast_length(width + max_w - 1),
+        )
+        self.spectrum = np.fft.rfft2(image, self.shape)
+        image64 = image.astype(np.float64)
+        self.integral = np.pad(image64.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        self.integral2 = np.pad((image64**2).cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+
+    def scores(self, template: np.ndarray) -> np.ndarray:
+        """
+        Zero-mean normalised correlation for every template position
+        :param template: Template luminance
+        :return: Array of shape (height - h + 1, width - w + 1) in [-1, 1]
+        """
+        height, width = self.image.shape
+        h, w = template.shape
+        zero_mean = template - template.mean()
+        template_norm = np.sqrt(np.square(zero_mean, dtype=np.float64).sum())
+        kernel = np.fft.rfft2(zero_mean[::-1, ::-1], self.shape)
+        correlation = np.fft.irfft2(self.spectrum * kernel, self.shape)
+        correlation = correlation[h - 1 : height, w - 1 : width]
+        sums = _box_sums(self.integral, h, w)
+        variance = _box_sums(self.integral2, h, w) - sums**2 / (h * w)
+        denominator = np.sqrt(np.maximum(variance, 0)) * template_norm
+        scores = np.zeros_like(correlation)
+        # Flat regions or templates have no defined correlation
+        np.divide(correlation, denominator, out=scores, where=denominator > 1e-6)
+        return scores
+
+
+def _peaks(scores: np.ndarray, accuracy: float, h: int, w: int, repeat: bool) -> list:
+    """
+    Best positions above the threshold, overlapping positions are suppressed
+    :return: [(score, y, x)] sorted by score
+    """
+    ys, xs = np.nonzero(scores >= accuracy)
+    if len(ys) == 0:
+        return []
+    values = scores[ys, xs]
+    if not repeat:
+        best = int(values.argmax())
+        return [(float(values[best]), int(ys[best]), int(xs[best]))]
+    order = np.argsort(values)[::-1][:_MAX_PEAKS]
+    taken = []
+    for index in order:
+        y, x = int(ys[index]), int(xs[index])
+        if any(abs(y - ty) < h and abs(x - tx) < w for _, ty, tx in taken):
+            continue
+        taken.append((float(values[index]), y, x))
+    return taken
+
+
+class Match(NamedTuple):
+    index: int
+    similarity: float
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def centre(self) -> List[int]:
+        return [self.x + self.width // 2, self.y + self.height // 2]
+
+
+def match_templates(
+    frame: Screenshot,
+    templates: List[np.ndarray],
+    accuracy: float = 0.8,
+    area: Optional[list] = None,
+    all: bool = False,
+    repeat: bool = False,
+) -> list:
+    """
+    Find templates in a frame with normalised cross-correlation
+    :param frame: Screenshot to search
+    :param templates: Template luminance arrays
+    :param accuracy: Similarity threshold
+    :param area: Scan area [[x,y],[x,y],[x,y],[x,y]], None for the full frame
+    :param all: Whether to search every template, otherwise stop at the first template found
+    :param repeat: Whether to report every occurrence of a template instead of the best one
+    :return: Matches, best first per template
+    """
+    gray = frame_gray(frame)
+    x1, y1, x2, y2 = area_bounds(area, gray.shape[1], gray.shape[0])
+    region = gray[y1:y2, x1:x2]
+    fitting = [
+        (index, template)
+        for index, template in enumerate(templates)
+        if template.shape[0] <= region.shape[0] and template.shape[1] <= region.shape[1]
+    ]
+    if not fitting:
+        return []
+    searcher = _Searcher(
+        region,
+        max(template.shape[0] for _, template in fitting),
+        max(template.shape[1] for _, template in fitting),
+    )
+    results = []
+    for index, template in fitting:
+        h, w = template.shape
+        for score, y, x in _peaks(searcher.scores(template), accuracy, h, w, repeat):
+            results.append(Match(index, round(score, 4), x1 + x, y1 + y, w, h))
+        if results and not all:
+            break
+    return results
+
+
+def frame_rgb(frame: Screenshot) -> np.ndarray:
+    """
+    RGB pixels of a screenshot as int16 so that channel differences do not wrap
+    :param frame: Screenshot
+    :return: Array of shape (height, width, 3)
+    """
+    return frame.array[:, :, :3].astype(np.int16)
+
+
+class _Color(NamedTuple):
+    rgb: Tuple[int, int, int]
+    deviation: Tuple[int, int, int]
+    negate: bool
+
+
+class ColorPattern(NamedTuple):
+    first: Tuple[_Color, ...]
+    offsets: Tuple[Tuple[int, int, Tuple[_Color, ...]], ...]
+
+
+def _parse_color(text: str) -> _Color:
+    """
+    Parse a DaMo color "RRGGBB" or "RRGGBB-DRDGDB", a leading "-" matches any other color
+    """
+    text = text.strip()
+    negate = text.startswith("-")
+    if negate:
+        text = text[1:]
+    value, _, deviation = text.partition("-")
+    deviation = deviation or "000000"
+    return _Color(
+        tuple(int(value[i : i + 2], 16) for i in (0, 2, 4)),
+        tuple(int(deviation[i : i + 2], 16) for i in (0, 2, 4)),
+        negate,
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_colors(first_color: str, offset_color: str) -> ColorPattern:
+    """
+    Parse DaMo multi-point color strings once, e.g. "FFFFFF-101010|000000" and "1|3|AABBCC,-5|-3|123456-000000"
+    :param first_color: First point colors, alternatives separated by "|"
+    :param offset_color: Offset points "dx|dy|color" separated by ",", color alternatives separated by "|"
+    :return:
+    """
+    first = tuple(_parse_color(color) for color in first_color.split("|"))
+    offsets = []
+    for point in filter(None, (offset_color or "").split(",")):
+        dx, dy, *colors = point.split("|")
+        offsets.append(
+            (int(dx), int(dy), tuple(_parse_color(color) for color in colors))
+        )
+    return ColorPattern(first, tuple(offsets))
+
+
+def _color_mask(pixels: np.ndarray, colors: tuple, tolerance: int) -> np.ndarray:
+    """
+    Pixels matching any of the colors
+    """
+    mask = np.zeros(pixels.shape[:2], dtype=bool)
+    for color in colors:
+        limit = np.add(color.deviation, tolerance, dtype=np.int16)
+        matches = (np.abs(pixels - np.array(color.rgb, dtype=np.int16)) <= limit).all(2)
+        mask |= ~matches if color.negate else matches
+    return mask
+
+
+def find_color(pixels: np.ndarray, color: ColorParams) -> Optional[List[int]]:
+    """
+    DaMo style multi-point color search evaluated on the whole region at once
+    :param pixels: RGB frame from frame_rgb()
+    :param color: Region, colors, similarity and dir, dir 0 scans left to right and top to bottom,
+        1 left to right and bottom to top, 2 right to left and top to bottom, 3 right to left and bottom to top
+    :return: [x, y] of the first point or None
+    """
+    height, width = pixels.shape[:2]
+    pattern = compile_colors(color["first_color"], color.get("offset_color") or "")
+    x1, y1, x2, y2 = area_bounds(
+        [
+            [color.get("start_x") or 0, color.get("start_y") or 0],
+            [color.get("end_x") or 0, color.get("end_y") or 0],
+        ],
+        width,
+        height,
+    )
+    if x1 >= x2 or y1 >= y2:
+        return None
+    tolerance = int(round((1 - color.get("similarity", 1.0)) * 255))
+    mask = _color_mask(pixels[y1:y2, x1:x2], pattern.first, tolerance)
+    for dx, dy, colors in pattern.offsets:
+        if not mask.any():
+            return None
+        # Offset points may fall outside the region but must stay inside the frame
+        top, bottom = max(y1, -dy), min(y2, height - dy)
+        left, right = max(x1, -dx), min(x2, width - dx)
+        shifted = np.zeros_like(mask)
+        if top < bottom and left < right:
+            shifted[top - y1 : bottom - y1, left - x1 : right - x1] = _color_mask(
+                pixels[top + dy : bottom + dy, left + dx : right + dx],
+                colors,
+                tolerance,
+            )
+        mask &= shifted
+    direction = color.get("dir", 0)
+    step_y = -1 if direction in (1, 3) else 1
+    step_x = -1 if direction in (2, 3) else 1
+    ordered = mask[::step_y, ::step_x]
+    first = int(ordered.argmax())
+    if not ordered.flat[first]:
+        return None
+    y, x = divmod(first, ordered.shape[1])
+    if step_y < 0:
+        y = ordered.shape[0] - 1 - y
+    if step_x < 0:
+        x = ordered.shape[1] - 1 - x
+    return [x1 + x, y1 + y]
+
+
+def find_colors(pixels: np.ndarray, colors: ColorsParams) -> list:
+    """
+    Search color groups in order and stop at the first group found
+    :param pixels: RGB frame from frame_rgb()
+    :param colors: Color groups
+    :return: [{"index", "result": [x, y]}] or an empty list
+    """
+    for index, color in enumerate(colors["colors"]):
+        point = find_color(pixels, color)
+        if point is not None:
+            return [{"index": index, "result": point}]
+    return []
+
+
+def image_result(fun: str, matches: List[Match]):
+    """
+    Matches in the result fields of the kernel, the point found like find_multi_color
+    :param fun: "find_image" or "find_image_ex"
+    :param matches: Matches from match_templates()
+    :return: [x, y] of the best match for find_image, [{"index", "result": [x, y]}] per match for find_image_ex
+    """
+    if fun == "find_image":
+        return matches[0].centre if matches else []
+    return [{"index": match.index, "result": match.centre} for match in matches]
+
+
+def response(fun: str, device_id: str, result) -> dict:
+    """
+    Wrap a local result in the kernel response envelope
+    :param fun: Kernel fun the result stands in for
+    :param device_id: Device ID
+    :param result: Result data
+    :return:
+    """
+    return {
+        "status": 0,
+        "message": "success",
+        "fun": fun,
+        "msgid": 0,
+        "data": {"deviceid": device_id, "code": 0 if result else 1, "result": result},
+    }
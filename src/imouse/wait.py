@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+
+def intervals(
+    timeout: float,
+    interval: float = 0.1,
+    max_interval: float = 1.0,
+    backoff: float = 1.5,
+) -> Iterator[float]:
+    """
+    Delays between polls growing by backoff up to max_interval, clipped to the deadline
+    :param timeout: Seconds until the deadline
+    :param interval: First delay in seconds
+    :param max_interval: Largest delay in seconds
+    :param backoff: Delay growth factor
+    :return: Iterator ending once the deadline has passed
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        yield min(interval, remaining)
+        interval = min(interval * backoff, max_interval)
+
+
+def poll(
+    check: Callable[[], Any],
+    timeout: float = 10.0,
+    interval: float = 0.1,
+    max_interval: float = 1.0,
+    backoff: float = 1.5,
+) -> Optional[Any]:
+    """
+    Call check until it returns a truthy value or the timeout expires
+    :param check: Condition, its truthy result is returned
+    :param timeout: Timeout in seconds
+    :param interval: First delay between checks in seconds
+    :param max_interval: Largest delay between checks in seconds
+    :param backoff: Delay growth factor
+    :return: Result of check or None on timeout
+    """
+    result = check()
+    if result:
+        return result
+    for delay in intervals(timeout, interval, max_interval, backoff):
+        time.sleep(delay)
+        result = check()
+        if result:
+            return result
+    return None
+
+
+async def apoll(
+    check: Callable[[], Awaitable[Any]],
+    timeout: float = 10.0,
+    interval: float = 0.1,
+    max_interval: float = 1.0,
+    backoff: float = 1.5,
+) -> Optional[Any]:
+    """
+    Await check until it returns a truthy value or the timeout expires
+    :param check: Condition coroutine function, its truthy result is returned
+    :param timeout: Timeout in seconds
+    :param interval: First delay between checks in seconds
+    :param max_interval: Largest delay between checks in seconds
+    :param backoff: Delay growth factor
+    :return: Result of check or None on timeout
+    """
+    result = await check()
+    if result:
+        return result
+    for delay in intervals(timeout, interval, max_interval, backoff):
+        await asyncio.sleep(delay)
+        result = await check()
+        if result:
+            return result
+    return None
+
+
+def found(ret: dict) -> Optional[dict]:
+    """
+    Response of a search when it found something
+    :param ret: match_image, match_images, pick_color or pick_colors response
+    :return: The response or None
+    """
+    if ret.get("status") == 0 and (ret.get("data") or {}).get("result"):
+        return ret
+    return None
+
+
+def contains_text(ret: dict, text: str) -> Optional[dict]:
+    """
+    Response of an OCR when any recognised string contains the text
+    :param ret: ocr response
+    :param text: Text to look for
+    :return: The response or None
+    """
+    if ret.get("status") != 0:
+        return None
+    data = ret.get("data") or {}
+    if "result" in data:
+        pending = [data["result"]]
+    else:
+        pending = [value for key, value in data.items() if key != "deviceid"]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, str) and text in value:
+            return ret
+        if isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, list):
+            pending.extend(value)
+    return None
@@ -1,28 +1,22 @@
-import base64
-import gzip
-import io
-import imouse
-import time
 import os
+import time
+
+import imouse
 
 
-# Convert base64 string to image
-def base64_to_bmp(data: dict):
-    image_base64 = data['data']['img']
-    is_gzip = data['data']['gzip']
-    imgdata = base64.b64decode(image_base64)
-    if is_gzip:
-        with gzip.GzipFile(fileobj=io.BytesIO(imgdata)) as f:
-            imgdata = f.read()
-    
+# Save screenshot to the screenshots directory
+def save_screenshot(screenshot):
     # Create screenshots directory if it doesn't exist
     screenshots_dir = "screenshots"
     if not os.path.exists(screenshots_dir):
         os.makedirs(screenshots_dir)
-    
-    img_path = os.path.join(screenshots_dir, "{}.bmp".format(time.strftime("%Y-%m-%d-%H%M%S", time.localtime())))
-    with open(img_path, 'wb') as f:
-        f.write(imgdata)
+
+    img_path = os.path.join(
+        screenshots_dir,
+        "{}.bmp".format(time.strftime("%Y-%m-%d-%H%M%S", time.localtime())),
+    )
+    # Base64 and gzip decoding happen here, on first access to the image bytes
+    screenshot.save(img_path)
     print("Image saved successfully: " + img_path)
 
 
@@ -37,9 +31,9 @@ first_device_id, first_device_info = devices[0]
 device = api.device(first_device_id)
 
 # Call screenshot interface
-image_data = device.get_device_screenshot(gzip=False)
-if image_data['status'] > 0:
-    print('Screenshot failed, reason: {}'.format(image_data['message']))
+image_data = device.utility.screenshot(zip=False, jpg=False)
+if image_data["status"] > 0:
+    print("Screenshot failed, reason: {}".format(image_data["message"]))
 else:
-    print('Screenshot successful')
-    base64_to_bmp(image_data)
+    print("Screenshot successful")
+    save_screenshot(image_data)
@@ -0,0 +1,43 @@
+import pytest
+
+from imouse.device.action import ActionChain
+
+
+class Keyboard:
+    def __init__(self):
+        self.calls = []
+
+    def sequence(self, steps, delay: float = 0.0, stop_on_error: bool = True):
+        self.calls.append((steps, stop_on_error))
+        return [{"status": 0}] * len(steps)
+
+
+class Device:
+    def __init__(self):
+        self.keyboard = Keyboard()
+
+
+def test_chain_records_the_keys_of_each_action():
+    device = Device()
+    chain = (
+        ActionChain(device)
+        .move_forward()
+        .activate(delay=0.5)
+        .press("CTRL+TAB", 0.2)
+        .home()
+    )
+    assert len(chain) == 4
+    # Nothing is sent before run()
+    assert device.keyboard.calls == []
+    assert chain.run(stop_on_error=False) == [{"status": 0}] * 4
+    assert device.keyboard.calls == [
+        (
+            [("TAB", 0.0), (" ", 0.5), ("CTRL+TAB", 0.2), ("FN+H", 0.0)],
+            False,
+        )
+    ]
+
+
+def test_chain_rejects_unknown_actions():
+    with pytest.raises(AttributeError):
+        ActionChain(Device()).fly()
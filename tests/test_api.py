@@ -0,0 +1,57 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import imouse
+
+
+class Kernel(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    peers = set()
+
+    def do_POST(self):
+        self.peers.add(self.client_address)
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"status": 0, "data": {}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def kernel():
+    Kernel.peers = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Kernel)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_devices_and_console_share_one_keep_alive_connection(kernel):
+    with imouse.api("127.0.0.1", kernel.server_address[1]) as api:
+        for _ in range(3):
+            api.device("a").mouse.click(1, 2)
+            api.console().device.get_all()
+        assert api.device("b")._transport is api.console()._transport
+    assert len(Kernel.peers) == 1
+
+
+def test_pool_settings_reach_the_adapter_and_close_releases_it(kernel):
+    api = imouse.api(
+        "127.0.0.1", kernel.server_address[1], pool_maxsize=32, pool_block=True
+    )
+    adapter = api._transport._session.get_adapter("http://127.0.0.1")
+    assert (adapter._pool_maxsize, adapter._pool_block) == (32, True)
+    api.device("a").mouse.click(1, 2)
+    assert len(adapter.poolmanager.pools) == 1
+    api.close()
+    assert len(adapter.poolmanager.pools) == 0
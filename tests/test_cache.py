@@ -0,0 +1,64 @@
+import time
+
+from imouse.cache import FrameCache, OcrCache
+from imouse.screenshot import Screenshot
+
+FRAME = Screenshot(raw=b"frame")
+
+
+def test_frames_are_only_cached_for_enabled_devices():
+    cache = FrameCache()
+    cache.put("a", FRAME, cache.generation("a"))
+    assert cache.get("a") is None
+    cache.enable("a")
+    cache.put("a", FRAME, cache.generation("a"))
+    assert cache.get("a") is FRAME
+    assert cache.get("a", original=True) is None
+    cache.disable("a")
+    assert cache.get("a") is None
+
+
+def test_frames_expire():
+    cache = FrameCache()
+    cache.enable("a", ttl=0.01)
+    cache.put("a", FRAME, cache.generation("a"))
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_input_drops_frames_and_captures_in_flight():
+    cache = FrameCache()
+    cache.enable("a")
+    generation = cache.generation("a")
+    cache.put("a", FRAME, generation)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    # A capture started before the input must not be stored
+    cache.put("a", FRAME, generation)
+    assert cache.get("a") is None
+
+
+def test_failed_frames_are_not_cached():
+    cache = FrameCache()
+    cache.enable("a")
+    cache.put("a", Screenshot({"status": 1}), cache.generation("a"))
+    assert cache.get("a") is None
+
+
+def test_ocr_cache_counts_and_evicts():
+    cache = OcrCache(max_entries=2)
+    assert cache.get("x") is None
+    cache.put("x", {"text": "1"})
+    cache.put("y", {"text": "2"})
+    assert cache.get("x") == {"text": "1"}
+    cache.put("z", {"text": "3"})
+    # y was the least recently used
+    assert cache.get("y") is None
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+
+
+def test_ocr_cache_returns_copies():
+    cache = OcrCache()
+    cache.put("x", {"data": {"text": "1"}})
+    cache.get("x")["data"]["text"] = "changed"
+    assert cache.get("x") == {"data": {"text": "1"}}
@@ -0,0 +1,61 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from imouse import vision
+
+
+def color(first_color, offset_color="", similarity=1.0, dir=0, **area):
+    return {
+        "start_x": area.get("start_x", 0),
+        "start_y": area.get("start_y", 0),
+        "end_x": area.get("end_x", 0),
+        "end_y": area.get("end_y", 0),
+        "first_color": first_color,
+        "offset_color": offset_color,
+        "similarity": similarity,
+        "dir": dir,
+    }
+
+
+@pytest.fixture
+def pixels():
+    pixels = np.zeros((20, 30, 3), dtype=np.int16)
+    pixels[5, 10] = (255, 0, 0)
+    pixels[7, 13] = (0, 255, 0)
+    pixels[15, 25] = (255, 0, 0)
+    return pixels
+
+
+def test_compile_parses_alternatives_and_deviation():
+    pattern = vision.compile_colors("FF0000-101010|-000000", "3|2|00FF00")
+    assert pattern.first[0].rgb == (255, 0, 0)
+    assert pattern.first[0].deviation == (16, 16, 16)
+    assert pattern.first[1].negate
+    assert pattern.offsets == ((3, 2, (vision._parse_color("00FF00"),)),)
+
+
+def test_first_point_in_scan_order(pixels):
+    assert vision.find_color(pixels, color("FF0000")) == [10, 5]
+    assert vision.find_color(pixels, color("FF0000", dir=3)) == [25, 15]
+
+
+def test_offsets_must_match(pixels):
+    assert vision.find_color(pixels, color("FF0000", "3|2|00FF00")) == [10, 5]
+    assert vision.find_color(pixels, color("FF0000", "3|2|0000FF")) is None
+
+
+def test_similarity_widens_the_match(pixels):
+    pixels[5, 10] = (250, 5, 0)
+    assert vision.find_color(pixels, color("FF0000")) == [25, 15]
+    assert vision.find_color(pixels, color("FF0000", similarity=0.97)) == [10, 5]
+
+
+def test_area_limits_the_search(pixels):
+    area = {"start_x": 20, "start_y": 10, "end_x": 29, "end_y": 19}
+    assert vision.find_color(pixels, color("FF0000", **area)) == [25, 15]
+
+
+def test_groups_stop_at_first_found(pixels):
+    colors = {"colors": [color("0000FF"), color("00FF00"), color("FF0000")]}
+    assert vision.find_colors(pixels, colors) == [{"index": 1, "result": [13, 7]}]
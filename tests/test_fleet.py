@@ -0,0 +1,89 @@
+import pytest
+
+from imouse.fleet import Fleet
+
+
+class FakeDevice:
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+
+
+class FakeApi:
+    def device(self, device_id: str) -> FakeDevice:
+        return FakeDevice(device_id)
+
+
+def test_device_list_keyed_by_id():
+    fleet = Fleet(FakeApi(), {"status": 0, "data": {"a": {}, "b": {}}})
+    assert fleet.device_ids == ["a", "b"]
+    fleet.close()
+
+
+def test_device_list_of_entries():
+    response = {"status": 0, "data": [{"deviceid": "a"}, {"deviceid": "b"}]}
+    fleet = Fleet(FakeApi(), response)
+    assert fleet.device_ids == ["a", "b"]
+    fleet.close()
+
+
+def test_run_calls_every_device():
+    fleet = Fleet(FakeApi(), ["a", "b", "c"])
+    assert fleet.run(lambda device: device.device_id).results() == {
+        "a": "a",
+        "b": "b",
+        "c": "c",
+    }
+    fleet.close()
+
+
+class Utility:
+    def __init__(self, device_id: str, calls: list):
+        self.device_id = device_id
+        self.calls = calls
+
+    def open_url(self, url: str, devices: list = []):
+        self.calls.append((self.device_id, devices))
+        return {"status": 0}
+
+    def get_clipboard(self, devices: list = []):
+        self.calls.append((self.device_id, devices))
+        return self.device_id
+
+
+class BroadcastApi:
+    def __init__(self):
+        self.calls = []
+
+    def device(self, device_id: str):
+        device = FakeDevice(device_id)
+        device.utility = Utility(device_id, self.calls)
+        return device
+
+
+def test_broadcast_coalesces_write_only_calls():
+    api = BroadcastApi()
+    fleet = Fleet(api, ["a", "b", "c"])
+    results = fleet.broadcast.utility.open_url("https://example.com").results()
+    assert api.calls == [("a", ["b", "c"])]
+    assert set(results) == {"a", "b", "c"}
+    fleet.close()
+
+
+def test_broadcast_rejects_devices_of_the_caller():
+    api = BroadcastApi()
+    fleet = Fleet(api, ["a", "b"])
+    with pytest.raises(TypeError, match="devices cannot be passed"):
+        fleet.broadcast.utility.open_url("https://example.com", devices=["c"])
+    with pytest.raises(TypeError, match="devices cannot be passed"):
+        fleet.broadcast.utility.open_url("https://example.com", ["c"])
+    assert api.calls == []
+    fleet.close()
+
+
+def test_broadcast_reads_run_per_device():
+    api = BroadcastApi()
+    fleet = Fleet(api, ["a", "b", "c"])
+    results = fleet.broadcast.utility.get_clipboard().results()
+    assert results == {"a": "a", "b": "b", "c": "c"}
+    assert sorted(api.calls) == [("a", []), ("b", []), ("c", [])]
+    fleet.close()
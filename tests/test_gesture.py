@@ -0,0 +1,58 @@
+import pytest
+
+from imouse.gesture import Gesture, bezier, ease_in_out, linear, superseded
+
+
+def test_drag_schedules_down_moves_and_up():
+    gesture = Gesture.drag((0, 0), (100, 0), duration=0.5, hold=0.2, rate=10)
+    events = gesture.events
+    assert events[0] == (0.0, "move", {"x": 0, "y": 0})
+    assert events[1] == (0.0, "down", {"button": "left"})
+    moves = events[2:-1]
+    assert [kind for _, kind, _ in moves] == ["move"] * 5
+    # The move starts after the hold and ends on time at the target
+    assert moves[0][0] == pytest.approx(0.3)
+    assert moves[-1][0] == pytest.approx(0.7)
+    assert moves[-1][2] == {"x": 100, "y": 0}
+    assert events[-1] == (pytest.approx(0.7), "up", {"button": "left"})
+    assert gesture.duration == pytest.approx(0.7)
+
+
+def test_offsets_follow_the_easing():
+    eased = Gesture(rate=4).press(0, 0).move_to(100, 0, duration=1).events
+    straight = Gesture(rate=4).press(0, 0).move_to(100, 0, 1, linear).events
+    assert [params["x"] for _, _, params in straight[2:]] == [25, 50, 75, 100]
+    assert [params["x"] for _, _, params in eased[2:]] == [16, 50, 84, 100]
+    assert ease_in_out(0.5) == 0.5
+
+
+def test_repeated_points_are_not_sent_twice():
+    events = Gesture(rate=100).press(5, 5).move_to(6, 5, duration=1).events
+    assert [event for event in events if event[1] == "move"] == [
+        (0.0, "move", {"x": 5, "y": 5}),
+        (pytest.approx(0.5), "move", {"x": 6, "y": 5}),
+    ]
+
+
+def test_path_follows_the_bezier_curve():
+    assert bezier([(0, 0), (50, 100), (100, 0)], 0.5) == (50.0, 50.0)
+    events = Gesture.path([(0, 0), (50, 100), (100, 0)], duration=1, rate=2).events
+    assert [params for _, kind, params in events if kind == "move"] == [
+        {"x": 0, "y": 0},
+        {"x": 50, "y": 50},
+        {"x": 100, "y": 0},
+    ]
+
+
+def test_curve_needs_a_start():
+    with pytest.raises(ValueError):
+        Gesture().curve_to([(1, 1)], 2, 2, duration=1)
+
+
+def test_only_due_moves_are_superseded():
+    events = Gesture(rate=10).press(0, 0).move_to(100, 0, 1, linear).events
+    # The first move is followed by the press, which is never dropped
+    assert not superseded(events, 0, 10)
+    assert superseded(events, 2, 0.25)
+    assert not superseded(events, 2, 0.15)
+    assert not superseded(events, len(events) - 1, 10)
@@ -0,0 +1,84 @@
+import pytest
+
+from imouse import governor
+from imouse.exceptions import ResponseError, TransportError
+from imouse.governor import Governor, classify, latency_key, succeeded
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(governor.time, "monotonic", lambda: now[0])
+    return now
+
+
+def shortcut(id: int) -> dict:
+    return {"fun": "shortcut", "data": {"deviceid": "a", "id": id}}
+
+
+def test_classes_and_latency_keys():
+    assert classify({"fun": "ocr_ex"}) == "heavy"
+    assert classify({"fun": "click"}) == "input"
+    assert classify(shortcut(10)) == "shortcut"
+    assert classify({"fun": "get_device_list"}) == "default"
+    assert latency_key(shortcut(10)) == "shortcut/10"
+    screenshot = {"fun": "get_device_screenshot", "data": {"original": True}}
+    assert classify(screenshot) == "heavy"
+
+
+def test_only_failures_of_the_kernel_count():
+    assert succeeded(None)
+    assert succeeded(ResponseError("ocr", 404, "not found"))
+    assert not succeeded(ResponseError("ocr", 502, "bad gateway"))
+    assert not succeeded(TransportError("reset"))
+
+
+def test_limit_grows_additively_when_reached(clock):
+    limits = Governor(budgets={"default": (2, 1, 4)})
+    tokens = [limits.acquire({"fun": "x"}) for _ in range(2)]
+    clock[0] += 0.1
+    for token in tokens:
+        limits.release(token)
+    # Each release at the limit adds 1 / limit
+    assert limits.stats()["limits"]["default"]["limit"] == pytest.approx(2 + 1 / 2)
+
+
+def test_failure_cuts_the_limit_once_per_round_trip(clock):
+    limits = Governor(budgets={"default": (8, 1, 32)})
+    tokens = [limits.acquire({"fun": "x"}) for _ in range(3)]
+    clock[0] += 0.1
+    for token in tokens:
+        limits.release(token, ok=False)
+    # Requests sent before the first cut do not cut again
+    assert limits.stats()["limits"]["default"]["limit"] == pytest.approx(8 * 0.7)
+    clock[0] += 0.1
+    limits.release(limits.acquire({"fun": "x"}), ok=False)
+    assert limits.stats()["limits"]["default"]["limit"] == pytest.approx(8 * 0.49)
+
+
+def test_latency_above_tolerance_is_overload(clock):
+    limits = Governor(budgets={"default": (4, 1, 32)}, warmup=2, smoothing=1, drift=0)
+    for _ in range(3):
+        token = limits.acquire({"fun": "x"})
+        clock[0] += 0.1
+        limits.release(token)
+    assert limits.stats()["limits"]["default"]["limit"] == 4
+    token = limits.acquire({"fun": "x"})
+    clock[0] += 1.0
+    limits.release(token)
+    assert limits.stats()["limits"]["default"]["limit"] == pytest.approx(4 * 0.7)
+    latency = limits.stats()["latencies"]["x"]
+    assert latency["baseline"] == pytest.approx(0.1)
+    assert latency["count"] == 4
+
+
+def test_shortcuts_are_measured_per_id(clock):
+    limits = Governor()
+    for id, seconds in ((10, 0.5), (24, 3.0)):
+        token = limits.acquire(shortcut(id))
+        clock[0] += seconds
+        limits.release(token)
+    latencies = limits.stats()["latencies"]
+    assert latencies["shortcut/10"]["average"] == pytest.approx(0.5)
+    assert latencies["shortcut/24"]["average"] == pytest.approx(3.0)
+    assert limits.stats()["limits"]["shortcut"]["in_flight"] == 0
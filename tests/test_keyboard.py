@@ -0,0 +1,176 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from imouse.cache import FrameCache, OcrCache
+from imouse.device import Device
+from imouse.device.keyboard import _failed, _steps, _typeable
+from imouse.scheduler import CommandScheduler
+from imouse.screenshot import Screenshot
+
+
+class RecordingTransport:
+    def __init__(self):
+        self.sent = []
+        self.threads = []
+
+    def post(self, data: dict) -> dict:
+        self.sent.append(data)
+        self.threads.append(threading.current_thread().name)
+        return {"status": 0}
+
+
+class FakeApi:
+    def __init__(self):
+        self._transport = RecordingTransport()
+        self._frame_cache = FrameCache()
+        self._templates = None
+        self._ocr_cache = OcrCache()
+        self._scheduler = CommandScheduler(self._transport)
+
+
+def test_typed_text_goes_through_each_device():
+    api = FakeApi()
+    api._scheduler.enable("b")
+    api._frame_cache.enable("b", ttl=60)
+    api._frame_cache.put(
+        "b", Screenshot({"status": 0}), api._frame_cache.generation("b")
+    )
+    try:
+        device = Device(api, "a")
+        results = device.keyboard.enter_text("hello", devices=["b"], chunk=3)
+    finally:
+        api._scheduler.close()
+    assert results == [{"status": 0}] * 4
+    sent = [
+        (data["data"]["deviceid"], data["data"]["key"]) for data in api._transport.sent
+    ]
+    # Each device types its chunks in order
+    assert [key for device_id, key in sent if device_id == "a"] == ["hel", "lo"]
+    assert [key for device_id, key in sent if device_id == "b"] == ["hel", "lo"]
+    # b's commands went through its scheduler queue and dropped its cached frame
+    threads = dict(zip(sent, api._transport.threads))
+    assert threads[("b", "hel")] == threads[("b", "lo")] == "imouse-scheduler-b"
+    assert threads[("a", "hel")] != "imouse-scheduler-b"
+    assert api._frame_cache.get("b") is None
+
+
+class BarrierTransport(RecordingTransport):
+    def __init__(self, parties: int):
+        super().__init__()
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def post(self, data: dict) -> dict:
+        if data["fun"] == "send_key":
+            # Only returns once every device is pasting at the same time
+            self.barrier.wait()
+        return super().post(data)
+
+
+def test_pasted_text_reaches_the_devices_side_by_side():
+    api = FakeApi()
+    api._transport = BarrierTransport(3)
+    device = Device(api, "a")
+    results = device.keyboard.enter_text("你好", devices=["b", "c"])
+    assert results == [{"status": 0}] * 4
+    assert api._transport.sent[0]["data"]["devlist"] == ["b", "c"]
+    assert {data["data"]["deviceid"] for data in api._transport.sent[1:]} == {
+        "a",
+        "b",
+        "c",
+    }
+
+
+class StatusTransport(RecordingTransport):
+    def __init__(self, statuses: dict = None):
+        super().__init__()
+        self.statuses = statuses or {}
+        self.log = []
+
+    def post(self, data: dict) -> dict:
+        super().post(data)
+        keys = data["data"]["fn_key"]
+        self.log.append(("post", keys))
+        return {"status": self.statuses.get(keys, 0)}
+
+
+class PipelinedTransport(StatusTransport):
+    def submit(self, data: dict) -> Future:
+        future = Future()
+        keys = data["data"]["fn_key"]
+        self.sent.append(data)
+        self.log.append(("submit", keys))
+        future.set_result({"status": self.statuses.get(keys, 0)})
+        return future
+
+
+def keyboard(transport):
+    api = FakeApi()
+    api._transport = transport
+    return Device(api, "a").keyboard
+
+
+@pytest.fixture
+def pauses(monkeypatch):
+    slept = []
+    monkeypatch.setattr(
+        "imouse.device.keyboard.time.sleep",
+        lambda seconds: slept.append(("sleep", seconds)),
+    )
+    return slept
+
+
+def test_steps_normalise_to_keys_and_pauses():
+    assert _steps(["TAB", ("ENTER", 0.5)], 0.1) == [("TAB", 0.1), ("ENTER", 0.5)]
+
+
+def test_failed_and_typeable():
+    assert _failed(None) and _failed({"status": 1}) and not _failed({"status": 0})
+    assert _typeable("Hello, world ~") and _typeable("")
+    assert not _typeable("你好") and not _typeable("tab\there")
+
+
+def test_sequence_posts_steps_in_order_with_their_pauses(pauses):
+    transport = StatusTransport()
+    results = keyboard(transport).sequence(["TAB", ("DownArrow", 0.5), " "], 0.2)
+    assert results == [{"status": 0}] * 3
+    assert [data["data"]["fn_key"] for data in transport.sent] == [
+        "TAB",
+        "DownArrow",
+        " ",
+    ]
+    # No pause after the last step
+    assert pauses == [("sleep", 0.2), ("sleep", 0.5)]
+
+
+def test_sequence_stops_on_error(pauses):
+    transport = StatusTransport({"DownArrow": 1})
+    results = keyboard(transport).sequence(["TAB", "DownArrow", " "])
+    assert results == [{"status": 0}, {"status": 1}, None]
+    assert len(transport.sent) == 2
+    transport = StatusTransport({"DownArrow": 1})
+    results = keyboard(transport).sequence(
+        ["TAB", "DownArrow", " "], stop_on_error=False
+    )
+    assert results == [{"status": 0}, {"status": 1}, {"status": 0}]
+
+
+def test_pipelined_sequence_waits_only_where_it_pauses(monkeypatch):
+    transport = PipelinedTransport({"B": 1})
+    monkeypatch.setattr(
+        "imouse.device.keyboard.time.sleep",
+        lambda seconds: transport.log.append(("sleep", seconds)),
+    )
+    results = keyboard(transport).sequence(["A", ("B", 0.5), "C", "D"])
+    # A and B go out back to back, the failure of B stops the steps behind the pause
+    assert transport.log == [("submit", "A"), ("submit", "B")]
+    assert results == [{"status": 0}, {"status": 1}, None, None]
+    transport.log.clear()
+    keyboard(transport).sequence(["A", ("C", 0.5), "D"])
+    assert transport.log == [
+        ("submit", "A"),
+        ("submit", "C"),
+        ("sleep", 0.5),
+        ("submit", "D"),
+    ]
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from imouse import manifest
+from imouse.manifest import Manifest, MediaLock
+
+
+def write(path: str, content: bytes = b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def test_plan_diffs_listing_against_manifest(tmp_path):
+    mirror = Manifest(str(tmp_path), "/docs")
+    mirror.entries = {
+        "/docs/same": {"size": 1, "mtime": 10, "sha1": "a"},
+        "/docs/grown": {"size": 1, "mtime": 10, "sha1": "a"},
+        "/docs/missing": {"size": 1, "mtime": 10, "sha1": "a"},
+        "/docs/gone": {"size": 1, "mtime": 10, "sha1": "a"},
+    }
+    write(str(tmp_path / "same"))
+    write(str(tmp_path / "grown"))
+    fetch, removed, unchanged, rejected = mirror.plan(
+        {
+            "/docs/same": {"size": 1, "mtime": 10},
+            "/docs/grown": {"size": 2, "mtime": 10},
+            "/docs/missing": {"size": 1, "mtime": 10},
+            "/docs/new": {"size": 1, "mtime": None},
+        }
+    )
+    assert sorted(fetch) == ["/docs/grown", "/docs/missing", "/docs/new"]
+    assert removed == ["/docs/gone"]
+    assert unchanged == 1
+    assert rejected == []
+
+
+def test_files_without_markers_are_compared_by_hash(tmp_path):
+    media = tmp_path / "media"
+    mirror = Manifest(str(tmp_path / "mirror"), "/")
+    listing = {"/a/f": {"size": None, "mtime": None}}
+    write(str(media / "f"), b"one")
+    assert mirror.collect(str(media), "/a/f", listing["/a/f"]) is True
+    # Nothing tells whether the file changed, so it is fetched again
+    assert mirror.plan(listing)[0] == ["/a/f"]
+    write(str(media / "f"), b"one")
+    assert mirror.collect(str(media), "/a/f", listing["/a/f"]) is False
+    write(str(media / "f"), b"two")
+    assert mirror.collect(str(media), "/a/f", listing["/a/f"]) is True
+    assert mirror.collect(str(media), "/a/f", listing["/a/f"]) is None
+
+
+def test_paths_escaping_the_mirror_are_rejected(tmp_path):
+    mirror = Manifest(str(tmp_path / "mirror"), "/docs")
+    with pytest.raises(ValueError):
+        mirror.local_path("/docs/../../etc/passwd")
+    with pytest.raises(ValueError):
+        mirror.local_path("/other/file")
+    fetch, _, _, rejected = mirror.plan(
+        {
+            "/docs/../secret": {"size": 1, "mtime": 1},
+            "/docs/ok": {"size": 1, "mtime": 1},
+        }
+    )
+    assert fetch == ["/docs/ok"]
+    assert rejected == ["/docs/../secret"]
+
+
+def test_media_locks_are_dropped_after_use(tmp_path):
+    with MediaLock(str(tmp_path), ["/a/f", "/b/f", "/b/g"]):
+        assert len(manifest._locks) == 2
+    assert manifest._locks == {}
@@ -0,0 +1,54 @@
+import pytest
+
+from imouse import registry
+from imouse.registry import DeviceRegistry
+
+
+class Devices:
+    def __init__(self, responses: list):
+        self.responses = responses
+        self.calls = 0
+
+    def get_all(self):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class Console:
+    def __init__(self, *responses):
+        self.device = Devices(list(responses))
+
+
+def test_lookups_share_a_refresh_per_ttl():
+    console = Console({"status": 0, "data": {"a": {"gid": "1"}}})
+    devices = DeviceRegistry(console, ttl=60)
+    assert devices.find(gid="1") == ["a"]
+    assert "a" in devices and len(devices) == 1
+    assert console.device.calls == 1
+
+
+def test_failed_refreshes_back_off(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(registry.time, "monotonic", lambda: now[0])
+    console = Console(
+        {"status": 1},
+        ConnectionError("down"),
+        {"status": 0, "data": {"a": {}}},
+    )
+    devices = DeviceRegistry(console, ttl=60)
+    assert devices.get("a") is None
+    # The failure is remembered, lookups do not retry at once
+    assert devices.get("a") is None
+    assert console.device.calls == 1
+    now[0] += registry.RETRY_DELAY
+    with pytest.raises(ConnectionError):
+        devices.get("a")
+    now[0] += registry.RETRY_DELAY
+    assert devices.get("a") is None
+    assert console.device.calls == 2
+    now[0] += registry.RETRY_DELAY
+    assert devices.get("a") == {"deviceid": "a"}
+    assert console.device.calls == 3
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from imouse import resilience
+from imouse.exceptions import (
+    CircuitOpenError,
+    KernelTimeout,
+    ResponseError,
+    TransportError,
+)
+from imouse.resilience import CallPolicy, CircuitBreaker
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+
+
+class Kernel:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.timeouts = []
+
+    def __call__(self, data: dict, timeout: float) -> dict:
+        self.timeouts.append(timeout)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def bound(**kwargs) -> CallPolicy:
+    return CallPolicy(**kwargs).bind("http://localhost:9912/api")
+
+
+def test_idempotent_funs_are_retried():
+    kernel = Kernel(TransportError("reset"), KernelTimeout("ocr", 1), {"status": 0})
+    assert bound(retries=2).call({"fun": "ocr"}, kernel) == {"status": 0}
+    assert kernel.timeouts == [30.0] * 3
+
+
+def test_input_and_rejected_requests_are_sent_once():
+    kernel = Kernel(TransportError("reset"))
+    with pytest.raises(TransportError):
+        bound().call({"fun": "click"}, kernel)
+    kernel = Kernel(ResponseError("ocr", 404, "not found"))
+    policy = bound()
+    with pytest.raises(ResponseError):
+        policy.call({"fun": "ocr"}, kernel)
+    # The kernel answered, so the breaker counts it as alive
+    assert policy.breaker.state == "closed"
+
+
+def test_outtime_sets_the_timeout():
+    kernel = Kernel({"status": 0})
+    bound().call({"fun": "shortcut", "data": {"outtime": 2000}}, kernel)
+    assert kernel.timeouts == [2 + resilience.OUTTIME_MARGIN]
+
+
+def test_breaker_opens_and_lets_one_trial_through(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("kernel", threshold=2, reset_timeout=10)
+    policy = bound(retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(TransportError):
+            policy.call({"fun": "ocr"}, Kernel(TransportError("reset")))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        policy.call({"fun": "ocr"}, Kernel())
+    now[0] += 10
+    assert breaker.state == "half-open"
+    # A failed trial opens the circuit again at once
+    with pytest.raises(TransportError):
+        policy.call({"fun": "ocr"}, Kernel(TransportError("reset")))
+    assert breaker.state == "open"
+    now[0] += 10
+    assert policy.call({"fun": "ocr"}, Kernel({"status": 0})) == {"status": 0}
+    assert breaker.state == "closed"
+
+
+def test_bind_copies_the_policy():
+    policy = CallPolicy(retries=5)
+    first = policy.bind("http://localhost:9912/api")
+    second = policy.bind("ws://localhost:9912/ws")
+    assert policy.breaker is None
+    assert first is not policy and first.breaker is not second.breaker
+    assert first.breaker.kernel == "localhost:9912"
+    shared = CircuitBreaker("kernel")
+    policy = CallPolicy(breaker=shared)
+    assert policy.bind("http://a").breaker is policy.bind("http://b").breaker is shared
+
+
+def test_async_calls_follow_the_policy(monkeypatch):
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(resilience.asyncio, "sleep", no_sleep)
+    outcomes = [TransportError("reset"), {"status": 0}]
+
+    async def send(data: dict, timeout: float) -> dict:
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    result = asyncio.run(bound().acall({"fun": "ocr"}, send))
+    assert result == {"status": 0}
@@ -0,0 +1,134 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from imouse.cache import FrameCache, OcrCache
+from imouse.device import Device
+from imouse.exceptions import CommandError
+from imouse.scheduler import CommandQueue, CommandScheduler, priority, resolve
+
+
+def move(x: int) -> dict:
+    return {"fun": "mouse_move", "data": {"x": x}}
+
+
+def click(x: int) -> dict:
+    return {"fun": "click", "data": {"x": x}}
+
+
+def drain(queue: CommandQueue) -> list:
+    commands = []
+    while len(queue):
+        commands.append(queue.pop())
+    return commands
+
+
+def test_lower_priority_runs_first_and_fifo_within_one():
+    queue = CommandQueue()
+    for x, level in ((1, 10), (2, 0), (3, 10), (4, 0)):
+        queue.push(click(x), level, Future())
+    assert [command.data["data"]["x"] for command in drain(queue)] == [2, 4, 1, 3]
+    assert queue.pop() is None
+
+
+def test_consecutive_moves_coalesce_into_the_last():
+    queue = CommandQueue()
+    futures = [Future() for _ in range(4)]
+    queue.push(move(1), 10, futures[0])
+    queue.push(move(2), 10, futures[1])
+    queue.push(click(3), 10, futures[2])
+    queue.push(move(4), 10, futures[3])
+    commands = drain(queue)
+    assert [command.data for command in commands] == [move(2), click(3), move(4)]
+    # Both moves share the response of the one that was sent
+    resolve(commands[0].futures, {"status": 0})
+    assert futures[0].result() == futures[1].result() == {"status": 0}
+
+
+def test_moves_do_not_coalesce_across_priorities_or_a_pop():
+    queue = CommandQueue()
+    queue.push(move(1), 10, Future())
+    queue.push(move(2), 0, Future())
+    assert len(queue) == 2
+    queue.pop()
+    queue.pop()
+    queue.push(move(3), 10, Future())
+    queue.push(move(4), 10, Future())
+    assert [command.data for command in drain(queue)] == [move(4)]
+    disabled = CommandQueue(coalesce=False)
+    disabled.push(move(1), 10, Future())
+    disabled.push(move(2), 10, Future())
+    assert len(disabled) == 2
+
+
+class GatedTransport:
+    def __init__(self):
+        self.busy = threading.Event()
+        self.gate = threading.Event()
+        self.sent = []
+
+    def post(self, data: dict) -> dict:
+        self.busy.set()
+        self.gate.wait(5)
+        self.sent.append(data["data"]["x"])
+        return {"status": 0}
+
+
+def test_scheduler_sends_urgent_commands_first():
+    transport = GatedTransport()
+    scheduler = CommandScheduler(transport)
+    scheduler.enable("a")
+    try:
+        # The first command holds the worker while the others queue up
+        first = scheduler.submit("a", click(0))
+        assert transport.busy.wait(5)
+        bulk = scheduler.submit("a", click(1))
+        with priority(0):
+            urgent = scheduler.submit("a", click(2))
+        assert scheduler.submit("b", click(3)) is None
+        transport.gate.set()
+        for future in (first, bulk, urgent):
+            assert future.result(5) == {"status": 0}
+    finally:
+        scheduler.close()
+    assert transport.sent == [0, 2, 1]
+
+
+class BinaryTransport:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.threads = []
+
+    def post(self, data: dict) -> dict:
+        raise AssertionError("binary requests go through post_binary")
+
+    def post_binary(self, data: dict):
+        self.threads.append(threading.current_thread().name)
+        return self.replies.pop(0)
+
+
+class FakeApi:
+    def __init__(self, transport):
+        self._transport = transport
+        self._frame_cache = FrameCache()
+        self._templates = None
+        self._ocr_cache = OcrCache()
+        self._scheduler = CommandScheduler(transport)
+
+
+def test_binary_screenshot_is_queued_on_a_scheduled_device():
+    transport = BinaryTransport([b"frame", {"status": 1, "message": "offline"}])
+    api = FakeApi(transport)
+    api._scheduler.enable("a")
+    try:
+        utility = Device(api, "a").utility
+        frame = utility.screenshot(binary=True)
+        failed = utility.screenshot(binary=True)
+    finally:
+        api._scheduler.close()
+    assert transport.threads == ["imouse-scheduler-a"] * 2
+    assert frame.bytes == b"frame"
+    # A JSON reply falls back to the decoded screenshot and its error
+    with pytest.raises(CommandError):
+        failed.bytes
@@ -0,0 +1,50 @@
+import base64
+import gzip
+import io
+
+import pytest
+
+from imouse.exceptions import CommandError
+from imouse.screenshot import Screenshot
+
+
+def test_gzip_image_is_inflated():
+    image = bytes(range(256)) * 1000
+    encoded = base64.b64encode(gzip.compress(image)).decode()
+    screenshot = Screenshot({"status": 0, "data": {"gzip": True, "img": encoded}})
+    assert screenshot.bytes == image
+
+
+def test_raw_frame_is_returned_as_is():
+    assert Screenshot(raw=b"\x89PNG").bytes == b"\x89PNG"
+
+
+def test_failed_capture_raises():
+    with pytest.raises(CommandError):
+        Screenshot({"status": 1, "message": "offline"}).bytes
+
+
+def test_decoding_leaves_the_response_as_it_was():
+    encoded = base64.b64encode(b"\x89PNG").decode()
+    response = {"status": 0, "data": {"img": encoded}}
+    screenshot = Screenshot(response)
+    assert screenshot.bytes == b"\x89PNG"
+    assert response["data"]["img"] == encoded
+    assert screenshot.bytes is screenshot.bytes
+
+
+def test_bmp_and_jpg_arrays_share_the_rgb_order():
+    np = pytest.importorskip("numpy")
+    Image = pytest.importorskip("PIL.Image")
+    pixels = np.zeros((32, 16, 3), dtype=np.uint8)
+    pixels[:16] = (255, 0, 0)
+    pixels[16:] = (0, 0, 255)
+    arrays = {}
+    for format in ("BMP", "JPEG"):
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format=format, quality=100)
+        arrays[format] = Screenshot(raw=buffer.getvalue()).array
+    assert (arrays["BMP"] == pixels).all()
+    assert arrays["JPEG"].shape == pixels.shape
+    for y in (4, 28):
+        assert (np.abs(arrays["JPEG"][y, 8].astype(int) - pixels[y, 8]) <= 8).all()
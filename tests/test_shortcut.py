@@ -0,0 +1,77 @@
+import io
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from imouse import vision
+from imouse.device.shortcut import SEARCH_FIELD, _Launched, _Screen, _Settled
+from imouse.screenshot import Screenshot
+
+
+def frame(level: int, top: int = None) -> Screenshot:
+    pixels = np.full((100, 50, 3), level, dtype=np.uint8)
+    if top is not None:
+        pixels[:20] = top
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return Screenshot(raw=buffer.getvalue())
+
+
+class Screen:
+    def __init__(self, last):
+        self.vision = vision
+        self.last = last
+
+
+def test_settled_waits_for_its_band():
+    condition = _Settled(Screen(frame(0)), bottom=SEARCH_FIELD)
+    # A change below the band is not the search field
+    assert not condition(frame(200, top=0))
+    assert not condition(frame(200, top=0))
+    assert not condition(frame(200, top=200))
+    assert condition(frame(200, top=200))
+
+
+def test_launched_skips_a_launch_screen():
+    condition = _Launched(Screen(frame(0)), splash=60)
+    splash = frame(255)
+    assert not condition(splash)
+    # A still launch screen does not end the step
+    assert not condition(splash)
+    assert not condition(splash)
+    assert not condition(frame(100))
+    assert condition(frame(100))
+
+
+def test_launched_accepts_a_screen_still_for_splash_seconds():
+    condition = _Launched(Screen(frame(0)), splash=0)
+    assert not condition(frame(255))
+    assert condition(frame(255))
+
+
+def test_polling_starts_over_at_each_step():
+    opened = []
+
+    def frames(timeout):
+        opened.append(timeout)
+        yield frame(0)
+        yield frame(1)
+
+    screen = _Screen(vision, frames)
+    for _ in range(2):
+        screen.wait(lambda shot: shot.array[0, 0, 0] == 1, time.monotonic() + 5, 0)
+    screen.close()
+    # The first frame, then one fresh poll per step with the whole step timeout
+    assert opened[0] == 0
+    assert len(opened) == 3 and all(4 < timeout <= 5 for timeout in opened[1:])
+
+
+def test_an_ended_stream_falls_back_to_the_step_delay():
+    stream = iter([frame(0)])
+    screen = _Screen(vision, lambda timeout: stream)
+    start = time.monotonic()
+    screen.wait(lambda shot: False, start + 5, 0.1)
+    assert 0.1 <= time.monotonic() - start < 1
@@ -0,0 +1,122 @@
+import asyncio
+import base64
+import threading
+import time
+
+from imouse.aio.stream import AsyncScreenshotStream
+from imouse.payload import Payload
+from imouse.stream import ScreenshotStream
+
+
+class FakeTransport:
+    def __init__(self):
+        self.listeners = []
+        self.posted = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+        return lambda: self.listeners.remove(listener)
+
+    def post(self, data):
+        self.posted.append(data)
+        return {"status": 0}
+
+    def push(self, message):
+        for listener in list(self.listeners):
+            listener(message)
+
+
+class FakeAsyncTransport(FakeTransport):
+    async def post(self, data):
+        return super().post(data)
+
+
+def frame(device_id: str, image: bytes) -> dict:
+    return {
+        "fun": "loop_device_screenshot",
+        "status": 0,
+        "data": {"deviceid": device_id, "img": base64.b64encode(image).decode()},
+    }
+
+
+def push_frames(transport):
+    transport.push(frame("other", b"skip"))
+    transport.push({"fun": "dev_change", "data": {"deviceid": "dev"}})
+    for image in (b"1", b"2", b"3"):
+        transport.push(frame("dev", image))
+
+
+def test_stream_keeps_the_newest_frames_of_its_device():
+    transport = FakeTransport()
+    stream = ScreenshotStream(transport, Payload(), "dev", duration=5)
+    stream.start()
+    push_frames(transport)
+    # The buffer of 2 dropped the oldest frame
+    assert next(stream).bytes == b"2"
+    assert next(stream).bytes == b"3"
+    stream.close()
+    assert list(stream) == []
+    assert transport.listeners == []
+    assert transport.posted[-1]["data"]["stop"] is True
+
+
+def test_stream_stop_wakes_a_waiting_consumer():
+    transport = FakeTransport()
+    stream = ScreenshotStream(transport, Payload(), "dev", duration=5)
+    stream.start()
+    frames = []
+    consumer = threading.Thread(target=lambda: frames.extend(stream))
+    consumer.start()
+    time.sleep(0.05)
+    stream.close()
+    # The sentinel ends the iteration long before the deadline
+    consumer.join(1)
+    assert not consumer.is_alive()
+    assert frames == []
+
+
+def test_stream_closed_before_start_stops_at_once():
+    stream = ScreenshotStream(FakeTransport(), Payload(), "dev")
+    stream.close()
+    assert list(stream) == []
+
+
+def test_async_stream_keeps_the_newest_frames_of_its_device():
+    async def run():
+        transport = FakeAsyncTransport()
+        stream = AsyncScreenshotStream(transport, Payload(), "dev", duration=5)
+        await stream.start()
+        push_frames(transport)
+        assert (await stream.__anext__()).bytes == b"2"
+        assert (await stream.__anext__()).bytes == b"3"
+        await stream.close()
+        assert [frame async for frame in stream] == []
+        assert transport.listeners == []
+
+    asyncio.run(run())
+
+
+def test_async_stream_stop_wakes_a_waiting_consumer():
+    async def run():
+        stream = AsyncScreenshotStream(FakeAsyncTransport(), Payload(), "dev", 5)
+        await stream.start()
+        consumer = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        await stream.close()
+        assert [frame async for frame in stream] == []
+        try:
+            await asyncio.wait_for(consumer, 1)
+        except StopAsyncIteration:
+            return
+        raise AssertionError("the consumer got a frame")
+
+    asyncio.run(run())
+
+
+def test_async_stream_closed_before_start_stops_at_once():
+    async def run():
+        stream = AsyncScreenshotStream(FakeAsyncTransport(), Payload(), "dev")
+        await stream.close()
+        assert [frame async for frame in stream] == []
+
+    asyncio.run(run())
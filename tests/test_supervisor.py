@@ -0,0 +1,113 @@
+from imouse.resilience import CircuitBreaker
+from imouse.supervisor import Supervisor
+
+
+class Registry:
+    def __init__(self, devices: dict):
+        self.devices = devices
+        self.answered = True
+
+    def _refresh_locked(self):
+        return self.answered
+
+    def __iter__(self):
+        return iter(list(self.devices))
+
+    def get(self, device_id: str):
+        return self.devices.get(device_id)
+
+
+class Airplay:
+    def __init__(self):
+        self.connected = []
+
+    def connect(self, device_id: str, force: bool = False):
+        self.connected.append(device_id)
+        return {"status": 1, "message": "busy"}
+
+    def connect_all(self):
+        return {"status": 0}
+
+
+class Console:
+    def __init__(self):
+        self.airplay = Airplay()
+        self.restarts = 0
+
+    def restart(self):
+        self.restarts += 1
+        return {"status": 0}
+
+
+class Transport:
+    def __init__(self):
+        self.breaker = CircuitBreaker("http://localhost:9912", threshold=1)
+
+
+class Api:
+    def __init__(self):
+        self._console = Console()
+        self._transport = Transport()
+
+    def console(self):
+        return self._console
+
+
+def test_removed_devices_are_forgotten():
+    registry = Registry({"a": {"state": 0}, "b": {"state": 1}})
+    supervisor = Supervisor(Api(), registry=registry, bulk_ratio=1)
+    try:
+        supervisor.check()
+        supervisor._executor.shutdown(wait=True)
+        assert list(supervisor.status()) == ["a"]
+        assert supervisor.status()["a"]["error"] == "busy"
+        del registry.devices["a"]
+        supervisor.check()
+        assert supervisor.status() == {}
+        assert not supervisor._attempts and not supervisor._next
+    finally:
+        supervisor.close()
+
+
+def test_recovery_is_reported_once():
+    recovered = []
+    registry = Registry({"a": {"state": 0}})
+    supervisor = Supervisor(
+        Api(),
+        registry=registry,
+        on_recovered=lambda device_id, down: recovered.append(device_id),
+    )
+    try:
+        supervisor.check()
+        registry.devices["a"] = {"state": 1}
+        supervisor.check()
+        supervisor.check()
+        assert recovered == ["a"]
+    finally:
+        supervisor.close()
+
+
+def test_pass_is_skipped_when_the_refresh_fails():
+    registry = Registry({"a": {"state": 0}})
+    registry.answered = False
+    api = Api()
+    supervisor = Supervisor(api, registry=registry)
+    try:
+        supervisor.check()
+        assert supervisor.status() == {}
+        assert api._console.airplay.connected == []
+    finally:
+        supervisor.close()
+
+
+def test_restarting_the_console_closes_the_circuit():
+    api = Api()
+    api._transport.breaker.failure()
+    assert api._transport.breaker.state != "closed"
+    supervisor = Supervisor(api, registry=Registry({}))
+    try:
+        assert supervisor.restart_console() == {"status": 0}
+        assert api._console.restarts == 1
+        assert api._transport.breaker.state == "closed"
+    finally:
+        supervisor.close()
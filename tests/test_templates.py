@@ -0,0 +1,60 @@
+import pytest
+
+from imouse.templates import TemplateRegistry
+
+
+def image(seed: int) -> bytes:
+    return bytes([seed]) * 300
+
+
+# 300 image bytes and 400 base64 characters
+SIZE = 700
+
+
+def test_least_recently_used_templates_are_evicted_beyond_the_budget():
+    registry = TemplateRegistry(max_bytes=2 * SIZE)
+    registry.load("a", image(1))
+    registry.load("b", image(2))
+    # Using a makes b the least recently used
+    registry.encoded("a")
+    registry.load("c", image(3))
+    assert registry._size == 2 * SIZE
+    assert list(registry._templates) == [
+        registry._names["a"],
+        registry._names["c"],
+    ]
+    with pytest.raises(KeyError, match="evicted"):
+        registry.encoded("b")
+
+
+def test_evicted_template_is_reloaded_from_disk(tmp_path):
+    registry = TemplateRegistry(max_bytes=SIZE, directory=str(tmp_path))
+    registry.load("a", image(1))
+    registry.load("b", image(2))
+    assert registry._names["a"] not in registry._templates
+    assert registry.encoded("a") == TemplateRegistry().encoded(image(1))
+    assert registry._names["a"] in registry._templates
+
+
+def test_names_persist_across_runs(tmp_path):
+    registry = TemplateRegistry(directory=str(tmp_path))
+    key = registry.load("a", image(1))
+    registry.load("b", image(2))
+    registry.remove("b")
+    registry.remove("missing")
+    reloaded = TemplateRegistry(directory=str(tmp_path))
+    assert "a" in reloaded and "b" not in reloaded
+    assert reloaded._names["a"] == key
+    # The content is read back from the directory on first use
+    assert reloaded.encoded("a") == registry.encoded("a")
+
+
+def test_removed_name_is_unknown():
+    registry = TemplateRegistry()
+    registry.load("a", image(1))
+    registry.remove("a")
+    assert "a" not in registry
+    with pytest.raises(KeyError, match="Unknown template"):
+        registry.encoded("a")
+    # Its content stays cached until evicted
+    assert len(registry._templates) == 1
@@ -0,0 +1,33 @@
+from imouse import transfer
+from imouse.transfer import TransferManager
+
+
+def test_failed_chunks_back_off_between_attempts(monkeypatch):
+    delays = []
+    monkeypatch.setattr(transfer.time, "sleep", delays.append)
+    monkeypatch.setattr(transfer.random, "uniform", lambda low, high: high)
+    calls = []
+
+    def call(files, timeout):
+        calls.append(files)
+        if len(calls) < 3:
+            raise ConnectionError("dropped")
+        return {"status": 0}
+
+    with TransferManager(None, retries=3, backoff=0.5, max_backoff=0.8) as manager:
+        result = manager._start(call, ["a"], ["f"], {}, None).wait()
+    assert result.ok
+    assert result.retries == 2
+    assert delays == [0.5, 0.8]
+    assert calls == [["f"]] * 3
+
+
+def test_chunks_give_up_after_the_retries(monkeypatch):
+    monkeypatch.setattr(transfer.time, "sleep", lambda seconds: None)
+    with TransferManager(None, retries=1) as manager:
+        result = manager._start(
+            lambda files, timeout: {"status": 1}, ["a"], ["f"], {}, None
+        ).wait()
+    assert not result.ok
+    assert result.failed == [(["f"], {"status": 1})]
+    assert result.retries == 1
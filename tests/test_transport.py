@@ -0,0 +1,180 @@
+from concurrent.futures import Future
+
+import pytest
+import websocket
+
+from imouse.exceptions import KernelTimeout, TransportError
+from imouse.transport import WebSocketTransport, _Connection
+
+
+class FakeSocket:
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.connected = True
+
+    def recv_data(self):
+        if not self.frames:
+            self.connected = False
+            raise websocket.WebSocketConnectionClosedException("closed")
+        return self.frames.pop(0)
+
+
+def text(message: str):
+    return websocket.ABNF.OPCODE_TEXT, message.encode()
+
+
+def test_bad_message_and_listener_do_not_stop_reader():
+    transport = WebSocketTransport("ws://localhost:9912/ws")
+    events = []
+
+    def broken(message):
+        raise RuntimeError("listener bug")
+
+    transport.subscribe(broken)
+    transport.subscribe(events.append)
+    connection = _Connection(
+        FakeSocket([text("<html>"), text('{"event": 1}'), text('{"msgid": 1}')])
+    )
+    future = Future()
+    connection.pending[1] = future
+    transport._read_loop(connection)
+    assert events == [{"event": 1}]
+    assert future.result(0) == {"msgid": 1}
+
+
+def test_requests_of_a_replaced_connection_fail_when_it_closes():
+    transport = WebSocketTransport("ws://localhost:9912/ws")
+    old = _Connection(FakeSocket([]))
+    transport._connection = _Connection(FakeSocket([]))
+    future = Future()
+    old.pending[7] = future
+    transport._read_loop(old)
+    with pytest.raises(TransportError):
+        future.result(0)
+    # The newer connection stays in use
+    assert transport._connection is not None
+
+
+class FakeMessage:
+    def __init__(self, type, data):
+        self.type = type
+        self.data = data
+
+
+class FakeAsyncSocket:
+    def __init__(self, messages):
+        self.messages = messages
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for message in self.messages:
+            yield message
+        self.closed = True
+
+
+def test_async_bad_message_does_not_stop_reader():
+    aiohttp = pytest.importorskip("aiohttp")
+    import asyncio
+
+    from imouse.aio.transport import AsyncWebSocketTransport
+    from imouse.aio.transport import _Connection as AsyncConnection
+
+    async def run():
+        transport = AsyncWebSocketTransport("ws://localhost:9912/ws")
+        connection = AsyncConnection(
+            FakeAsyncSocket(
+                [
+                    FakeMessage(aiohttp.WSMsgType.TEXT, "<html>"),
+                    FakeMessage(aiohttp.WSMsgType.TEXT, '{"msgid": 1}'),
+                ]
+            )
+        )
+        answered = asyncio.get_running_loop().create_future()
+        lost = asyncio.get_running_loop().create_future()
+        connection.pending[1] = answered
+        connection.pending[2] = lost
+        transport._connection = AsyncConnection(FakeAsyncSocket([]))
+        await transport._read_loop(connection)
+        assert answered.result() == {"msgid": 1}
+        with pytest.raises(TransportError):
+            lost.result()
+
+    asyncio.run(run())
+
+
+class SentSocket(FakeSocket):
+    def __init__(self):
+        super().__init__([])
+        self.sent = []
+        self.closed = False
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def close(self):
+        self.closed = True
+
+
+def test_timed_out_request_leaves_no_pending_entry():
+    transport = WebSocketTransport("ws://localhost:9912/ws")
+    connection = _Connection(SentSocket())
+    transport._connection = connection
+    events = []
+    transport.subscribe(events.append)
+    with pytest.raises(KernelTimeout):
+        transport._wait({"fun": "get_device_list"}, 0.01)
+    assert connection.pending == {}
+    # The late response is neither an event nor kept
+    transport._dispatch(connection, {"msgid": 1, "status": 0})
+    assert events == []
+
+
+def test_late_binary_frame_does_not_answer_the_next_request():
+    transport = WebSocketTransport("ws://localhost:9912/ws")
+    connection = _Connection(SentSocket())
+    transport._connection = connection
+    with pytest.raises(KernelTimeout):
+        transport._wait({"fun": "get_device_screenshot"}, 0.01, binary=True)
+    assert connection.pending == {}
+    future = transport.submit({"fun": "get_device_screenshot"}, binary=True)
+    transport._dispatch_binary(connection, b"late")
+    assert not future.done()
+    transport._dispatch_binary(connection, b"frame")
+    assert future.result(0) == b"frame"
+
+
+def test_connect_does_not_hold_the_lock(monkeypatch):
+    transport = WebSocketTransport("ws://localhost:9912/ws")
+    existing = _Connection(SentSocket())
+    ws = SentSocket()
+
+    def create_connection(url, timeout):
+        # Another thread connects while this one waits for the socket
+        assert not transport._lock.locked()
+        transport._connection = existing
+        return ws
+
+    monkeypatch.setattr(websocket, "create_connection", create_connection)
+    ws.settimeout = lambda timeout: None
+    assert transport._connect() is existing
+    assert ws.closed
+
+
+def test_binary_frames_answer_requests_in_send_order():
+    transport = WebSocketTransport("ws://localhost:9912/ws")
+    connection = _Connection(SentSocket())
+    transport._connection = connection
+    first, error, second = (
+        transport.submit({"fun": "get_device_screenshot"}, binary=True)
+        for _ in range(3)
+    )
+    # The kernel answers a failed capture with JSON, it takes no frame
+    transport._dispatch(connection, {"msgid": 2, "status": 1})
+    transport._dispatch_binary(connection, b"one")
+    transport._dispatch_binary(connection, b"two")
+    assert first.result(0) == b"one"
+    assert error.result(0) == {"msgid": 2, "status": 1}
+    assert second.result(0) == b"two"
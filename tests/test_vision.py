@@ -0,0 +1,79 @@
+import io
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from imouse import vision
+from imouse.screenshot import Screenshot
+
+
+def png(pixels) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def scene():
+    rng = np.random.default_rng(7)
+    pixels = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    template = pixels[40:60, 70:100].copy()
+    return pixels, template
+
+
+def test_ncc_finds_template(scene):
+    pixels, template = scene
+    frame = Screenshot(raw=png(pixels))
+    matches = vision.match_templates(frame, [vision.to_gray(template)])
+    assert len(matches) == 1
+    match = matches[0]
+    assert (match.x, match.y, match.width, match.height) == (70, 40, 30, 20)
+    assert match.similarity > 0.99
+
+
+def test_ncc_respects_accuracy_and_area(scene):
+    pixels, template = scene
+    frame = Screenshot(raw=png(pixels))
+    gray = vision.to_gray(template)
+    assert (
+        vision.match_templates(frame, [gray], area=[[0, 0], [0, 30], [60, 0], [60, 30]])
+        == []
+    )
+    assert vision.match_templates(frame, [np.zeros((20, 30), np.float32)]) == []
+
+
+def test_ncc_repeat_finds_every_copy():
+    rng = np.random.default_rng(3)
+    pixels = rng.integers(0, 256, (80, 80, 3), dtype=np.uint8)
+    pixels[50:60, 50:60] = pixels[5:15, 5:15]
+    template = vision.to_gray(pixels[5:15, 5:15])
+    frame = Screenshot(raw=png(pixels))
+    matches = vision.match_templates(frame, [template], repeat=True, accuracy=0.95)
+    assert sorted((match.x, match.y) for match in matches) == [(5, 5), (50, 50)]
+
+
+def test_results_use_kernel_fields(scene):
+    pixels, template = scene
+    frame = Screenshot(raw=png(pixels))
+    matches = vision.match_templates(frame, [vision.to_gray(template)])
+    assert vision.image_result("find_image", matches) == [85, 50]
+    assert vision.image_result("find_image_ex", matches) == [
+        {"index": 0, "result": [85, 50]}
+    ]
+    ret = vision.response("find_image", "dev", vision.image_result("find_image", []))
+    assert ret["data"] == {"deviceid": "dev", "code": 1, "result": []}
+
+
+def test_region_digest_sees_single_pixel_changes(scene):
+    pixels, _ = scene
+    area = [[10, 10], [10, 49], [49, 10], [49, 49]]
+    before = vision.region_digest(Screenshot(raw=png(pixels)), area)
+    changed = pixels.copy()
+    changed[30, 30, 0] ^= 1
+    assert vision.region_digest(Screenshot(raw=png(changed)), area) != before
+    # Pixels outside the region do not matter
+    changed = pixels.copy()
+    changed[100, 100] ^= 1
+    assert vision.region_digest(Screenshot(raw=png(changed)), area) == before
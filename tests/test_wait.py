@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from imouse import wait
+from imouse.cache import FrameCache, OcrCache
+from imouse.device import Device
+from imouse.scheduler import CommandScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(wait.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(wait.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_intervals_grow_up_to_the_cap_and_stop_at_the_deadline(clock):
+    delays = []
+    for delay in wait.intervals(3.0, 0.5, 1.0, backoff=1.5):
+        delays.append(delay)
+        clock.now += delay
+    # The last delay is clipped to the deadline
+    assert delays == [0.5, 0.75, 1.0, 0.75]
+
+
+def test_poll_returns_the_first_hit(clock):
+    results = iter([None, 0, {"status": 0}, {"status": 1}])
+    assert wait.poll(lambda: next(results), 10, 0.1) == {"status": 0}
+    assert clock.slept == [0.1, pytest.approx(0.15)]
+
+
+def test_poll_returns_none_on_timeout(clock):
+    calls = []
+    assert wait.poll(lambda: calls.append(1), 1.0, 0.2, 0.4) is None
+    assert clock.now == pytest.approx(1.0)
+    assert max(clock.slept) == pytest.approx(0.4)
+    assert len(calls) == len(clock.slept) + 1
+
+
+def test_apoll_returns_the_first_hit_or_none():
+    async def run():
+        results = iter([None, "hit"])
+
+        async def check():
+            return next(results)
+
+        assert await wait.apoll(check, 1.0, 0.01) == "hit"
+
+        async def miss():
+            return None
+
+        assert await wait.apoll(miss, 0.05, 0.01) is None
+
+    asyncio.run(run())
+
+
+def test_found_needs_a_result():
+    assert wait.found({"status": 0, "data": {"result": [1]}})
+    assert wait.found({"status": 0, "data": {"result": []}}) is None
+    assert wait.found({"status": 1, "data": {"result": [1]}}) is None
+    assert wait.found({"status": 0}) is None
+
+
+def test_contains_text_searches_nested_results():
+    ret = {"status": 0, "data": {"result": [{"text": "Sign in"}, ["Cancel"]]}}
+    assert wait.contains_text(ret, "Sign") is ret
+    assert wait.contains_text(ret, "Cancel") is ret
+    assert wait.contains_text(ret, "Log out") is None
+    # The device ID is not recognised text
+    assert (
+        wait.contains_text({"status": 0, "data": {"deviceid": "Sign"}}, "Sign") is None
+    )
+    assert wait.contains_text({"status": 1, "data": {"result": "Sign"}}, "Sign") is None
+
+
+class Transport:
+    def post(self, data: dict) -> dict:
+        raise AssertionError("local waits do not ask the kernel")
+
+
+class FakeApi:
+    def __init__(self):
+        self._transport = Transport()
+        self._frame_cache = FrameCache()
+        self._templates = None
+        self._ocr_cache = OcrCache()
+        self._scheduler = CommandScheduler(self._transport)
+
+
+def local_utility(monkeypatch, frames: list, hits: set):
+    utility = Device(FakeApi(), "a").utility
+    watched = []
+
+    def watch(timeout, interval, max_interval):
+        watched.append((timeout, interval, max_interval))
+        yield from frames
+
+    def search(frame, *args, **kwargs):
+        result = [frame] if frame in hits else []
+        return {"status": 0, "data": {"result": result}}
+
+    monkeypatch.setattr(utility, "_watch", watch)
+    monkeypatch.setattr(utility, "_match_local", search)
+    monkeypatch.setattr(utility, "_pick_local", search)
+    return utility, watched
+
+
+def test_local_image_wait_returns_the_first_matching_frame(monkeypatch):
+    utility, watched = local_utility(monkeypatch, [1, 2, 3], {2, 3})
+    ret = utility.wait_for_image(b"icon", local=True, timeout=4, interval=0.2)
+    assert ret["data"]["result"] == [2]
+    assert watched == [(4, 0.2, 1.0)]
+
+
+def test_local_color_wait_returns_none_once_the_frames_end(monkeypatch):
+    utility, _ = local_utility(monkeypatch, [1, 2], set())
+    assert utility.wait_for_color({}, local=True, timeout=1) is None
+    utility, _ = local_utility(monkeypatch, [1, 2], {1})
+    assert utility.wait_for_color({}, local=True)["data"]["result"] == [1]